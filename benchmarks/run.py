@@ -0,0 +1,313 @@
+"""Offline benchmarks of ticketpy's parsing and paging hot paths.
+
+Every benchmark runs against synthetic Discovery API payloads
+(``ticketpy.synthetic``), served in-process or, for
+*paged_response.all.server*, by a local ``StandInServer``, so no API
+key or network is needed. Each is timed ``--repeat`` times (best run
+reported, as items/second), then run once more under ``tracemalloc``
+for its peak memory.
+
+Usage::
+
+    python benchmarks/run.py
+    python benchmarks/run.py -k page --events 20000
+    python benchmarks/run.py --json results/0.1.json
+    python benchmarks/run.py --compare results/0.1.json
+"""
+import argparse
+import atexit
+import gc
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import ticketpy  # noqa: E402
+from ticketpy import decoder, model, server, synthetic  # noqa: E402
+
+Result = namedtuple('result', ['name', 'items', 'seconds', 'rate',
+                               'peak_kib'])
+
+#: Benchmark name to function(dataset) returning (callable, item count)
+benchmarks = {}
+
+
+def benchmark(name):
+    """Registers a benchmark"""
+    def register(setup):
+        benchmarks[name] = setup
+        return setup
+    return register
+
+
+@benchmark('event.from_json')
+def event_from_json(data):
+    events = data.events
+
+    def run():
+        for e in events:
+            model.Event.from_json(e)
+    return run, len(events)
+
+
+@benchmark('event.from_json.lazy')
+def event_from_json_lazy(data):
+    events = data.events
+
+    def run():
+        for e in events:
+            model.Event.from_json(e, lazy=True)
+    return run, len(events)
+
+
+@benchmark('page.from_json')
+def page_from_json(data):
+    pages = _pages(data, 'events', 200)
+
+    def run():
+        for pg in pages:
+            model.Page.from_json(pg)
+    return run, len(data.events)
+
+
+@benchmark('page.from_json.classifications')
+def classifications_from_json(data):
+    tree = synthetic.Dataset(events=0, segments=20, genres=30,
+                             subgenres=20)
+    pages = _pages(tree, 'classifications', 20)
+
+    def run():
+        for pg in pages:
+            model.Page.from_json(pg)
+    return run, 20 * 30 * 20
+
+
+def decode(name):
+    """Benchmark of decoding page bodies with a JSON decoder"""
+    def setup(data):
+        decode = decoder.get(name)
+        bodies = [json.dumps(pg).encode('utf-8')
+                  for pg in _pages(data, 'events', 200)]
+
+        def run():
+            for body in bodies:
+                decode(body)
+        return run, len(data.events)
+    return setup
+
+
+for _name, (_, _module) in decoder.decoders.items():
+    if _module is not None:
+        benchmark('decode.' + _name)(decode(_name))
+
+
+@benchmark('assign_links')
+def assign_links(data):
+    events = data.events
+    obj = model.Event()
+
+    def run():
+        for e in events:
+            model._assign_links(obj, e)
+    return run, len(events)
+
+
+@benchmark('search_request')
+def search_request(data):
+    client = ticketpy.ApiClient('benchmark_key')
+    calls = 10000
+
+    def run():
+        for _ in range(calls):
+            client._search_request('events', size=200, stateCode='GA',
+                                   includeTBA=True, radius=10,
+                                   classificationName='Jazz')
+    return run, calls
+
+
+@benchmark('search_params')
+def search_params(data):
+    client = ticketpy.ApiClient('benchmark_key')
+    calls = 10000
+    # What EventQuery.find() passes: a few values among many None
+    kwargs = {k: None for k in client.events.attr_map}
+    kwargs.update(state_code='GA', classification_name='Jazz',
+                  include_tba='yes', radius=10, unit='miles',
+                  sort='date,asc', size=200, page=0)
+
+    def run():
+        for _ in range(calls):
+            client.events._search_params(**kwargs)
+    return run, calls
+
+
+@benchmark('paged_response.all')
+def paged_response_all(data):
+    session = synthetic.SyntheticSession(data)
+
+    def run():
+        client = ticketpy.ApiClient('benchmark_key', session=session)
+        client.events.find(size=200).all()
+    run()  # Encode (and cache) every page up front
+    return run, len(data.events)
+
+
+@benchmark('paged_response.all.stdlib_json')
+def paged_response_all_json(data):
+    session = synthetic.SyntheticSession(data)
+
+    def run():
+        client = ticketpy.ApiClient('benchmark_key', session=session,
+                                    json_decoder='json')
+        client.events.find(size=200).all()
+    run()
+    return run, len(data.events)
+
+
+@benchmark('paged_response.all.identity_map')
+def paged_response_all_identity(data):
+    session = synthetic.SyntheticSession(data)
+
+    def run():
+        client = ticketpy.ApiClient('benchmark_key', session=session,
+                                    identity_map='response')
+        client.events.find(size=200).all()
+    run()
+    return run, len(data.events)
+
+
+@benchmark('paged_response.all.fields')
+def paged_response_all_fields(data):
+    session = synthetic.SyntheticSession(data)
+
+    def run():
+        client = ticketpy.ApiClient('benchmark_key', session=session)
+        client.events.find(size=200, fields=[
+            'id', 'name', 'dates.start.dateTime', '_embedded.venues.0.id'
+        ]).all()
+    run()
+    return run, len(data.events)
+
+
+@benchmark('paged_response.all.server')
+def paged_response_server(data):
+    stand_in = server.StandInServer(data).start()
+    atexit.register(stand_in.stop)
+
+    def run():
+        with ticketpy.ApiClient('benchmark_key',
+                                root_url=stand_in.url) as client:
+            client.events.find(size=200).all()
+    run()
+    return run, len(data.events)
+
+
+@benchmark('streamed_response')
+def streamed_response(data):
+    session = synthetic.SyntheticSession(data)
+
+    def run():
+        client = ticketpy.ApiClient('benchmark_key', session=session)
+        for _ in client.events.find(size=200, stream=True):
+            pass
+    run()
+    return run, len(data.events)
+
+
+def measure(name, setup, data, repeat=5):
+    """Times a benchmark and measures its peak memory
+
+    :return: ``Result``
+    """
+    run, items = setup(data)
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Result(name, items, best, items / best, peak / 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='Only run benchmarks matching this regex')
+    parser.add_argument('--events', type=int, default=5000,
+                        help='Number of synthetic events (default: 5000)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timed runs per benchmark (default: 5)')
+    parser.add_argument('--json', metavar='PATH',
+                        help='Also write results to a JSON file')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='JSON results (ex: of the last release) to '
+                             'compare against')
+    args = parser.parse_args(argv)
+
+    data = synthetic.Dataset(events=args.events, venues=args.events // 20,
+                             attractions=args.events // 10,
+                             deep_paging_limit=None)
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {r['name']: r for r in json.load(f)['results']}
+
+    print("ticketpy {}, Python {} ({} events)".format(
+        ticketpy.__version__, platform.python_version(), args.events))
+    print("{:<34}{:>14}{:>12}{:>10}".format(
+        'benchmark', 'items/s', 'peak KiB', 'change' if previous else ''))
+    results = []
+    for name, setup in benchmarks.items():
+        if not re.search(args.pattern, name):
+            continue
+        result = measure(name, setup, data, args.repeat)
+        results.append(result)
+        change = ''
+        if name in previous:
+            change = '{:+.1%}'.format(result.rate /
+                                      previous[name]['rate'] - 1)
+        print("{:<34}{:>14,.0f}{:>12,.0f}{:>10}".format(
+            name, result.rate, result.peak_kib, change))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'version': ticketpy.__version__,
+                'python': platform.python_version(),
+                'events': args.events,
+                'results': [r._asdict() for r in results]
+            }, f, indent=2)
+    return results
+
+
+def _pages(data, resource, size):
+    """Every result page of a search, as JSON"""
+    pages = []
+    number = 0
+    while True:
+        status, pg = data.respond(
+            '/discovery/v2/{}.json'.format(resource),
+            {'page': number, 'size': size})
+        pages.append(pg)
+        number += 1
+        if 'next' not in pg['_links']:
+            return pages
+
+
+if __name__ == '__main__':
+    main()
@@ -18,5 +18,12 @@ setup(
     keywords='Ticketmaster',
     url='https://github.com/arcward/ticketpy',
     packages=['ticketpy'],
-    install_requires=['requests']
+    install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'parquet': ['pyarrow>=14.0'],
+        'frame': ['numpy'],
+        'orjson': ['orjson'],
+        'msgspec': ['msgspec']
+    }
 )
\ No newline at end of file
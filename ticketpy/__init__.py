@@ -1,5 +1,44 @@
+import importlib
+import logging
+
 __version__ = '1.1.2'
 __author__ = 'Edward Wells'
-__all__ = ['client', 'model', 'query', 'ApiClient']
+__all__ = ['aio', 'cache', 'client', 'decoder', 'export', 'frame',
+           'metrics', 'mirror', 'model', 'query', 'ratelimit', 'server',
+           'spatial', 'synthetic', 'taxonomy', 'util', 'ApiClient',
+           'Metrics', 'RateLimiter', 'ResponseCache', 'Taxonomy']
+
+#: Module defining each class exported here
+_classes = {
+    'ApiClient': 'ticketpy.client',
+    'Metrics': 'ticketpy.metrics',
+    'RateLimiter': 'ticketpy.ratelimit',
+    'ResponseCache': 'ticketpy.cache',
+    'Taxonomy': 'ticketpy.taxonomy'
+}
+
+_submodules = {'aio', 'cache', 'client', 'decoder', 'export', 'frame',
+               'metrics', 'mirror', 'model', 'query', 'ratelimit', 'server',
+               'spatial', 'stream', 'synthetic', 'taxonomy', 'util'}
+
+# Logging is configured by applications, not libraries
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+
+def __getattr__(name):
+    """Imports submodules and classes on first access, so
+    ``import ticketpy`` doesn't import *requests* and the like until
+    they're needed"""
+    if name in _classes:
+        value = getattr(importlib.import_module(_classes[name]), name)
+    elif name in _submodules:
+        value = importlib.import_module('ticketpy.' + name)
+    else:
+        raise AttributeError("module 'ticketpy' has no attribute "
+                             "{!r}".format(name))
+    globals()[name] = value
+    return value
+
 
-from ticketpy.client import ApiClient
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
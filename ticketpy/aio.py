@@ -0,0 +1,587 @@
+"""asyncio API client classes (requires *aiohttp*)"""
+import asyncio
+import logging
+from collections import deque
+from ticketpy.cache import RequestCoalescer, ResponseCache
+from ticketpy.client import ApiClient, ApiException, PagedResponse
+from ticketpy.metrics import request_method
+from ticketpy.stream import PageParser, StreamedResponse
+from ticketpy.taxonomy import Taxonomy
+from ticketpy.query import (
+    AttractionQuery,
+    ClassificationQuery,
+    EventQuery,
+    VenueQuery,
+    _check_batching,
+    _chunks
+)
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+log = logging.getLogger(__name__)
+
+
+class AsyncApiClient(ApiClient):
+    """asyncio counterpart of ``ApiClient``
+
+    Query methods have the same signatures as on ``ApiClient``, but
+    ``find()``, ``by_id()`` and the classification lookups are awaitable.
+    ``find()`` returns an ``AsyncPagedResponse``. Rate limiting, caching,
+    coalescing, prefetching and the taxonomy work as on ``ApiClient``,
+    except that the taxonomy is loaded by ``await load_taxonomy()`` (or
+    the first segment/genre/subgenre lookup).
+
+    **Example**:
+
+    .. code-block:: python
+
+        import asyncio
+        from ticketpy.aio import AsyncApiClient
+
+        async def main():
+            async with AsyncApiClient("your_api_key") as client:
+                resp = await client.events.find(state_code='GA')
+                async for page in resp:
+                    for event in page:
+                        print(event.name)
+
+        asyncio.run(main())
+    """
+    def __init__(self, api_key, session=None, limit=100, limit_per_host=0,
+                 keepalive_timeout=15, timeout=None, lazy=False,
+                 keep_raw_json=True, identity_map=None, root_url=None,
+                 metrics=None, json_decoder=None, prefetch_workers=0,
+                 rate_limiter=None, cache=None, taxonomy=None,
+                 coalesce=False):
+        """
+        :param api_key: Discovery API key
+        :param session: ``aiohttp.ClientSession`` to send requests with. If
+            not given, one is created on the first request
+        :param limit: Max number of simultaneous connections
+        :param limit_per_host: Max simultaneous connections per host
+            (default: 0, no per-host limit)
+        :param keepalive_timeout: Seconds to keep idle connections open
+        :param timeout: Total request timeout in seconds
+            (default: no timeout)
+        :param lazy: ``True`` to build nested objects and links of results
+            the first time they're accessed (see ``ApiClient``)
+        :param keep_raw_json: ``False`` to drop each model's source JSON
+            once parsed (see ``ApiClient``)
+        :param identity_map: ``'response'``, ``'client'`` or ``None``,
+            scope of shared venues/segments/genres (see ``ApiClient``)
+        :param root_url: Send requests to another host than
+            ``ApiClient.root_url`` (see ``ApiClient``)
+        :param metrics: ``ticketpy.Metrics`` to record requests in (no
+            *connect* times, see ``ApiClient``)
+        :param json_decoder: JSON decoder of response bodies (see
+            ``ApiClient``)
+        :param prefetch_workers: Default number of pages each
+            ``AsyncPagedResponse`` requests concurrently (see ``ApiClient``)
+        :param rate_limiter: ``ticketpy.RateLimiter`` to pace requests
+            with (see ``ApiClient``)
+        :param cache: ``ticketpy.ResponseCache`` to serve repeated
+            requests from (see ``ApiClient``)
+        :param taxonomy: ``ticketpy.Taxonomy`` to look up segments,
+            genres and subgenres in (default: loaded from the API by
+            ``load_taxonomy()``)
+        :param coalesce: ``True`` to send identical requests made at the
+            same time once (see ``AsyncRequestCoalescer``). Their
+            responses then share the same JSON, so don't modify it
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncApiClient requires aiohttp "
+                              "(pip install ticketpy[async])")
+        self._configure(api_key, timeout, prefetch_workers, rate_limiter,
+                        cache, lazy, keep_raw_json, taxonomy, identity_map,
+                        False, root_url, metrics, json_decoder)
+        #: ``AsyncRequestCoalescer`` sharing responses between identical
+        #: concurrent requests (``None`` if disabled)
+        self.coalescer = AsyncRequestCoalescer() if coalesce else None
+        # Created on first use, in the running event loop
+        self._taxonomy_lock = None
+        self.session = session
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.events = AsyncEventQuery(api_client=self)
+        self.venues = AsyncVenueQuery(api_client=self)
+        self.attractions = AsyncAttractionQuery(api_client=self)
+        self.classifications = AsyncClassificationQuery(api_client=self)
+
+    @property
+    def taxonomy(self):
+        """``ticketpy.Taxonomy`` given or loaded by ``load_taxonomy()``
+        (``None`` until then)"""
+        return self._taxonomy
+
+    @taxonomy.setter
+    def taxonomy(self, taxonomy):
+        self._taxonomy = taxonomy
+
+    async def load_taxonomy(self, size=200):
+        """Loads ``taxonomy`` from the API if it wasn't given or loaded
+        already
+
+        :param size: Page size to request classifications with
+        :return: ``ticketpy.Taxonomy``
+        """
+        if self._taxonomy_lock is None:
+            self._taxonomy_lock = asyncio.Lock()
+        async with self._taxonomy_lock:
+            if self._taxonomy is None:
+                resp = await self.classifications.find(size=size)
+                self._taxonomy = Taxonomy.from_classifications(
+                    await resp.all())
+            return self._taxonomy
+
+    async def segment_by_id(self, segment_id):
+        """Return a ``Segment`` matching this ID (see
+        ``ApiClient.segment_by_id()``)"""
+        segment = (await self.load_taxonomy()).segment_by_id(segment_id)
+        if segment is None:
+            segment = await self.classifications.segment_by_id(segment_id)
+        return segment
+
+    async def genre_by_id(self, genre_id):
+        """Return a ``Genre`` matching this ID (see
+        ``ApiClient.genre_by_id()``)"""
+        genre = (await self.load_taxonomy()).genre_by_id(genre_id)
+        if genre is None:
+            genre = await self.classifications.genre_by_id(genre_id)
+        return genre
+
+    async def subgenre_by_id(self, subgenre_id):
+        """Return a ``SubGenre`` matching this ID (see
+        ``ApiClient.subgenre_by_id()``)"""
+        subgenre = (await self.load_taxonomy()).subgenre_by_id(subgenre_id)
+        if subgenre is None:
+            subgenre = await self.classifications.subgenre_by_id(
+                subgenre_id)
+        return subgenre
+
+    async def search(self, method, stream=False, fields=None, **kwargs):
+        """Generic API request
+
+        :param method: Search type (*events*, *venues*...)
+        :param stream: ``True`` to parse pages incrementally, yielding
+            one item at a time (see ``AsyncStreamedResponse``)
+        :param fields: Paths of the only fields to extract from each
+            item, into ``namedtuple`` records instead of models
+        :param kwargs: Search parameters (*venueId*, *eventId*,
+            *latlong*, etc...)
+        :return: ``AsyncPagedResponse``, or ``AsyncStreamedResponse`` if
+            streaming
+        """
+        url, params = self._search_request(method, **kwargs)
+        if stream:
+            return AsyncStreamedResponse(self, url, params, fields=fields)
+        return AsyncPagedResponse(self, await self._request(url, params),
+                                  workers=self.prefetch_workers,
+                                  fields=fields)
+
+    async def by_id(self, method, entity_id, model):
+        """Get a specific object by its ID
+
+        :param method: API method (*events*, *venues*...)
+        :param entity_id: ID of the object
+        :param model: Model from ``ticketpy.model`` to build from the response
+        :return: Instance of ``model``
+        """
+        get_url = "{}/{}/{}".format(self.url, method, entity_id)
+        response = await self._request(get_url, self.api_key)
+        return self._from_json(response, model, self._identity_map())
+
+    async def get_url(self, link):
+        """Gets a specific href from '_links' object in a response"""
+        link = self._parse_link(link)
+        return self._from_json(await self._request(link.url, link.params))
+
+    async def _request(self, url, params):
+        """Returns response JSON for a GET request, from the cache or
+        shared with an identical request in flight (see
+        ``ApiClient._request()``)
+
+        :param url: Request URL
+        :param params: Request parameters
+        :return: Response JSON (see ``ApiClient._handle_response``)
+        """
+        if self.cache is None and self.coalescer is None:
+            return await self._send(url, params)
+
+        key = ResponseCache.key(url, params)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                return response
+
+        async def send():
+            response = await self._send(url, params)
+            if self.cache is not None:
+                self.cache.set(key, response)
+            return response
+
+        if self.coalescer is None:
+            return await send()
+        return await self.coalescer.do(key, send)
+
+    async def _send(self, url, params, stream=False):
+        """Sends a GET request through the shared ``aiohttp`` session,
+        pacing it with the rate limiter (if any)
+
+        :param url: Request URL
+        :param params: Request parameters
+        :param stream: ``True`` to return a successful response without
+            reading its body
+        :return: Response JSON (see ``ApiClient._handle_response``), or
+            the ``aiohttp.ClientResponse`` (to release) if streaming
+        """
+        if self.session is None:
+            self.session = self.__make_session()
+        # aiohttp only accepts str/int/float parameter values
+        params = {k: str(v) for (k, v) in params.items()}
+        limiter = self.rate_limiter
+        metrics = self.metrics
+        record = None
+        retries = 0
+        while True:
+            if limiter is not None:
+                wait = limiter.reserve()
+                if wait is None:
+                    raise ApiException('Daily request budget exhausted',
+                                       limiter.stats())
+                if wait:
+                    await asyncio.sleep(wait)
+            if metrics is not None:
+                record = metrics.start(url)
+            resp = await self.session.get(url, params=params)
+            if record is not None:
+                ttfb = record.elapsed()
+            if stream and resp.status == 200:
+                if limiter is not None:
+                    limiter.success(resp.headers)
+                if record is not None:
+                    metrics.received(record, resp.status, None, ttfb)
+                    metrics.finish(record)
+                return resp
+            try:
+                body = _ResponseBody(resp.status, str(resp.url),
+                                     await resp.read(), resp.headers)
+            finally:
+                resp.release()
+            if record is not None:
+                metrics.received(record, body.status_code,
+                                 len(body.content), ttfb)
+            if limiter is None or not self._throttled(body, retries):
+                break
+            retries += 1
+            if record is not None:
+                metrics.finish(record)
+        if record is not None:
+            return self._recorded_response(body, record)
+        return self._handle_response(body)
+
+    async def close(self):
+        """Closes the session and any pooled connections, and reports the
+        requests ``metrics`` still held"""
+        if self.session is not None:
+            await self.session.close()
+        if self.metrics is not None:
+            self.metrics.flush()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with AsyncApiClient")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __make_session(self):
+        """Creates an ``aiohttp.ClientSession`` with a sized connector"""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+class AsyncRequestCoalescer(RequestCoalescer):
+    """``RequestCoalescer`` for coroutines: tasks requesting a key while
+    it's in flight await the same request instead of sending their own.
+
+    Use it from a single event loop. Coalesced JSON is shared between
+    responses, so don't modify it.
+    """
+    async def do(self, key, send):
+        """Returns the result of ``await send()``, or of the request
+        already in flight for ``key``
+
+        :param key: Request key (see ``ResponseCache.key()``)
+        :param send: Coroutine function sending the request
+        """
+        with self._lock:
+            task = self._calls.get(key)
+            if task is None:
+                task = self._calls[key] = asyncio.ensure_future(send())
+                task.add_done_callback(lambda _: self.__done(key))
+                self.requests += 1
+            else:
+                self.collapsed += 1
+        # A cancelled caller doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    def __done(self, key):
+        with self._lock:
+            del self._calls[key]
+
+
+class _AsyncQuery:
+    """Awaitable ``by_ids()`` for the queries of ``AsyncApiClient``"""
+    async def by_ids(self, entity_ids, chunk_size=50, workers=4):
+        """Get many objects by their IDs, batching them into searches
+        (see ``BaseQuery.by_ids()``)
+
+        :param entity_ids: IDs of the objects
+        :param chunk_size: Max number of IDs per search request
+        :param workers: Max number of search requests in flight
+        :return: ``dict`` of ID to object, in the order IDs were given.
+            IDs that weren't found map to ``None``
+        """
+        _check_batching(chunk_size, workers)
+        ids = list(dict.fromkeys(entity_ids))
+        semaphore = asyncio.Semaphore(workers)
+
+        async def find_chunk(chunk):
+            async with semaphore:
+                resp = await self._get(entity_id=','.join(chunk),
+                                       size=len(chunk))
+                return await resp.all()
+
+        results = await asyncio.gather(*[find_chunk(chunk) for chunk
+                                         in _chunks(ids, chunk_size)])
+        return self._by_id(ids, results)
+
+    def export(self, *args, **kwargs):
+        raise TypeError("export() writes files as pages arrive, which "
+                        "AsyncApiClient can't do: use ApiClient")
+
+
+class AsyncEventQuery(_AsyncQuery, EventQuery):
+    """Event search/query class for ``AsyncApiClient``"""
+    def harvest(self, *args, **kwargs):
+        raise TypeError("harvest() searches from threads, which "
+                        "AsyncApiClient can't do: use ApiClient")
+
+
+class AsyncVenueQuery(_AsyncQuery, VenueQuery):
+    """Venue search/query class for ``AsyncApiClient``"""
+
+
+class AsyncAttractionQuery(_AsyncQuery, AttractionQuery):
+    """Attraction search/query class for ``AsyncApiClient``"""
+
+
+class AsyncClassificationQuery(_AsyncQuery, ClassificationQuery):
+    """Classification search/query class for ``AsyncApiClient``"""
+    async def segment_by_id(self, segment_id):
+        """Return a ``Segment`` matching this ID"""
+        return self._segment(await self.by_id(segment_id))
+
+    async def genre_by_id(self, genre_id):
+        """Return a ``Genre`` matching this ID"""
+        return self._genre(await self.by_id(genre_id), genre_id)
+
+    async def subgenre_by_id(self, subgenre_id):
+        """Return a ``SubGenre`` matching this ID"""
+        return self._subgenre(await self.by_id(subgenre_id), subgenre_id)
+
+
+class AsyncPagedResponse(PagedResponse):
+    """Asynchronously iterates through API response pages
+
+    Use ``async for page in resp`` or ``async for item in resp.items()``,
+    or await ``limit()``/``all()``.
+    """
+    async def limit(self, max_pages=5):
+        """Retrieve X number of pages, returning a ``list`` of all entities.
+
+        :param max_pages: Max page requests to make before returning list
+        :return: Flat list of results from pages
+        """
+        return [i async for i in self.items(max_pages=max_pages)]
+
+    async def all(self):
+        """Retrieves **all** pages in a result, returning a flat list.
+
+        :return: Flat list of results
+        """
+        return [i async for i in self.items()]
+
+    async def items(self, max_items=None, max_pages=None):
+        """Asynchronously yields each item of every page as the page
+        arrives (see ``PagedResponse.items()``)
+
+        :param max_items: Max number of items to yield (default: all)
+        :param max_pages: Max page requests to make (default: all)
+        """
+        if max_items is not None:
+            if max_items < 1:
+                return
+            needed = -(-max_items // max(self.page.size or 1, 1))
+            max_pages = needed if max_pages is None else min(max_pages,
+                                                             needed)
+        pages = self._pages(max_pages)
+        try:
+            count = 0
+            async for pg in pages:
+                for item in pg:
+                    yield item
+                    count += 1
+                    if count == max_items:
+                        return
+        finally:
+            await pages.aclose()
+
+    def __iter__(self):
+        raise TypeError("Use 'async for' with AsyncPagedResponse")
+
+    def export(self, *args, **kwargs):
+        raise TypeError("export() writes files as pages arrive, which "
+                        "AsyncApiClient can't do: use ApiClient")
+
+    def __aiter__(self):
+        return self._pages()
+
+    async def _pages(self, max_pages=None):
+        """Yields up to ``max_pages`` pages (all pages if ``None``)"""
+        if max_pages is not None and max_pages < 1:
+            return
+        if self.workers and self.page.links.get('next'):
+            pages = self._prefetched_pages(max_pages)
+        else:
+            pages = self._read_pages(max_pages)
+        counter = 0
+        try:
+            async for pg in pages:
+                counter += 1
+                yield pg
+        finally:
+            await pages.aclose()
+            metrics = self.api_client.metrics
+            if metrics is not None:
+                metrics.report_pending()
+                metrics.observe_pages(
+                    request_method(self.page.links.get('self')), counter)
+
+    async def _read_pages(self, max_pages=None):
+        """Yields pages by following each page's *next* link"""
+        counter = 1
+        yield self.page
+        next_url = self.page.links.get('next')
+        while next_url and (max_pages is None or counter < max_pages):
+            log.debug("Requesting page: {}".format(next_url))
+            link = self.api_client._parse_link(next_url)
+            pg = self._build(await self.api_client._request(link.url,
+                                                            link.params))
+            next_url = pg.links.get('next')
+            counter += 1
+            yield pg
+
+    async def _prefetched_pages(self, max_pages=None):
+        """Yields the first page, then requests the remaining pages by
+        page number, keeping up to ``self.workers`` requests in flight
+        (see ``PagedResponse.prefetch()``)"""
+        yield self.page
+        link = self.api_client._parse_link(self.page.links['next'])
+        last_page = self.page.total_pages
+        if max_pages is not None:
+            last_page = min(last_page, self.page.number + max_pages)
+        numbers = iter(range(self.page.number + 1, last_page))
+        pending = deque()
+
+        def submit():
+            number = next(numbers, None)
+            if number is not None:
+                log.debug("Requesting page: {}".format(number))
+                pending.append(asyncio.ensure_future(
+                    self._get_page(link, number)))
+
+        for _ in range(self.workers):
+            submit()
+        try:
+            while pending:
+                pg = await pending.popleft()
+                submit()
+                yield pg
+        finally:
+            # Consumer stopped early, drop requests still in flight
+            for task in pending:
+                task.cancel()
+
+    async def _get_page(self, link, number):
+        """Requests page ``number`` of a parsed *next* link"""
+        params = dict(link.params)
+        params['page'] = str(number)
+        return self._build(await self.api_client._request(link.url, params))
+
+
+class AsyncStreamedResponse(StreamedResponse):
+    """asyncio counterpart of ``StreamedResponse``: items of every
+    result page, parsed as each page downloads
+
+    .. code-block:: python
+
+        resp = await client.events.find(state_code='GA', size=200,
+                                        stream=True)
+        async for event in resp:
+            print(event.name)
+    """
+    async def __aiter__(self):
+        url, params = self.url, self.params
+        counter = 0
+        entities = self.api_client._identity_map()
+        while True:
+            counter += 1
+            resp = await self.api_client._send(url, params, stream=True)
+            parser = PageParser()
+            try:
+                async for chunk in resp.content.iter_chunked(
+                        self.chunk_size):
+                    for item in self._items(parser.feed(chunk), entities):
+                        yield item
+                for item in self._items(parser.close(), entities):
+                    yield item
+            finally:
+                resp.release()
+
+            request = self._next_request(parser, counter)
+            if request is None:
+                return
+            url, params = request
+
+    def __iter__(self):
+        raise TypeError("Use 'async for' with AsyncStreamedResponse")
+
+    def export(self, *args, **kwargs):
+        raise TypeError("export() writes files as pages arrive, which "
+                        "AsyncApiClient can't do: use ApiClient")
+
+
+class _ResponseBody:
+    """Buffered ``aiohttp`` response, shaped like ``requests.Response``
+    for ``ApiClient._handle_response``"""
+    def __init__(self, status_code, url, content, headers=None):
+        self.status_code = status_code
+        self.url = url
+        self.content = content
+        self.headers = headers if headers is not None else {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
@@ -0,0 +1,183 @@
+"""In-memory caching and coalescing of API responses"""
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+
+class ResponseCache:
+    """TTL + LRU cache of response JSON, keyed on the request.
+
+    Keys are the request method (*events*, *venues*...), URL and its
+    parameters, sorted and with the *apikey* removed, so equivalent
+    searches share an entry regardless of parameter order or whether a
+    value was passed as ``2`` or ``'2'``. Once ``maxsize`` entries are
+    stored, the least recently used one is evicted.
+
+    Cached JSON is shared between responses, so don't modify it.
+
+    .. code-block:: python
+
+        cache = ticketpy.ResponseCache(maxsize=512, ttl=300,
+                                       ttls={'classifications': 86400})
+        client = ticketpy.ApiClient("your_api_key", cache=cache)
+    """
+    def __init__(self, maxsize=1024, ttl=300, ttls=None):
+        """
+        :param maxsize: Max number of responses to keep
+        :param ttl: Seconds a response stays valid
+        :param ttls: ``dict`` of per-method TTLs overriding ``ttl``
+            (ex: *{'classifications': 86400}*)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params):
+        """Cache key for a request
+
+        :param url: Request URL
+        :param params: Request parameters
+        :return: Tuple of (method, URL, sorted parameters)
+        """
+        normalized = tuple(sorted(
+            (k, str(v)) for (k, v) in params.items()
+            if k != 'apikey' and v is not None
+        ))
+        return _method(url), url, normalized
+
+    def get(self, key):
+        """Returns cached JSON for ``key``, or ``None`` if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """Caches ``value`` for ``key`` using its method's TTL"""
+        ttl = self.ttls.get(key[0], self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Removes every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters
+
+        :return: ``namedtuple`` of *hits*, *misses*, *evictions*
+            and *size*
+        """
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions,
+                              len(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CacheStats = namedtuple('stats', ['hits', 'misses', 'evictions', 'size'])
+
+
+class RequestCoalescer:
+    """Collapses identical requests made at the same time into one.
+
+    The first thread to request a key sends the request; threads asking 
+    for the same key while it's in flight wait for it and share its 
+    response (or exception) instead of sending their own. Keys are the 
+    same as ``ResponseCache`` keys, so parameter order and value types 
+    don't matter.
+
+    Coalesced JSON is shared between responses, so don't modify it.
+    """
+    def __init__(self):
+        #: Requests sent
+        self.requests = 0
+        #: Requests that waited on an identical one instead of being sent
+        self.collapsed = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, send):
+        """Returns the result of ``send()``, or of the ``send()`` already 
+        in flight for ``key``
+
+        :param key: Request key (see ``ResponseCache.key()``)
+        :param send: Function sending the request
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.requests += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = send()
+        except BaseException as e:
+            # Even KeyboardInterrupt & co. must reach the waiting threads,
+            # or they'd return a result of None
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        """Request counters
+
+        :return: ``namedtuple`` of *requests* (sent), *collapsed* and 
+            *in_flight*
+        """
+        with self._lock:
+            return CoalescerStats(self.requests, self.collapsed,
+                                  len(self._calls))
+
+
+class _Call:
+    """A request in flight"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+CoalescerStats = namedtuple('stats', ['requests', 'collapsed', 'in_flight'])
+
+
+def _method(url):
+    """API method (*events*, *venues*...) of a request URL"""
+    match = re.search(r'/v2/(\w+)', url)
+    return match.group(1) if match else None
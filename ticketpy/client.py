@@ -1,7 +1,12 @@
 """API client classes"""
 import logging
+import threading
+import time
 import requests
-from collections import namedtuple
+from requests.adapters import HTTPAdapter
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from urllib import parse
 from ticketpy.query import (
     AttractionQuery,
@@ -9,15 +14,15 @@ from ticketpy.query import (
     EventQuery,
     VenueQuery
 )
-from ticketpy.model import Page
+from ticketpy import decoder, export
+from ticketpy.cache import RequestCoalescer, ResponseCache
+from ticketpy.metrics import TimedHTTPAdapter, request_method
+from ticketpy.model import IdentityMap, Page, Projection
+from ticketpy.ratelimit import QUOTA_VIOLATION, SPIKE_ARREST_VIOLATION
+from ticketpy.stream import StreamedResponse
+from ticketpy.taxonomy import Taxonomy
 
 log = logging.getLogger(__name__)
-log.setLevel(logging.INFO)
-sh = logging.StreamHandler()
-sh.setLevel(logging.INFO)
-sf = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-sh.setFormatter(sf)
-log.addHandler(sh)
 
 
 class ApiClient:
@@ -46,53 +51,361 @@ class ApiClient:
 
     Request URLs end up looking like:
     http://app.ticketmaster.com/discovery/v2/events.json?apikey={api_key}
+
+    Every request (searches, ``_links`` hrefs and by-ID lookups) goes
+    through a single pooled ``requests.Session``, so connections to the
+    API are kept alive and reused between pages. To tune the pool:
+
+    .. code-block:: python
+
+        client = ticketpy.ApiClient("your_api_key", pool_maxsize=20,
+                                    timeout=(3.05, 30))
     """
     root_url = 'https://app.ticketmaster.com'
     url = 'https://app.ticketmaster.com/discovery/v2'
+    #: Search methods of the API
+    methods = ('events', 'venues', 'attractions', 'classifications')
 
-    def __init__(self, api_key):
-        self.__api_key = None
-        self.api_key = api_key
+    def __init__(self, api_key, session=None, pool_connections=10,
+                 pool_maxsize=10, pool_block=False, max_retries=0,
+                 keep_alive=True, timeout=None, prefetch_workers=0,
+                 rate_limiter=None, cache=None, lazy=False,
+                 keep_raw_json=True, taxonomy=None, identity_map=None,
+                 coalesce=False, root_url=None, metrics=None,
+                 json_decoder=None):
+        """
+        :param api_key: Discovery API key
+        :param session: ``requests.Session`` to send requests with. If not 
+            given, one is created and configured from the pool parameters
+        :param pool_connections: Number of per-host connection pools to cache
+        :param pool_maxsize: Max connections kept open per host
+        :param pool_block: If ``True``, block when all connections to a 
+            host are in use instead of opening a throwaway connection
+        :param max_retries: Retries for failed connection attempts
+        :param keep_alive: ``False`` to send *Connection: close* with 
+            each request and disable connection reuse (``session``'s 
+            headers are left alone)
+        :param timeout: Request timeout in seconds, or a 
+            *(connect, read)* tuple (default: no timeout)
+        :param prefetch_workers: Default number of pages each 
+            ``PagedResponse`` requests concurrently (default: 0, one 
+            page at a time). See ``PagedResponse.prefetch()``
+        :param rate_limiter: ``ticketpy.RateLimiter`` to pace requests 
+            with (default: no client-side limit)
+        :param cache: ``ticketpy.ResponseCache`` to serve repeated 
+            requests from (default: no caching)
+        :param lazy: ``True`` to build nested objects (venues, 
+            classifications...) and links of results the first time 
+            they're accessed, instead of while parsing each page
+        :param keep_raw_json: ``False`` to drop each model's source JSON 
+            (its ``json`` attribute) once parsed, to save memory. Lazily 
+            parsed models always keep it
+        :param taxonomy: ``ticketpy.Taxonomy`` to look up segments, 
+            genres and subgenres in. If not given, it's loaded from the 
+            API the first time one is looked up
+        :param identity_map: Scope in which venues, segments, genres and 
+            subgenres with the same ID are built once and shared: 
+            ``'response'`` (each ``PagedResponse``), ``'client'`` (every 
+            response of this client, while still referenced) or ``None`` 
+            (default: every object is built separately)
+        :param coalesce: ``True`` to send identical requests made at the 
+            same time once (see ``RequestCoalescer``). Their responses 
+            then share the same JSON, so don't modify it
+        :param root_url: Send requests to another host than 
+            ``ApiClient.root_url``, such as a local 
+            ``ticketpy.server.StandInServer``
+        :param metrics: ``ticketpy.Metrics`` to record the timings and 
+            size of every request in (default: no instrumentation)
+        :param json_decoder: JSON decoder of response bodies: *json*, 
+            *orjson*, *msgspec* or a function taking ``bytes`` (default: 
+            the fastest installed, see ``ticketpy.decoder.get()``)
+        """
+        self._configure(api_key, timeout, prefetch_workers, rate_limiter,
+                        cache, lazy, keep_raw_json, taxonomy, identity_map,
+                        coalesce, root_url, metrics, json_decoder)
+        if session is None:
+            session = self.__make_session(pool_connections, pool_maxsize,
+                                          pool_block, max_retries,
+                                          metrics is not None)
+        # Sent per request, not set on a session that may be shared
+        self._headers = None if keep_alive else {'Connection': 'close'}
+        self.session = session
         self.events = EventQuery(api_client=self)
         self.venues = VenueQuery(api_client=self)
         self.attractions = AttractionQuery(api_client=self)
         self.classifications = ClassificationQuery(api_client=self)
-        self.segment_by_id = self.classifications.segment_by_id
-        self.genre_by_id = self.classifications.genre_by_id
-        self.subgenre_by_id = self.classifications.subgenre_by_id
 
         log.debug("Root URL: {}".format(self.url))
 
-    def search(self, method, **kwargs):
+    def _configure(self, api_key, timeout, prefetch_workers, rate_limiter,
+                   cache, lazy, keep_raw_json, taxonomy, identity_map,
+                   coalesce, root_url, metrics, json_decoder):
+        """Sets up everything but the session and queries, for this 
+        client and ``AsyncApiClient`` (see ``__init__()``)"""
+        self.__api_key = None
+        self.api_key = api_key
+        if root_url is not None:
+            self.root_url = root_url.rstrip('/')
+            self.url = self.root_url + '/discovery/v2'
+        self._method_urls = self._url_table()
+        self.timeout = timeout
+        self.prefetch_workers = prefetch_workers
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        #: ``RequestCoalescer`` sharing responses between identical 
+        #: concurrent requests (``None`` if disabled)
+        self.coalescer = RequestCoalescer() if coalesce else None
+        self.lazy = lazy
+        self.keep_raw_json = keep_raw_json
+        self.identity_map = identity_map
+        self._entities = None
+        self.metrics = metrics
+        #: Function decoding response bodies (``bytes``) of JSON
+        self.decode = decoder.get(json_decoder)
+        self._taxonomy = taxonomy
+        self._taxonomy_lock = threading.Lock()
+
+    @property
+    def taxonomy(self):
+        """``ticketpy.Taxonomy`` of every segment/genre/subgenre, loaded 
+        from the API on first access if one wasn't given"""
+        with self._taxonomy_lock:
+            if self._taxonomy is None:
+                self._taxonomy = Taxonomy.from_api(self)
+            return self._taxonomy
+
+    @taxonomy.setter
+    def taxonomy(self, taxonomy):
+        self._taxonomy = taxonomy
+
+    def segment_by_id(self, segment_id):
+        """Return a ``Segment`` matching this ID
+        
+        Looked up in ``taxonomy``, falling back to an API request for 
+        IDs it doesn't have.
+        """
+        segment = self.taxonomy.segment_by_id(segment_id)
+        if segment is None:
+            segment = self.classifications.segment_by_id(segment_id)
+        return segment
+
+    def genre_by_id(self, genre_id):
+        """Return a ``Genre`` matching this ID
+        
+        Looked up in ``taxonomy``, falling back to an API request for 
+        IDs it doesn't have.
+        """
+        genre = self.taxonomy.genre_by_id(genre_id)
+        if genre is None:
+            genre = self.classifications.genre_by_id(genre_id)
+        return genre
+
+    def subgenre_by_id(self, subgenre_id):
+        """Return a ``SubGenre`` matching this ID
+        
+        Looked up in ``taxonomy``, falling back to an API request for 
+        IDs it doesn't have.
+        """
+        subgenre = self.taxonomy.subgenre_by_id(subgenre_id)
+        if subgenre is None:
+            subgenre = self.classifications.subgenre_by_id(subgenre_id)
+        return subgenre
+
+    def search(self, method, stream=False, fields=None, **kwargs):
         """Generic API request
         
         :param method: Search type (*events*, *venues*...)
+        :param stream: ``True`` to parse pages incrementally, yielding 
+            one item at a time (see ``ticketpy.stream.StreamedResponse``)
+        :param fields: Paths of the only fields to extract from each 
+            item, into ``namedtuple`` records instead of models (see 
+            ``ticketpy.model.Projection``)
         :param kwargs: Search parameters (*venueId*, *eventId*, 
             *latlong*, etc...)
-        :return: ``PagedResponse``
+        :return: ``PagedResponse``, or ``StreamedResponse`` if streaming
+        """
+        url, params = self._search_request(method, **kwargs)
+        if stream:
+            return StreamedResponse(self, url, params, fields=fields)
+        return PagedResponse(self, self._request(url, params),
+                             workers=self.prefetch_workers, fields=fields)
+
+    def _search_request(self, method, **kwargs):
+        """Builds the URL and parameters for a search request
+        
+        :param method: Search type (*events*, *venues*...)
+        :param kwargs: Search parameters
+        :return: Tuple of (URL, parameters)
         """
         # Remove unfilled parameters, add apikey header.
         # Clean up values that might be passed in multiple ways.
         # Ex: 'includeTBA' might be passed as bool(True) instead of 'yes'
-        # and 'radius' might be passed as int(2) instead of '2'
-        kwargs = {k: v for (k, v) in kwargs.items() if v is not None}
-        updates = self.api_key
-
-        for k, v in kwargs.items():
-            if k in ['includeTBA', 'includeTBD', 'includeTest']:
-                updates[k] = self.__yes_no_only(v)
-            elif k in ['size', 'radius', 'marketId']:
-                updates[k] = str(v)
-        kwargs.update(updates)
-        log.debug(kwargs)
-        urls = {
-            'events': self.__method_url('events'),
-            'venues': self.__method_url('venues'),
-            'attractions': self.__method_url('attractions'),
-            'classifications': self.__method_url('classifications')
-        }
-        resp = requests.get(urls[method], params=kwargs)
-        return PagedResponse(self, self._handle_response(resp))
+        # and 'radius' might be passed as int(2) instead of '2'.
+        # Only the new params dict is written to, so concurrent searches
+        # don't share any state
+        url = self._method_urls[method]
+        coercions = _param_coercions
+        params = {k: coercions[k](v) if k in coercions else v
+                  for (k, v) in kwargs.items() if v is not None}
+        params.update(self.__api_key)
+        log.debug(params)
+        return url, params
+
+    def by_id(self, method, entity_id, model):
+        """Get a specific object by its ID
+        
+        :param method: API method (*events*, *venues*...)
+        :param entity_id: ID of the object
+        :param model: Model from ``ticketpy.model`` to build from the response
+        :return: Instance of ``model``
+        """
+        get_url = "{}/{}/{}".format(self.url, method, entity_id)
+        return self._from_json(self._request(get_url, self.api_key), model,
+                               self._identity_map())
+
+    def _from_json(self, json_obj, model=Page, entities=None,
+                   projection=None):
+        """Builds ``model`` from JSON with this client's parsing options
+        (or, with a ``Projection``, a ``Page`` of its records, without
+        the page's JSON)"""
+        options = {'lazy': self.lazy, 'keep_json': self.keep_raw_json,
+                   'entities': entities}
+        if projection is not None:
+            options = {'keep_json': False, 'projection': projection}
+        if self.metrics is None:
+            return model.from_json(json_obj, **options)
+        start = time.perf_counter()
+        obj = model.from_json(json_obj, **options)
+        self.metrics.built(json_obj, time.perf_counter() - start)
+        return obj
+
+    def _identity_map(self):
+        """``IdentityMap`` for a new response, per ``identity_map``"""
+        if self.identity_map == 'client':
+            if self._entities is None:
+                self._entities = IdentityMap(weak=True)
+            return self._entities
+        if self.identity_map == 'response':
+            return IdentityMap()
+        if self.identity_map is not None:
+            raise ValueError("identity_map must be 'client', 'response' "
+                             "or None, not {!r}".format(self.identity_map))
+        return None
+
+    def _request(self, url, params):
+        """Returns response JSON for a GET request, from the cache if 
+        there's a live entry for it, or shared with an identical request 
+        in flight
+        
+        :param url: Request URL
+        :param params: Request parameters
+        :return: Response JSON (see ``_handle_response``)
+        """
+        if self.cache is None and self.coalescer is None:
+            return self._send(url, params)
+
+        key = ResponseCache.key(url, params)
+        if self.cache is not None:
+            response = self.cache.get(key)
+            if response is not None:
+                return response
+
+        def send():
+            response = self._send(url, params)
+            if self.cache is not None:
+                self.cache.set(key, response)
+            return response
+
+        if self.coalescer is None:
+            return send()
+        return self.coalescer.do(key, send)
+
+    def _send(self, url, params, stream=False):
+        """Sends a GET request through the pooled session, pacing it with 
+        the rate limiter (if any)
+        
+        :param url: Request URL
+        :param params: Request parameters
+        :param stream: ``True`` to return a successful response without 
+            reading its body
+        :return: Response JSON (see ``_handle_response``), or the 
+            ``requests.Response`` if streaming
+        """
+        limiter = self.rate_limiter
+        metrics = self.metrics
+        record = None
+        retries = 0
+        while True:
+            if limiter is not None and not limiter.acquire():
+                raise ApiException('Daily request budget exhausted',
+                                   limiter.stats())
+            if metrics is not None:
+                record = metrics.start(url)
+            resp = self.session.get(url, params=params, timeout=self.timeout,
+                                    stream=stream, headers=self._headers)
+            if record is not None:
+                metrics.received(record, resp.status_code,
+                                 None if stream else len(resp.content),
+                                 resp.elapsed.total_seconds())
+            if limiter is None or not self._throttled(resp, retries):
+                break
+            retries += 1
+            if record is not None:
+                metrics.finish(record)
+        if stream and resp.status_code == 200:
+            if record is not None:
+                metrics.finish(record)
+            return resp
+        if record is not None:
+            return self._recorded_response(resp, record)
+        return self._handle_response(resp)
+
+    def _throttled(self, response, retries):
+        """Reports a response to the rate limiter
+        
+        :param response: Response (read) of a request
+        :param retries: Times the request was retried already
+        :return: ``True`` if the request was throttled and should be 
+            retried
+        """
+        limiter = self.rate_limiter
+        fault_code = self.__fault_code(response)
+        if (response.status_code == 429 or
+                fault_code == SPIKE_ARREST_VIOLATION):
+            limiter.throttle(response.headers)
+            return retries < limiter.retries
+        if fault_code == QUOTA_VIOLATION:
+            limiter.exhaust(response.headers)
+        elif response.status_code == 200:
+            limiter.success(response.headers)
+        return False
+
+    def _recorded_response(self, response, record):
+        """``_handle_response()``, recording JSON decode time (or the 
+        error raised) in a ``RequestRecord``"""
+        start = time.perf_counter()
+        try:
+            json_obj = self._handle_response(response)
+        except Exception as e:
+            record.error = e
+            self.metrics.finish(record)
+            raise
+        record.decode = time.perf_counter() - start
+        self.metrics.finish(record, json_obj)
+        return json_obj
+
+    def close(self):
+        """Closes the session and any pooled connections, and reports the
+        requests ``metrics`` still held"""
+        self.session.close()
+        if self.metrics is not None:
+            self.metrics.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
     def _handle_response(self, response):
         """Raises ``ApiException`` if needed, or returns response JSON obj
@@ -110,15 +423,24 @@ class ApiClient:
         else:
             self.__unknown_error(response)
 
-    @staticmethod
-    def __success(response):
+    def __success(self, response):
         """Successful response, just return JSON"""
-        return response.json()
+        return self.decode(response.content)
 
-    @staticmethod
-    def __error(response):
+    def __fault_code(self, response):
+        """Fault error code (ex: *policies.ratelimit.QuotaViolation*) 
+        of a 401/429 response, or ``None``"""
+        if response.status_code not in (401, 429):
+            return None
+        try:
+            return self.decode(response.content)['fault']['detail'][
+                'errorcode']
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def __error(self, response):
         """HTTP status code 400, or something with 'errors' object"""
-        rj = response.json()
+        rj = self.decode(response.content)
         error = namedtuple('error', ['code', 'detail', 'href'])
         errors = [
             error(err['code'], err['detail'], err['_links']['about']['href'])
@@ -127,10 +449,9 @@ class ApiClient:
         log.error('URL: {}\nErrors: {}'.format(response.url, errors))
         raise ApiException(response.status_code, errors, response.url)
 
-    @staticmethod
-    def __fault(response):
+    def __fault(self, response):
         """HTTP status code 401, or something with 'faults' object"""
-        rj = response.json()
+        rj = self.decode(response.content)
         fault_str = rj['fault']['faultstring']
         detail = rj['fault']['detail']
         log.error('URL: {}, Faultstr: {}'.format(response.url, fault_str))
@@ -143,7 +464,7 @@ class ApiClient:
 
     def __unknown_error(self, response):
         """Unexpected HTTP status code (not 200, 400, or 401)"""
-        rj = response.json()
+        rj = self.decode(response.content)
         if 'fault' in rj:
             self.__fault(response)
         elif 'errors' in rj:
@@ -157,13 +478,17 @@ class ApiClient:
         # to parse out parameters and pass them into a new request
         # rather than implicitly trusting the href in _links
         link = self._parse_link(link)
-        resp = requests.get(link.url, link.params)
-        return Page.from_json(self._handle_response(resp))
+        return self._from_json(self._request(link.url, link.params))
 
     def _parse_link(self, link):
         """Parses link into base URL and dict of parameters"""
         parsed_link = namedtuple('link', ['url', 'params'])
         link_url, link_params = link.split('?')
+        # Page links are built on the default root URL
+        default_root = ApiClient.root_url
+        if (self.root_url != default_root and
+                link_url.startswith(default_root)):
+            link_url = self.root_url + link_url[len(default_root):]
         params = self._link_params(link_params)
         return parsed_link(link_url, params)
 
@@ -182,23 +507,60 @@ class ApiClient:
 
     @api_key.setter
     def api_key(self, api_key):
-        # Set this way by default to pass in request params
-        self.__api_key = {'apikey': api_key}
+        # Set this way by default to pass in request params. Read-only,
+        # since it's passed as-is to every by-ID request
+        self.__api_key = MappingProxyType({'apikey': api_key})
+
+    def _url_table(self):
+        """Read-only ``dict`` of search method to its URL"""
+        return MappingProxyType({method: self.__method_url(method)
+                                 for method in self.methods})
 
     @staticmethod
-    def __method_url(method):
+    def __make_session(pool_connections, pool_maxsize, pool_block,
+                       max_retries, timed=False):
+        """Creates a ``requests.Session`` with a sized connection pool 
+        (whose connections time how long they take to open if ``timed``)"""
+        session = requests.Session()
+        adapter = (TimedHTTPAdapter if timed else HTTPAdapter)(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            pool_block=pool_block
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def __method_url(self, method):
         """Formats a search method URL"""
-        return "{}/{}.json".format(ApiClient.url, method)
+        return "{}/{}.json".format(self.url, method)
 
     @staticmethod
     def __yes_no_only(s):
         """Helper for parameters expecting ['yes', 'no', 'only']"""
-        s = str(s).lower()
-        if s in ['true', 'yes']:
-            s = 'yes'
-        elif s in ['false', 'no']:
-            s = 'no'
-        return s
+        return _yes_no_only(s)
+
+
+def _yes_no_only(s):
+    """Value of a parameter expecting ['yes', 'no', 'only']"""
+    s = str(s).lower()
+    if s in ['true', 'yes']:
+        s = 'yes'
+    elif s in ['false', 'no']:
+        s = 'no'
+    return s
+
+
+#: Functions converting search parameter values to what the API expects
+_param_coercions = MappingProxyType({
+    'includeTBA': _yes_no_only,
+    'includeTBD': _yes_no_only,
+    'includeTest': _yes_no_only,
+    'size': str,
+    'radius': str,
+    'marketId': str
+})
 
 
 class ApiException(Exception):
@@ -208,11 +570,47 @@ class ApiException(Exception):
 
 
 class PagedResponse:
-    """Iterates through API response pages"""
-    def __init__(self, api_client, response):
+    """Iterates through API response pages
+    
+    By default, pages are requested one at a time by following each 
+    page's *next* link. With prefetching enabled (see ``prefetch()``), 
+    pages after the first are requested concurrently by page number 
+    and still delivered in order.
+    """
+    def __init__(self, api_client, response, workers=0, fields=None):
+        """
+        :param api_client: ``ApiClient`` that made the first request
+        :param response: JSON of the first page
+        :param workers: Number of pages to request concurrently
+            (default: 0, one page at a time)
+        :param fields: Paths of the only fields to extract from each 
+            item, into ``namedtuple`` records instead of models (see 
+            ``ticketpy.model.Projection``)
+        """
         self.api_client = api_client
+        self.workers = workers
+        #: ``IdentityMap`` shared by this response's pages (or ``None``)
+        self.entities = api_client._identity_map()
+        #: ``Projection`` building the items of pages (or ``None``)
+        self.projection = Projection(fields) if fields else None
         self.page = None
-        self.page = Page.from_json(response)
+        self.page = self._build(response)
+
+    def prefetch(self, workers=4):
+        """Request following pages concurrently, ``workers`` at a time.
+        
+        Keep ``workers`` at or below the client's ``pool_maxsize`` so 
+        every concurrent request can reuse a pooled connection.
+        
+        .. code-block:: python
+        
+            events = client.events.find(state_code='GA').prefetch(8).all()
+        
+        :param workers: Max number of page requests in flight
+        :return: This ``PagedResponse``
+        """
+        self.workers = workers
+        return self
 
     def limit(self, max_pages=5):
         """Retrieve X number of pages, returning a ``list`` of all entities.
@@ -225,14 +623,7 @@ class PagedResponse:
         :param max_pages: Max page requests to make before returning list
         :return: Flat list of results from pages
         """
-        all_items = []
-        counter = 0
-        for pg in self:
-            if counter >= max_pages:
-                break
-            counter += 1
-            all_items += pg
-        return all_items
+        return list(self.items(max_pages=max_pages))
 
     def one(self):
         """Get items from first page result"""
@@ -247,14 +638,138 @@ class PagedResponse:
         :return: Flat list of results
         """
         # TODO Rename this since all() is a built-in function...
-        return [i for item_list in self for i in item_list]
+        return list(self.items())
+
+    def items(self, max_items=None, max_pages=None):
+        """Yields each item (``Event``, ``Venue``...) of every page as 
+        the page arrives, without building a list.
+        
+        Pages stop being requested once ``max_items`` items are yielded, 
+        ``max_pages`` pages are read or the loop over ``items()`` stops.
+        
+        .. code-block:: python
+        
+            for event in client.events.find(state_code='GA').items(500):
+                print(event.name)
+        
+        :param max_items: Max number of items to yield (default: all)
+        :param max_pages: Max page requests to make (default: all)
+        """
+        if max_items is not None:
+            if max_items < 1:
+                return
+            # Don't request (or prefetch) pages past the last item needed
+            needed = -(-max_items // max(self.page.size or 1, 1))
+            max_pages = needed if max_pages is None else min(max_pages,
+                                                             needed)
+        pages = self._pages(max_pages)
+        try:
+            count = 0
+            for pg in pages:
+                for item in pg:
+                    yield item
+                    count += 1
+                    if count == max_items:
+                        return
+        finally:
+            pages.close()
+
+    def export(self, path, format=None, columns=None, batch_size=1000,
+               max_items=None):
+        """Writes results to an NDJSON, CSV or Parquet/Arrow file as 
+        pages arrive, ``batch_size`` rows at a time.
+        
+        .. code-block:: python
+        
+            resp = client.events.find(state_code='GA', size=200)
+            resp.export('events.csv', columns=['id', 'name', 'venue_id'])
+        
+        :param path: File path
+        :param format: *ndjson*, *csv*, *parquet* or *arrow* (default: 
+            from the file extension)
+        :param columns: Names of the columns to write (default: all, see 
+            ``ticketpy.export.model_columns``)
+        :param batch_size: Rows written at a time
+        :param max_items: Max number of results to write (default: all)
+        :return: Number of rows written
+        """
+        return export.write(self.items(max_items), path, format, columns,
+                            batch_size)
 
     def __iter__(self):
+        return self._pages()
+
+    def _pages(self, max_pages=None):
+        """Generator of up to ``max_pages`` pages (all pages if ``None``), 
+        reporting how many were read to the client's metrics"""
+        pages = self._read_pages(max_pages)
+        metrics = self.api_client.metrics
+        if metrics is None:
+            return pages
+        return metrics.count_pages(
+            pages, request_method(self.page.links.get('self')))
+
+    def _read_pages(self, max_pages=None):
+        """Yields up to ``max_pages`` pages (all pages if ``None``)"""
+        if max_pages is not None and max_pages < 1:
+            return
+        if self.workers and self.page.links.get('next'):
+            yield from self._prefetched_pages(max_pages)
+            return
+
+        counter = 1
         yield self.page
         next_url = self.page.links.get('next')
-        while next_url:
+        while next_url and (max_pages is None or counter < max_pages):
             log.debug("Requesting page: {}".format(next_url))
-            pg = self.api_client.get_url(next_url)
+            link = self.api_client._parse_link(next_url)
+            pg = self._build(self.api_client._request(link.url,
+                                                      link.params))
             next_url = pg.links.get('next')
+            counter += 1
             yield pg
-        return
+
+    def _prefetched_pages(self, max_pages=None):
+        """Yields the first page, then requests the remaining pages by 
+        page number, keeping up to ``self.workers`` requests in flight"""
+        yield self.page
+        link = self.api_client._parse_link(self.page.links['next'])
+        last_page = self.page.total_pages
+        if max_pages is not None:
+            last_page = min(last_page, self.page.number + max_pages)
+        numbers = iter(range(self.page.number + 1, last_page))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+
+            def submit():
+                number = next(numbers, None)
+                if number is not None:
+                    log.debug("Requesting page: {}".format(number))
+                    pending.append(
+                        pool.submit(self._get_page, link, number)
+                    )
+
+            for _ in range(self.workers):
+                submit()
+            try:
+                while pending:
+                    pg = pending.popleft().result()
+                    submit()
+                    yield pg
+            finally:
+                # Consumer stopped early, drop requests not yet started
+                for future in pending:
+                    future.cancel()
+
+    def _get_page(self, link, number):
+        """Requests page ``number`` of a parsed *next* link"""
+        params = dict(link.params)
+        params['page'] = str(number)
+        response = self.api_client._request(link.url, params)
+        return self._build(response)
+
+    def _build(self, response):
+        """``Page`` of a response's JSON"""
+        return self.api_client._from_json(response, entities=self.entities,
+                                          projection=self.projection)
@@ -0,0 +1,70 @@
+"""JSON decoders for API response bodies"""
+import importlib
+import importlib.util
+import json
+import logging
+
+log = logging.getLogger(__name__)
+
+
+def _json():
+    """Decodes with the standard library's ``json``"""
+    return json.loads
+
+
+def _orjson():
+    """Decodes with *orjson*"""
+    return importlib.import_module('orjson').loads
+
+
+def _msgspec():
+    """Decodes with *msgspec*, raising ``ValueError`` for invalid JSON
+    like the other decoders"""
+    msgspec = importlib.import_module('msgspec')
+    decoder = msgspec.json.Decoder()
+
+    def decode(data):
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    return decode
+
+
+def _installed(module):
+    """``module`` if it can be imported (without importing it), or
+    ``None``"""
+    return module if importlib.util.find_spec(module) is not None else None
+
+
+#: Function returning each decoder by name, and the module it imports
+#: on first use (``None`` if not installed)
+decoders = {
+    'orjson': (_orjson, _installed('orjson')),
+    'msgspec': (_msgspec, _installed('msgspec')),
+    'json': (_json, 'json')
+}
+
+
+def get(decoder=None):
+    """Function decoding ``bytes`` of JSON into Python objects
+
+    :param decoder: *json* (the standard library), *orjson*, *msgspec*,
+        a function taking ``bytes``, or ``None`` for the fastest one
+        installed (in the order of ``decoders``)
+    :return: Decoding function. Every one raises ``ValueError`` for
+        invalid JSON
+    """
+    if callable(decoder):
+        return decoder
+    if decoder is None:
+        return next(load() for (load, module) in decoders.values()
+                    if module is not None)
+    if decoder not in decoders:
+        raise ValueError("Unknown JSON decoder: {} (use one of {})".format(
+            decoder, ', '.join(decoders)))
+    load, module = decoders[decoder]
+    if module is None:
+        raise ImportError("The {0} decoder requires {0} "
+                          "(pip install ticketpy[{0}])".format(decoder))
+    return load()
@@ -0,0 +1,367 @@
+"""Bulk export of search results to NDJSON, CSV and Parquet/Arrow files"""
+import csv
+import importlib
+import json
+import logging
+import os
+from datetime import datetime
+from itertools import islice
+from operator import attrgetter
+from ticketpy.model import Attraction, Event, Venue
+from ticketpy.util import to_float
+
+#: pyarrow, once imported by the first Parquet/Arrow export (it's slow
+#: to import, and only needed for those)
+pyarrow = None
+
+log = logging.getLogger(__name__)
+
+#: File formats by file extension
+formats = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow'
+}
+
+
+def _venue(event):
+    """First venue of an event, or ``None``"""
+    return event.venues[0] if event.venues else None
+
+
+def _classification(event):
+    """Primary (or first) classification of an event, or ``None``"""
+    classifications = event.classifications or []
+    for cl in classifications:
+        if cl.primary:
+            return cl
+    return classifications[0] if classifications else None
+
+
+def _name(obj):
+    """``name`` of an object that may be ``None``"""
+    return obj.name if obj is not None else None
+
+
+def _price(event, key, pick):
+    """Lowest min/highest max of an event's price ranges"""
+    prices = [pr[key] for pr in event.price_ranges or []
+              if pr.get(key) is not None]
+    return pick(prices) if prices else None
+
+
+def _venue_column(attr, convert=None):
+    """Column of an event's first venue's ``attr``"""
+    def column(event):
+        value = getattr(_venue(event), attr, None)
+        return convert(value) if convert else value
+    return column
+
+
+def _classification_column(attr):
+    """Column of the name of an event's primary segment/genre/subgenre"""
+    def column(event):
+        return _name(getattr(_classification(event), attr, None))
+    return column
+
+
+#: Columns of each model: ``{name: (type, getter)}``, in export order.
+#: Types are *str*, *float*, *bool* or *datetime* (or *any* for the
+#: fields of projected records, see ``_columns()``)
+model_columns = {
+    Event: {
+        'id': ('str', lambda e: e.id),
+        'name': ('str', lambda e: e.name),
+        'local_start_date': ('str', lambda e: e.local_start_date),
+        'local_start_time': ('str', lambda e: e.local_start_time),
+        'utc_datetime': ('datetime', lambda e: e.utc_datetime),
+        'status': ('str', lambda e: e.status),
+        'venue_id': ('str', _venue_column('id')),
+        'venue_name': ('str', _venue_column('name')),
+        'city': ('str', _venue_column('city')),
+        'state_code': ('str', _venue_column('state_code')),
+        'latitude': ('float', _venue_column('latitude', to_float)),
+        'longitude': ('float', _venue_column('longitude', to_float)),
+        'segment': ('str', _classification_column('segment')),
+        'genre': ('str', _classification_column('genre')),
+        'subgenre': ('str', _classification_column('subgenre')),
+        'price_min': ('float', lambda e: _price(e, 'min', min)),
+        'price_max': ('float', lambda e: _price(e, 'max', max))
+    },
+    Venue: {
+        'id': ('str', lambda v: v.id),
+        'name': ('str', lambda v: v.name),
+        'address': ('str', lambda v: v.address),
+        'city': ('str', lambda v: v.city),
+        'state_code': ('str', lambda v: v.state_code),
+        'postal_code': ('str', lambda v: v.postal_code),
+        'latitude': ('float', lambda v: to_float(v.latitude)),
+        'longitude': ('float', lambda v: to_float(v.longitude)),
+        'timezone': ('str', lambda v: v.timezone),
+        'url': ('str', lambda v: v.url)
+    },
+    Attraction: {
+        'id': ('str', lambda a: a.id),
+        'name': ('str', lambda a: a.name),
+        'url': ('str', lambda a: a.url),
+        'segment': ('str', lambda a: _name(
+            a.classifications[0].segment if a.classifications else None)),
+        'test': ('bool', lambda a: a.test)
+    }
+}
+
+
+def records(items, columns=None):
+    """Yields a ``dict`` of column values for each item.
+
+    :param items: Iterable of ``Event``, ``Venue``, ``Attraction`` or
+        records of a ``fields`` search (all of the same type)
+    :param columns: Names of the columns to include, in order
+        (default: every column of the model, see
+        ``ticketpy.export.model_columns``, or every field of the records)
+    """
+    getters = None
+    for item in items:
+        if getters is None:
+            getters = [(name, getter) for (name, (_, getter))
+                       in _columns(type(item), columns)]
+        yield {name: getter(item) for (name, getter) in getters}
+
+
+def write(items, path, format=None, columns=None, batch_size=1000):
+    """Writes items to a file, ``batch_size`` rows at a time.
+
+    Only one batch is held in memory, so items can be streamed straight
+    from a ``PagedResponse`` or ``StreamedResponse``.
+
+    .. code-block:: python
+
+        resp = client.events.find(state_code='GA', size=200)
+        export.write(resp.items(), 'events.parquet',
+                     columns=['id', 'name', 'utc_datetime', 'venue_id'])
+
+    :param items: Iterable of ``Event``, ``Venue``, ``Attraction`` or
+        records of a ``fields`` search (all of the same type)
+    :param path: File path
+    :param format: *ndjson*, *csv*, *parquet* or *arrow* (default: from
+        the file extension, see ``ticketpy.export.formats``). *parquet*
+        and *arrow* require pyarrow
+    :param columns: Names of the columns to write, in order (default:
+        every column of the model, or every field of the records)
+    :param batch_size: Rows written at a time
+    :return: Number of rows written
+    """
+    format = format or _format(path)
+    writer = _writers.get(format)
+    if writer is None:
+        raise ValueError("Unknown export format: {}".format(format))
+    if format in ('parquet', 'arrow'):
+        _import_pyarrow(format)
+
+    items = iter(items)
+    first = next(items, None)
+    if first is None:
+        log.debug("Nothing to export to {}".format(path))
+        return 0
+    schema = _columns(type(first), columns)
+    rows = records(_chain(first, items), [name for (name, _) in schema])
+    batches = iter(lambda: list(islice(rows, batch_size)), [])
+    count = writer(path, schema, batches)
+    log.debug("Exported {} rows to {}".format(count, path))
+    return count
+
+
+def _chain(first, items):
+    """``first``, then ``items``"""
+    yield first
+    yield from items
+
+
+def _format(path):
+    """Export format of a file path's extension"""
+    for ext, format in formats.items():
+        if str(path).lower().endswith(ext):
+            return format
+    raise ValueError("Can't tell export format of {}, "
+                     "pass format=".format(path))
+
+
+def _columns(model, names=None):
+    """``[(name, (type, getter))]`` of ``names`` (or every column)"""
+    available = model_columns.get(model)
+    if available is None and hasattr(model, '_fields'):
+        # Records of a ``Projection``: their fields can hold anything
+        available = {name: ('any', attrgetter(name))
+                     for name in model._fields}
+    if available is None:
+        raise ValueError("Can't export {} objects".format(model.__name__))
+    if names is None:
+        return list(available.items())
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError("Unknown {} columns: {}".format(model.__name__,
+                                                         unknown))
+    return [(name, available[name]) for name in names]
+
+
+def _text(value):
+    """JSON/CSV representation of datetime values"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    return value
+
+
+def _csv_text(value):
+    """CSV representation of a value (JSON for objects and lists)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return _text(value)
+
+
+def _write_ndjson(path, schema, batches):
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for batch in batches:
+            f.writelines(
+                json.dumps({k: _text(v) for (k, v) in row.items()}) + '\n'
+                for row in batch
+            )
+            count += len(batch)
+    return count
+
+
+def _write_csv(path, schema, batches):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, [name for (name, _) in schema])
+        writer.writeheader()
+        for batch in batches:
+            writer.writerows({k: _csv_text(v) for (k, v) in row.items()}
+                             for row in batch)
+            count += len(batch)
+    return count
+
+
+def _import_pyarrow(format):
+    """Imports pyarrow and its IPC and Parquet modules on first use"""
+    global pyarrow
+    if pyarrow is not None:
+        return
+    try:
+        module = importlib.import_module('pyarrow')
+        importlib.import_module('pyarrow.ipc')
+        importlib.import_module('pyarrow.parquet')
+    except ImportError:
+        raise ImportError("Exporting to {} requires pyarrow "
+                          "(pip install ticketpy[parquet])".format(format))
+    pyarrow = module
+
+
+def _arrow_schema(schema, batch):
+    """``pyarrow.Schema`` of export columns, inferring the type of *any*
+    columns from their values in ``batch`` (*null* if they're all
+    ``None``)"""
+    types = {
+        'str': pyarrow.string(),
+        'float': pyarrow.float64(),
+        'bool': pyarrow.bool_(),
+        'datetime': pyarrow.timestamp('s', tz='UTC')
+    }
+    fields = []
+    for name, (col_type, _) in schema:
+        if col_type == 'any':
+            arrow_type = pyarrow.array([row[name] for row in batch]).type
+        else:
+            arrow_type = types[col_type]
+        fields.append((name, arrow_type))
+    return pyarrow.schema(fields)
+
+
+def _write_batches(path, schema, batches, open_writer, read_batches):
+    """Writes batches to a Parquet/Arrow file.
+
+    The file's schema is that of the first batch. When a later batch
+    needs a wider one (floats in a column of integers, values in a
+    column of nulls...), the file written so far is rewritten with the
+    unified schema, a batch at a time.
+
+    :param open_writer: Function of a path and ``pyarrow.Schema`` that
+        returns a writer
+    :param read_batches: Function of a path that yields the
+        ``pyarrow.RecordBatch`` objects of a file
+    """
+    count = 0
+    arrow_schema = None
+    writer = None
+    try:
+        for batch in batches:
+            batch_schema = _arrow_schema(schema, batch)
+            if writer is None:
+                arrow_schema = batch_schema
+                writer = open_writer(path, arrow_schema)
+            else:
+                unified = pyarrow.unify_schemas(
+                    [arrow_schema, batch_schema], promote_options='permissive')
+                if not unified.equals(arrow_schema):
+                    log.debug("Widening {} to {}".format(path, unified))
+                    writer.close()
+                    writer = _rewrite(path, unified, open_writer,
+                                      read_batches)
+                    arrow_schema = unified
+            writer.write_batch(
+                pyarrow.RecordBatch.from_pylist(batch, schema=arrow_schema))
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def _rewrite(path, arrow_schema, open_writer, read_batches):
+    """Copies a Parquet/Arrow file to a new one with a wider schema
+
+    :return: Writer of the new file
+    """
+    old_path = '{}.{}'.format(path, os.getpid())
+    os.replace(path, old_path)
+    try:
+        writer = open_writer(path, arrow_schema)
+        for old in read_batches(old_path):
+            writer.write_table(
+                pyarrow.Table.from_batches([old]).cast(arrow_schema))
+    finally:
+        os.remove(old_path)
+    return writer
+
+
+def _read_parquet(path):
+    with open(path, 'rb') as f:
+        yield from pyarrow.parquet.ParquetFile(f).iter_batches()
+
+
+def _read_arrow(path):
+    with pyarrow.OSFile(path) as f:
+        reader = pyarrow.ipc.open_file(f)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def _write_parquet(path, schema, batches):
+    return _write_batches(path, schema, batches,
+                          pyarrow.parquet.ParquetWriter, _read_parquet)
+
+
+def _write_arrow(path, schema, batches):
+    return _write_batches(path, schema, batches, pyarrow.ipc.new_file,
+                          _read_arrow)
+
+
+_writers = {
+    'ndjson': _write_ndjson,
+    'csv': _write_csv,
+    'parquet': _write_parquet,
+    'arrow': _write_arrow
+}
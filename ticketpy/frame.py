@@ -0,0 +1,207 @@
+"""Columnar, NumPy-backed event result sets (requires *numpy*)"""
+import logging
+from ticketpy.export import model_columns
+from ticketpy.model import Event
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+
+class EventFrame:
+    """Events stored column by column in NumPy arrays, for vectorized
+    filtering, sorting and grouping.
+
+    Columns are attributes holding one array each:
+
+    - *id*, *name*, *venue_id*: ``object`` arrays of ``str``
+    - *start*: ``datetime64[s]`` UTC start times (*NaT* if unknown)
+    - *price_min*, *price_max*, *latitude*, *longitude*: ``float64``
+      (*NaN* if unknown). Coordinates are the first venue's
+    - *status*, *segment*, *genre*: ``int32`` category codes, indexes
+      into ``categories[column]`` (-1 if unknown)
+
+    Indexing with a boolean mask, index array or slice returns a new
+    ``EventFrame`` (and with an ``int``, that row's ``Event``). The
+    ``Event`` objects a frame was built from are kept, and returned by
+    ``events()`` or iteration.
+
+    .. code-block:: python
+
+        frame = EventFrame.from_pages(client.events.find(state_code='GA'))
+        cheap = frame[(frame.price_min < 50) & frame.isin('status',
+                                                          ['onsale'])]
+        for event in cheap.sort('start'):
+            print(event.name)
+    """
+    #: Columns of ``float64`` values
+    float_columns = ('price_min', 'price_max', 'latitude', 'longitude')
+    #: Columns of category codes
+    categorical_columns = ('status', 'segment', 'genre')
+    #: Columns of ``str`` objects
+    object_columns = ('id', 'name', 'venue_id')
+    #: Every column
+    columns = ('start',) + object_columns + float_columns + \
+        categorical_columns
+
+    def __init__(self, events=()):
+        """
+        :param events: ``Event`` objects
+        """
+        if numpy is None:
+            raise ImportError("EventFrame requires numpy "
+                              "(pip install ticketpy[frame])")
+        events = list(events)
+        getters = model_columns[Event]
+        count = len(events)
+        self._events = numpy.empty(count, dtype=object)
+        self._events[:] = events
+        #: ``dict`` of categorical column to its list of categories
+        self.categories = {}
+
+        self.start = numpy.array([e.utc_datetime for e in events],
+                                 dtype='datetime64[s]')
+        for name in self.object_columns:
+            getter = getters[name][1]
+            values = numpy.empty(count, dtype=object)
+            values[:] = [getter(e) for e in events]
+            setattr(self, name, values)
+        for name in self.float_columns:
+            getter = getters[name][1]
+            values = (getter(e) for e in events)
+            setattr(self, name, numpy.fromiter(
+                (numpy.nan if v is None else v for v in values),
+                dtype=numpy.float64, count=count))
+        for name in self.categorical_columns:
+            getter = getters[name][1]
+            codes, categories = _encode([getter(e) for e in events])
+            setattr(self, name, codes)
+            self.categories[name] = categories
+
+    @classmethod
+    def from_pages(cls, pages):
+        """Builds a frame from the events of ``Page`` objects (ex: a
+        ``PagedResponse``, which requests every page)
+
+        :param pages: Iterable of ``Page``
+        :return: ``EventFrame``
+        """
+        return cls(event for page in pages for event in page)
+
+    def labels(self, column):
+        """Category (``str``) of each row of a categorical column
+
+        :param column: Categorical column name
+        :return: ``object`` array (``None`` where unknown)
+        """
+        categories = numpy.array(self.categories[column] + [None],
+                                 dtype=object)
+        return categories[getattr(self, column)]
+
+    def codes(self, column, values):
+        """Category codes of ``values`` in a categorical column
+        (``None`` is -1, categories not in the column are left out)"""
+        categories = self.categories[column]
+        return [categories.index(v) if v is not None else -1
+                for v in values if v is None or v in categories]
+
+    def isin(self, column, values):
+        """Boolean mask of rows whose ``column`` is one of ``values``
+
+        :param column: Column name
+        :param values: Values (categories, for categorical columns)
+        :return: ``bool`` array
+        """
+        if column in self.categorical_columns:
+            return numpy.isin(getattr(self, column),
+                              self.codes(column, values))
+        return numpy.isin(getattr(self, column), list(values))
+
+    def missing(self, column):
+        """Boolean mask of rows where ``column`` is unknown"""
+        values = getattr(self, column)
+        if column in self.categorical_columns:
+            return values < 0
+        if column in self.object_columns:
+            return numpy.equal(values, None)
+        if column == 'start':
+            return numpy.isnat(values)
+        return numpy.isnan(values)
+
+    def sort(self, column, descending=False):
+        """Returns a frame sorted by ``column``, with unknown values last.
+        Categorical columns sort by category name.
+
+        :param column: Column name
+        :param descending: ``True`` to sort from highest to lowest
+        :return: ``EventFrame``
+        """
+        missing = self.missing(column)
+        present = numpy.flatnonzero(~missing)
+        values = getattr(self, column)[present]
+        if column in self.categorical_columns:
+            # Codes are ordered by first appearance, ranks by name
+            categories = self.categories[column]
+            ranks = numpy.argsort(numpy.argsort(
+                numpy.array(categories, dtype=object), kind='stable'))
+            values = ranks[values] if len(categories) else values
+        order = present[numpy.argsort(values, kind='stable')]
+        if descending:
+            order = order[::-1]
+        return self[numpy.concatenate([order, numpy.flatnonzero(missing)])]
+
+    def groupby(self, column):
+        """Splits the frame by the values of ``column``
+
+        :param column: Column name
+        :return: ``dict`` of value (category, for categorical columns) to
+            ``EventFrame``, leaving out rows where it's unknown
+        """
+        values = getattr(self, column)
+        present = values[~self.missing(column)]
+        groups = {}
+        if column in self.categorical_columns:
+            categories = self.categories[column]
+            for code in numpy.unique(present):
+                groups[categories[code]] = self[values == code]
+        else:
+            for value in numpy.unique(present):
+                groups[value] = self[values == value]
+        return groups
+
+    def events(self):
+        """``list`` of the frame's ``Event`` objects, in row order"""
+        return self._events.tolist()
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return self._events[index]
+        frame = EventFrame.__new__(EventFrame)
+        frame._events = self._events[index]
+        frame.categories = self.categories
+        for name in self.columns:
+            setattr(frame, name, getattr(self, name)[index])
+        return frame
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __str__(self):
+        return "EventFrame of {} events".format(len(self))
+
+
+def _encode(values):
+    """Category codes of ``values`` (-1 for ``None``) and the categories"""
+    categories = {}
+    codes = numpy.fromiter(
+        (-1 if v is None else categories.setdefault(v, len(categories))
+         for v in values),
+        dtype=numpy.int32, count=len(values)
+    )
+    return codes, list(categories)
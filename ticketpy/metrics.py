@@ -0,0 +1,405 @@
+"""Per-request instrumentation and Prometheus/OpenMetrics export"""
+import contextvars
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+log = logging.getLogger(__name__)
+
+#: Content type of ``Metrics.exposition()``
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+#: Content type of ``Metrics.exposition(openmetrics=True)``
+OPENMETRICS_CONTENT_TYPE = ('application/openmetrics-text; version=1.0.0; '
+                            'charset=utf-8')
+
+#: Seconds spent opening a connection during the current request
+_connect_time = contextvars.ContextVar('ticketpy_connect_time',
+                                       default=None)
+#: (JSON, ``RequestRecord``) of a response not built into models yet
+_pending = contextvars.ContextVar('ticketpy_pending_record', default=None)
+
+
+class RequestRecord:
+    """Timings and size of one API request.
+
+    Times are in seconds, and ``None`` when they weren't measured:
+    *connect* (DNS lookup, TCP and TLS handshakes) is only set when the
+    request opened a new connection of a session ``ApiClient`` created,
+    *decode* and *build* only for successful, non-streamed responses.
+    """
+    __slots__ = ('method', 'url', 'status', 'started', 'connect', 'ttfb',
+                 'total', 'bytes', 'decode', 'build', 'error', '_clock')
+
+    def __init__(self, method=None, url=None, status=None, started=None,
+                 connect=None, ttfb=None, total=None, bytes=None,
+                 decode=None, build=None, error=None):
+        """
+        :param method: Search type (*events*, *venues*...)
+        :param url: Request URL (without parameters)
+        :param status: HTTP status code
+        :param started: When the request was sent (``time.time()``)
+        :param connect: Time to open a new connection
+        :param ttfb: Time until the response headers were read
+        :param total: Time until the whole response was read
+        :param bytes: Response body size
+        :param decode: Time to decode the response JSON
+        :param build: Time to build models from the JSON (in
+            ``Page.from_json`` or another model's ``from_json``)
+        :param error: Exception (``ApiException``...) raised for the
+            response, if any
+        """
+        self.method = method
+        self.url = url
+        self.status = status
+        self.started = started
+        self.connect = connect
+        self.ttfb = ttfb
+        self.total = total
+        self.bytes = bytes
+        self.decode = decode
+        self.build = build
+        self.error = error
+        self._clock = None
+
+    def elapsed(self):
+        """Seconds since the request was sent (``None`` if it wasn't
+        started by ``Metrics.start()``)"""
+        if self._clock is None:
+            return None
+        return time.perf_counter() - self._clock
+
+    def __repr__(self):
+        return "RequestRecord({})".format(", ".join(
+            "{}={!r}".format(k, getattr(self, k))
+            for k in self.__slots__ if not k.startswith('_')))
+
+
+class Metrics:
+    """Collects ``RequestRecord`` objects of an ``ApiClient`` into
+    counters and histograms, and passes each one to callbacks.
+
+    .. code-block:: python
+
+        metrics = ticketpy.Metrics()
+        metrics.on_request.append(lambda r: print(r.url, r.total))
+        client = ticketpy.ApiClient('your_api_key', metrics=metrics)
+        ...
+        print(metrics.exposition())
+        metrics.serve(9464)  # Or scrape http://localhost:9464/metrics
+    """
+    #: Histogram buckets (upper bounds) of timings, in seconds
+    buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+               1.0, 2.5, 5.0, 10.0)
+    #: Histogram buckets of the number of pages read per response
+    page_buckets = (1, 2, 5, 10, 20, 50, 100)
+
+    #: Histogram name, help and ``RequestRecord`` attribute of each timing
+    timings = (
+        ('ticketpy_request_seconds', 'Time until the whole response was '
+                                     'read', 'total'),
+        ('ticketpy_connect_seconds', 'Time to open a new connection',
+         'connect'),
+        ('ticketpy_ttfb_seconds', 'Time until the response headers were '
+                                  'read', 'ttfb'),
+        ('ticketpy_decode_seconds', 'Time to decode response JSON',
+         'decode'),
+        ('ticketpy_build_seconds', 'Time to build models from response '
+                                   'JSON', 'build')
+    )
+
+    def __init__(self, buckets=None):
+        """
+        :param buckets: Histogram buckets of timings (default:
+            ``Metrics.buckets``)
+        """
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        #: Callbacks taking each ``RequestRecord``
+        self.on_request = []
+        #: Callbacks taking (*method*, *pages*) each time iterating over
+        #: a ``PagedResponse`` stops
+        self.on_response = []
+        self._requests = {}
+        self._bytes = {}
+        self._histograms = {name: {} for (name, _, _) in self.timings}
+        self._pages = {}
+        # Records of successful responses waiting for ``built()``, by ID
+        self._held = {}
+        self._lock = threading.Lock()
+
+    def observe(self, record):
+        """Counts a finished request and passes it to ``on_request``"""
+        with self._lock:
+            key = (record.method, str(record.status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if record.bytes is not None:
+                self._bytes[record.method] = (
+                    self._bytes.get(record.method, 0) + record.bytes)
+            for name, _, attr in self.timings:
+                value = getattr(record, attr)
+                if value is not None:
+                    _observe(self._histograms[name], record.method, value,
+                             self.buckets)
+        for callback in self.on_request:
+            callback(record)
+
+    def observe_pages(self, method, pages):
+        """Counts the pages read from one response and passes them to
+        ``on_response``"""
+        with self._lock:
+            _observe(self._pages, method, pages, self.page_buckets)
+        for callback in self.on_response:
+            callback(method, pages)
+
+    def exposition(self, openmetrics=False):
+        """Metrics in the Prometheus text format
+
+        :param openmetrics: ``True`` for the OpenMetrics text format
+        :return: ``str``
+        """
+        lines = []
+
+        def family(name, kind, text):
+            if openmetrics and kind == 'counter':
+                name = name[:-len('_total')]
+            lines.append('# HELP {} {}'.format(name, text))
+            lines.append('# TYPE {} {}'.format(name, kind))
+
+        with self._lock:
+            family('ticketpy_requests_total', 'counter',
+                   'Discovery API requests sent')
+            for (method, status), count in sorted(self._requests.items(),
+                                                  key=_sort_key):
+                lines.append('ticketpy_requests_total{{{}}} {}'.format(
+                    _labels(method=method, status=status), count))
+            family('ticketpy_response_bytes_total', 'counter',
+                   'Response body bytes read')
+            for method, count in sorted(self._bytes.items(), key=_sort_key):
+                lines.append('ticketpy_response_bytes_total{{{}}} {}'.format(
+                    _labels(method=method), count))
+            for name, text, _ in self.timings:
+                family(name, 'histogram', text)
+                lines += _histogram(name, self._histograms[name],
+                                    self.buckets)
+            family('ticketpy_response_pages', 'histogram',
+                   'Pages read per paged response')
+            lines += _histogram('ticketpy_response_pages', self._pages,
+                                self.page_buckets)
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9464, host=''):
+        """Serves ``exposition()`` over HTTP on a background thread (in
+        the OpenMetrics format if the scraper accepts it)
+
+        :param port: Port to listen on
+        :param host: Address to listen on (default: all)
+        :return: The ``http.server.ThreadingHTTPServer`` (call its
+            ``shutdown()`` to stop)
+        """
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        server.daemon_threads = True
+        server.metrics = self
+        threading.Thread(target=server.serve_forever, daemon=True,
+                         name='ticketpy-metrics').start()
+        return server
+
+    def start(self, url):
+        """Starts recording a request about to be sent
+
+        :param url: Request URL
+        :return: ``RequestRecord``
+        """
+        _connect_time.set(None)
+        # The previous response of this thread/task was never built
+        self.report_pending()
+        record = RequestRecord(request_method(url), url)
+        record.started = time.time()
+        record._clock = time.perf_counter()
+        return record
+
+    def received(self, record, status, size=None, ttfb=None):
+        """Records the status and timings of a response whose body has
+        been read
+
+        :param record: ``RequestRecord`` from ``start()``
+        :param status: HTTP status code
+        :param size: Body size in bytes
+        :param ttfb: Seconds until the headers were read
+        """
+        record.total = record.elapsed()
+        record.status = status
+        record.bytes = size
+        record.ttfb = ttfb
+        record.connect = _connect_time.get()
+
+    def finish(self, record, json_obj=None):
+        """Reports a request, or holds it until ``built()`` is called
+        with its response JSON (see ``flush()``)"""
+        if json_obj is None:
+            self.observe(record)
+        else:
+            with self._lock:
+                self._held[id(record)] = record
+            _pending.set((json_obj, record))
+
+    def built(self, json_obj, seconds):
+        """Reports the request whose response JSON was just built into
+        models (if it's held by ``finish()``)
+
+        :param json_obj: Response JSON
+        :param seconds: Time spent building models
+        """
+        pending = _pending.get()
+        if pending is not None and pending[0] is json_obj:
+            _pending.set(None)
+            self.__report(pending[1], seconds)
+
+    def flush(self):
+        """Reports (without build time) every request held by
+        ``finish()`` whose response was never built into models.
+        ``ApiClient.close()`` calls it."""
+        with self._lock:
+            held = list(self._held.values())
+            self._held.clear()
+        for record in held:
+            self.observe(record)
+
+    def count_pages(self, pages, method):
+        """Wraps a generator of pages, calling ``observe_pages()`` with
+        the number read once it's exhausted or closed"""
+        count = 0
+        try:
+            for pg in pages:
+                count += 1
+                yield pg
+        finally:
+            pages.close()
+            self.report_pending()
+            self.observe_pages(method, count)
+
+    def report_pending(self):
+        """Reports the request held by ``finish()`` for this thread/task,
+        if any, without build time (when its response won't be built
+        into models)"""
+        pending = _pending.get()
+        if pending is not None:
+            _pending.set(None)
+            self.__report(pending[1])
+
+    def __report(self, record, build=None):
+        """Reports a held request (unless ``flush()`` already did)"""
+        with self._lock:
+            held = self._held.pop(id(record), None) is not None
+        if held:
+            record.build = build
+            self.observe(record)
+
+
+def request_method(url):
+    """Search type (*events*, *venues*...) of a request URL"""
+    match = re.search(r'/discovery/v2/(\w+)', url or '')
+    return match.group(1) if match else None
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose connections record how long they took to
+    open, for ``RequestRecord.connect``"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_time.set(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_time.set(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Answers each GET with ``Metrics.exposition()``"""
+    def do_GET(self):
+        openmetrics = ('application/openmetrics-text' in
+                       self.headers.get('Accept', ''))
+        body = self.server.metrics.exposition(openmetrics).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE
+                         if openmetrics else PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+def _observe(histogram, method, value, buckets):
+    """Adds a value to the (bucket counts, sum, count) of ``method``"""
+    counts, total, count = histogram.get(method) or ([0] * len(buckets),
+                                                    0, 0)
+    index = bisect_left(buckets, value)
+    if index < len(buckets):
+        counts[index] += 1
+    histogram[method] = (counts, total + value, count + 1)
+
+
+def _histogram(name, histogram, buckets):
+    """Sample lines of a histogram"""
+    lines = []
+    for method, (counts, total, count) in sorted(histogram.items(),
+                                                 key=_sort_key):
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append('{}_bucket{{{}}} {}'.format(
+                name, _labels(method=method, le=_number(bound)),
+                cumulative))
+        lines.append('{}_bucket{{{}}} {}'.format(
+            name, _labels(method=method, le='+Inf'), count))
+        lines.append('{}_sum{{{}}} {}'.format(name, _labels(method=method),
+                                              _number(total)))
+        lines.append('{}_count{{{}}} {}'.format(name, _labels(method=method),
+                                                count))
+    return lines
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(k, '' if v is None else str(v)
+                                     .replace('\\', r'\\')
+                                     .replace('"', r'\"'))
+                    for (k, v) in labels.items())
+
+
+def _number(value):
+    return repr(float(value))
+
+
+def _sort_key(item):
+    return tuple('' if k is None else k for k in
+                 (item[0] if isinstance(item[0], tuple) else (item[0],)))
@@ -0,0 +1,666 @@
+"""Local SQLite mirror of events, venues, attractions and classifications"""
+import json
+import logging
+import math
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import timedelta
+from ticketpy.model import Attraction, Classification, Event, Page, Venue
+from ticketpy.query import BaseQuery
+from ticketpy.util import (
+    date_time,
+    distance,
+    earth_radius,
+    timestamp,
+    to_float,
+    utc_now
+)
+
+log = logging.getLogger(__name__)
+
+_schema = """
+CREATE TABLE IF NOT EXISTS venues (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    city TEXT,
+    state_code TEXT,
+    country_code TEXT,
+    postal_code TEXT,
+    latitude REAL,
+    longitude REAL,
+    json TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS venues_name ON venues (name);
+CREATE INDEX IF NOT EXISTS venues_state ON venues (country_code, state_code);
+CREATE INDEX IF NOT EXISTS venues_location ON venues (latitude, longitude);
+
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    start_utc TEXT,
+    local_start_date TEXT,
+    status TEXT,
+    onsale_start TEXT,
+    onsale_end TEXT,
+    venue_id TEXT,
+    segment_id TEXT,
+    genre_id TEXT,
+    subgenre_id TEXT,
+    price_min REAL,
+    price_max REAL,
+    json TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start_utc);
+CREATE INDEX IF NOT EXISTS events_onsale ON events (onsale_start);
+CREATE INDEX IF NOT EXISTS events_venue ON events (venue_id, start_utc);
+CREATE INDEX IF NOT EXISTS events_segment ON events (segment_id, start_utc);
+CREATE INDEX IF NOT EXISTS events_genre ON events (genre_id);
+CREATE INDEX IF NOT EXISTS events_subgenre ON events (subgenre_id);
+
+CREATE TABLE IF NOT EXISTS attractions (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    json TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attractions_name ON attractions (name);
+
+CREATE TABLE IF NOT EXISTS event_attractions (
+    event_id TEXT NOT NULL,
+    attraction_id TEXT NOT NULL,
+    PRIMARY KEY (event_id, attraction_id)
+);
+CREATE INDEX IF NOT EXISTS event_attractions_attraction
+    ON event_attractions (attraction_id);
+
+CREATE TABLE IF NOT EXISTS classifications (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    level TEXT NOT NULL,
+    parent_id TEXT
+);
+CREATE INDEX IF NOT EXISTS classifications_name
+    ON classifications (name COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS syncs (
+    search TEXT PRIMARY KEY,
+    start_utc TEXT NOT NULL,
+    end_utc TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+"""
+
+#: Sort orders of ``find_events()``/``find_venues()`` (other than
+#: *distance*) to their ``ORDER BY``
+_event_sorts = {
+    'date,asc': 'e.start_utc ASC, e.id',
+    'date,desc': 'e.start_utc DESC, e.id',
+    'name,asc': 'e.name ASC, e.id',
+    'name,desc': 'e.name DESC, e.id',
+    'relevance,desc': 'e.start_utc ASC, e.id',
+    'onSaleStartDate,asc': 'e.onsale_start ASC, e.id',
+    'id,asc': 'e.id ASC',
+    'id,desc': 'e.id DESC'
+}
+_venue_sorts = {
+    'name,asc': 'v.name ASC, v.id',
+    'name,desc': 'v.name DESC, v.id',
+    'relevance,desc': 'v.name ASC, v.id',
+    'id,asc': 'v.id ASC',
+    'id,desc': 'v.id DESC'
+}
+#: API parameter names (ex: *stateCode*) to ``find()`` names
+_param_names = {v: k for (k, v) in BaseQuery.attr_map.items()}
+#: Parameters that don't change which results are returned
+_ignored_params = ('locale', 'include_test', 'source')
+
+
+class Mirror:
+    """Local copy of API data in a SQLite database.
+
+    ``sync()`` pulls events (along with their venues, attractions and
+    classifications) into the mirror, and later calls request new dates,
+    and the upcoming events again once they're ``max_age`` old.
+    ``find_events()`` and ``find_venues()``
+    take the parameters of ``EventQuery.find()`` and
+    ``VenueQuery.find()`` and answer from the mirror, without any API
+    requests.
+
+    Objects are stored as their JSON, so they need to be parsed with
+    ``keep_raw_json=True`` (the ``ApiClient`` default).
+
+    .. code-block:: python
+
+        mirror = Mirror('ticketmaster.db')
+        mirror.sync(client, country_code='US', segment_name='Music')
+        ...
+        page = mirror.find_events(state_code='GA', size=50,
+                                  classification_name='Jazz')
+    """
+    def __init__(self, path=':memory:'):
+        """
+        :param path: SQLite database file (default: in memory)
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.create_function('distance', 5, distance,
+                                   deterministic=True)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_schema)
+
+    def sync(self, api_client, start_date_time=None, end_date_time=None,
+             full=False, workers=4, max_age=timedelta(hours=1), **kwargs):
+        """Pulls events of a search (by start date) into the mirror.
+
+        The first sync of a search harvests every event in the date
+        range (see ``EventQuery.harvest()``). Later syncs of the same
+        search request the parts of the date range that weren't covered
+        yet. The API can't search by update time, so changes are found
+        by requesting the upcoming part of the synced range (from now
+        on) again, once the last time it was requested is ``max_age``
+        old: a sync within ``max_age`` of the previous one doesn't see
+        changes. Past events are only requested again by a ``full`` sync.
+        Only events that changed are rewritten.
+
+        Mirrored events of the search that a sync's searches no longer
+        return (moved out of the range, or deleted) are looked up by ID:
+        the ones the API still has are updated, the others removed.
+        Syncs with a *client_visibility* (which the mirror can't search
+        by) skip this.
+
+        :param api_client: ``ApiClient`` to search with
+        :param start_date_time: Start of the date range, as a ``datetime``
+            (UTC) or *YYYY-MM-DDTHH:MM:SSZ* timestamp (default: now)
+        :param end_date_time: End of the date range (default: 5 years
+            after ``start_date_time``)
+        :param full: ``True`` to request the whole date range again
+        :param workers: Max number of searches in flight
+        :param max_age: How long the upcoming events of a search are
+            left alone after being requested (``timedelta(0)`` to request
+            them on every sync)
+        :param kwargs: Other search parameters (see ``EventQuery.find()``)
+        :return: ``namedtuple`` of *fetched*, *added*, *updated* and
+            *removed* events
+        """
+        now = utc_now()
+        start = date_time(start_date_time or now)
+        end = date_time(end_date_time or start + timedelta(days=5 * 365))
+        search = json.dumps(sorted(kwargs.items()), default=str)
+        with self._lock:
+            state = self._conn.execute(
+                'SELECT * FROM syncs WHERE search = ?', (search,)).fetchone()
+
+        def harvest(w_start, w_end, **params):
+            params.update(kwargs)
+            log.debug("Syncing events from {} to {}".format(w_start, w_end))
+            return api_client.events.harvest(w_start, w_end,
+                                             workers=workers, **params)
+
+        # When the synced range was last requested up to its end
+        synced_at = now
+        if full or state is None:
+            windows = [(start, end)]
+        else:
+            synced_start = date_time(state['start_utc'])
+            synced_end = date_time(state['end_utc'])
+            windows = [(start, synced_start), (synced_end, end)]
+            if now - date_time(state['synced_at']) >= max_age:
+                windows.append((max(synced_start, now), synced_end))
+            else:
+                synced_at = date_time(state['synced_at'])
+            windows = [(w_start, w_end) for (w_start, w_end) in windows
+                       if w_start < w_end]
+            start, end = min(start, synced_start), max(end, synced_end)
+
+        events = {}
+        for w_start, w_end in windows:
+            for event in harvest(w_start, w_end):
+                events[event.id] = event
+        removed = 0
+        missing = self.__missing(windows, kwargs, events)
+        if missing:
+            log.debug("Looking up {} events that weren't found".format(
+                len(missing)))
+            found = api_client.events.by_ids(missing, workers=workers)
+            events.update((i, e) for (i, e) in found.items()
+                          if e is not None)
+            removed = self.remove(i for (i, e) in found.items()
+                                  if e is None)
+
+        added, updated = self.add(events.values(), now)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO syncs VALUES (?, ?, ?, ?)',
+                (search, timestamp(start), timestamp(end),
+                 timestamp(synced_at)))
+        stats = SyncStats(len(events), added, updated, removed)
+        log.debug("Synced {}".format(stats))
+        return stats
+
+    def add(self, items, synced_at=None):
+        """Stores (or replaces) ``Event``, ``Venue``, ``Attraction`` and
+        ``Classification`` objects
+
+        :param items: Objects to store (parsed with ``keep_raw_json``)
+        :param synced_at: ``datetime`` they were fetched (default: now)
+        :return: Tuple of the number of objects added and updated
+            (objects stored unchanged aren't counted)
+        """
+        synced_at = timestamp(synced_at or utc_now())
+        added = updated = 0
+        with self._lock, self._conn:
+            for item in items:
+                if item.json is None:
+                    raise ValueError("Can't mirror {} objects without their "
+                                     "JSON (use keep_raw_json=True)".format(
+                                         type(item).__name__))
+                store = _stores.get(type(item))
+                if store is None:
+                    raise ValueError("Can't mirror {} objects".format(
+                        type(item).__name__))
+                existed = store(self._conn, item.json, synced_at)
+                if existed is None:
+                    continue
+                if existed:
+                    updated += 1
+                else:
+                    added += 1
+        return added, updated
+
+    def remove(self, event_ids):
+        """Removes events (but not their venues and attractions)
+
+        :param event_ids: IDs of the events
+        :return: Number of events removed
+        """
+        ids = [(i,) for i in event_ids]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'DELETE FROM event_attractions WHERE event_id = ?', ids)
+            return self._conn.executemany(
+                'DELETE FROM events WHERE id = ?', ids).rowcount
+
+    def find_events(self, sort='date,asc', page=0, size=20, **kwargs):
+        """Search mirrored events, with the parameters of
+        ``EventQuery.find()`` except *client_visibility* (which raises
+        ``ValueError``, like sort orders the mirror doesn't have).
+        *locale*, *include_test* and *source* are ignored, and
+        *include_tba*/*include_tbd* only filter when given. *relevance*
+        sorts by date.
+
+        :return: ``Page`` of ``Event``
+        """
+        where, args = self.__filters(kwargs, _event_filters)
+        order = self.__order(sort, _event_sorts, kwargs)
+        return self.__page(
+            'SELECT e.json FROM events e LEFT JOIN venues v '
+            'ON v.id = e.venue_id', where, args, order, page, size, Event)
+
+    def find_venues(self, sort='name,asc', page=0, size=20, **kwargs):
+        """Search mirrored venues, with the parameters of
+        ``VenueQuery.find()`` (*keyword*, *venue_id*, *state_code*,
+        *country_code*, and *latlong*/*radius*/*unit*)
+
+        :return: ``Page`` of ``Venue``
+        """
+        where, args = self.__filters(kwargs, _venue_filters)
+        order = self.__order(sort, _venue_sorts, kwargs)
+        return self.__page('SELECT v.json FROM venues v', where, args,
+                           order, page, size, Venue)
+
+    def close(self):
+        """Closes the database connection"""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __missing(self, windows, kwargs, events):
+        """IDs of mirrored events of a search, starting in one of the
+        ``windows``, that aren't in ``events``"""
+        if not windows:
+            return []
+        params = {k: v for (k, v) in kwargs.items() if k != 'sort'}
+        try:
+            where, args = self.__filters(params, _event_filters)
+        except ValueError:
+            return []
+        dates = ' OR '.join(['e.start_utc BETWEEN ? AND ?'] * len(windows))
+        for w_start, w_end in windows:
+            args += [timestamp(w_start), timestamp(w_end)]
+        where = '{} ({})'.format(where + ' AND' if where else ' WHERE',
+                                 dates)
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT e.id FROM events e LEFT JOIN venues v '
+                'ON v.id = e.venue_id' + where, args).fetchall()
+        return [row[0] for row in rows if row[0] not in events]
+
+    def __filters(self, kwargs, filters):
+        """``WHERE`` clause and arguments of search parameters"""
+        params = {_param_names.get(k, k): v for (k, v) in kwargs.items()
+                  if v is not None}
+        clauses, args = [], []
+        if 'latlong' in params:
+            latitude, longitude = (float(c) for c in
+                                   str(params.pop('latlong')).split(','))
+            unit = params.pop('unit', None) or 'miles'
+            radius = float(params.pop('radius', None) or 25)
+            lat_delta = math.degrees(radius / earth_radius[unit])
+            lon_delta = lat_delta / max(math.cos(math.radians(
+                min(abs(latitude) + lat_delta, 89.9))), 1e-6)
+            # Bounding box (using the index), then the exact distance
+            clauses.append('v.latitude BETWEEN ? AND ? AND '
+                           'distance(v.latitude, v.longitude, ?, ?, ?) <= ?')
+            args += [latitude - lat_delta, latitude + lat_delta,
+                     latitude, longitude, earth_radius[unit], radius]
+            if lon_delta < 180:
+                clauses.append('v.longitude BETWEEN ? AND ?')
+                args += [longitude - lon_delta, longitude + lon_delta]
+        params.pop('unit', None)
+        params.pop('radius', None)
+        for name, value in params.items():
+            if name in _ignored_params:
+                continue
+            if name not in filters:
+                raise ValueError("Can't search the mirror by {}".format(name))
+            clause, values = filters[name](value)
+            clauses.append(clause)
+            args += values
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', args
+
+    @staticmethod
+    def __order(sort, sorts, kwargs):
+        """``ORDER BY`` of a sort order"""
+        if sort == 'distance,asc' and kwargs.get('latlong'):
+            latitude, longitude = str(kwargs['latlong']).split(',')
+            return 'distance(v.latitude, v.longitude, {}, {}, 1), v.id' \
+                .format(float(latitude), float(longitude))
+        if sort not in sorts:
+            raise ValueError("Can't sort the mirror by {}".format(sort))
+        return sorts[sort]
+
+    def __page(self, select, where, args, order, number, size, model):
+        """Runs a search, returning the requested ``Page``"""
+        number, size = int(number or 0), int(size or 20)
+        with self._lock:
+            total = self._conn.execute(
+                'SELECT COUNT(*) FROM ({}{})'.format(select, where),
+                args).fetchone()[0]
+            rows = self._conn.execute(
+                '{}{} ORDER BY {} LIMIT ? OFFSET ?'.format(select, where,
+                                                          order),
+                args + [size, number * size]).fetchall()
+        pg = Page(number, size, total, -(-total // size))
+        pg.links = {}
+        pg.json = None
+        pg += [model.from_json(json.loads(row[0])) for row in rows]
+        return pg
+
+
+SyncStats = namedtuple('stats', ['fetched', 'added', 'updated', 'removed'])
+
+
+def _values(value):
+    """List of a comma-separated ``str`` or list of values"""
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(',') if v.strip()]
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def _in(column):
+    """Filter on ``column`` being one of the (comma-separated) values"""
+    def where(value):
+        values = _values(value)
+        return '{} IN ({})'.format(column, ','.join('?' * len(values))), \
+            values
+    return where
+
+
+def _compare(column, op):
+    """Filter comparing ``column`` to a timestamp"""
+    def where(value):
+        return '{} {} ?'.format(column, op), [timestamp(value)]
+    return where
+
+
+def _json_ids(column, path):
+    """Filter on a JSON list of objects (ex: a venue's *dmas*) having
+    one of the (comma-separated) IDs"""
+    def where(value):
+        ids = [str(v) for v in _values(value)]
+        return ('EXISTS (SELECT 1 FROM json_each({}, ?) j WHERE '
+                "CAST(json_extract(j.value, '$.id') AS TEXT) IN ({}))".format(
+                    column, ','.join('?' * len(ids))), [path] + ids)
+    return where
+
+
+def _promoter_ids(value):
+    """Filter on an event's promoter (or one of its promoters)"""
+    clause, args = _json_ids('e.json', '$.promoters')(value)
+    ids = args[1:]
+    return ("({} OR json_extract(e.json, '$.promoter.id') IN "
+            "({}))".format(clause, ','.join('?' * len(ids))), args + ids)
+
+
+def _undated(flag):
+    """Filter for *include_tba*/*include_tbd*: *yes* (or ``True``),
+    *no* (or ``False``) or *only* events with the ``flag`` of
+    *dates.start*"""
+    def where(value):
+        value = {True: 'yes', False: 'no'}.get(value, str(value).lower())
+        column = "COALESCE(json_extract(e.json, '$.dates.start.{}'), " \
+                 "0)".format(flag)
+        if value not in ('yes', 'no', 'only'):
+            raise ValueError("include_{} must be 'yes', 'no' or "
+                             "'only'".format(flag[-3:].lower()))
+        if value == 'yes':
+            return '1', []
+        return '{} = {}'.format(column, int(value == 'only')), []
+    return where
+
+
+def _keyword(column):
+    """Filter on ``column`` containing a keyword (case-insensitive)"""
+    def where(value):
+        return '{} LIKE ?'.format(column), ['%{}%'.format(value)]
+    return where
+
+
+def _classification_names(value):
+    """Filter on an event's segment, genre or subgenre name"""
+    names = _values(value)
+    return ('EXISTS (SELECT 1 FROM classifications c WHERE c.id IN '
+            '(e.segment_id, e.genre_id, e.subgenre_id) AND c.name '
+            'COLLATE NOCASE IN ({}))'.format(','.join('?' * len(names))),
+            names)
+
+
+def _segment_names(value):
+    """Filter on an event's segment name"""
+    names = _values(value)
+    return ('e.segment_id IN (SELECT id FROM classifications WHERE '
+            "level = 'segment' AND name COLLATE NOCASE IN ({}))".format(
+                ','.join('?' * len(names))), names)
+
+
+def _classification_ids(value):
+    """Filter on an event's segment, genre or subgenre ID"""
+    ids = _values(value)
+    marks = ','.join('?' * len(ids))
+    return ('(e.segment_id IN ({0}) OR e.genre_id IN ({0}) OR '
+            'e.subgenre_id IN ({0}))'.format(marks), ids * 3)
+
+
+def _attraction_ids(value):
+    """Filter on events featuring one of the attractions"""
+    ids = _values(value)
+    return ('e.id IN (SELECT event_id FROM event_attractions WHERE '
+            'attraction_id IN ({}))'.format(','.join('?' * len(ids))), ids)
+
+
+_event_filters = {
+    'keyword': _keyword('e.name'),
+    'id': _in('e.id'),
+    'event_id': _in('e.id'),
+    'start_date_time': _compare('e.start_utc', '>='),
+    'end_date_time': _compare('e.start_utc', '<='),
+    'onsale_start_date_time': _compare('e.onsale_start', '>='),
+    'onsale_end_date_time': _compare('e.onsale_end', '<='),
+    'country_code': _in('v.country_code'),
+    'state_code': _in('v.state_code'),
+    'venue_id': _in('e.venue_id'),
+    'attraction_id': _attraction_ids,
+    'segment_id': _in('e.segment_id'),
+    'segment_name': _segment_names,
+    'classification_name': _classification_names,
+    'classification_id': _classification_ids,
+    'market_id': _json_ids('v.json', '$.markets'),
+    'dma_id': _json_ids('v.json', '$.dmas'),
+    'promoter_id': _promoter_ids,
+    'include_tba': _undated('dateTBA'),
+    'include_tbd': _undated('dateTBD')
+}
+_venue_filters = {
+    'keyword': _keyword('v.name'),
+    'id': _in('v.id'),
+    'venue_id': _in('v.id'),
+    'country_code': _in('v.country_code'),
+    'state_code': _in('v.state_code')
+}
+
+
+def _get(json_obj, *keys):
+    """Value at a path of keys in JSON, or ``None``"""
+    for key in keys:
+        if not isinstance(json_obj, dict):
+            return None
+        json_obj = json_obj.get(key)
+    return json_obj
+
+
+def _upsert(conn, table, row):
+    """Inserts or replaces a row, returning ``True`` if it existed, or
+    ``None`` if it's unchanged (but for *synced_at*)"""
+    old = conn.execute('SELECT * FROM {} WHERE id = ?'.format(table),
+                       (row['id'],)).fetchone()
+    existed = old is not None
+    if existed and all(old[k] == v for (k, v) in row.items()
+                       if k != 'synced_at'):
+        if 'synced_at' in row:
+            conn.execute('UPDATE {} SET synced_at = ? WHERE id = ?'.format(
+                table), (row['synced_at'], row['id']))
+        return None
+    conn.execute('INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+        table, ', '.join(row), ', '.join('?' * len(row))), list(row.values()))
+    return existed
+
+
+def _store_venue(conn, venue, synced_at):
+    return _upsert(conn, 'venues', {
+        'id': venue['id'],
+        'name': venue.get('name'),
+        'city': _get(venue, 'city', 'name'),
+        'state_code': _get(venue, 'state', 'stateCode'),
+        'country_code': _get(venue, 'country', 'countryCode'),
+        'postal_code': venue.get('postalCode'),
+        'latitude': to_float(_get(venue, 'location', 'latitude')),
+        'longitude': to_float(_get(venue, 'location', 'longitude')),
+        'json': json.dumps(venue),
+        'synced_at': synced_at
+    })
+
+
+def _store_attraction(conn, attraction, synced_at):
+    return _upsert(conn, 'attractions', {
+        'id': attraction['id'],
+        'name': attraction.get('name'),
+        'json': json.dumps(attraction),
+        'synced_at': synced_at
+    })
+
+
+def _store_classification(conn, classification, synced_at=None):
+    """Stores the segment > genre > subgenre tree of a classification"""
+    segment = classification.get('segment')
+    if not segment:
+        return False
+    existed = _store_level(conn, segment, 'segment')
+    for genre in _get(segment, '_embedded', 'genres') or []:
+        _store_level(conn, genre, 'genre', segment['id'])
+        for subgenre in _get(genre, '_embedded', 'subgenres') or []:
+            _store_level(conn, subgenre, 'subgenre', genre['id'])
+    return existed
+
+
+def _store_level(conn, json_obj, level, parent_id=None):
+    """Stores one segment/genre/subgenre"""
+    if not json_obj or 'id' not in json_obj:
+        return False
+    return _upsert(conn, 'classifications', {
+        'id': json_obj['id'],
+        'name': json_obj.get('name'),
+        'level': level,
+        'parent_id': parent_id
+    })
+
+
+def _store_event(conn, event, synced_at):
+    classifications = event.get('classifications') or []
+    primary = next((cl for cl in classifications if cl.get('primary')),
+                   classifications[0] if classifications else {})
+    segment, genre, subgenre = (primary.get(k) or {} for k in
+                                ('segment', 'genre', 'subGenre'))
+    _store_level(conn, segment, 'segment')
+    _store_level(conn, genre, 'genre', segment.get('id'))
+    _store_level(conn, subgenre, 'subgenre', genre.get('id'))
+
+    venues = _get(event, '_embedded', 'venues') or []
+    for venue in venues:
+        _store_venue(conn, venue, synced_at)
+    attractions = _get(event, '_embedded', 'attractions') or []
+    conn.execute('DELETE FROM event_attractions WHERE event_id = ?',
+                 (event['id'],))
+    for attraction in attractions:
+        _store_attraction(conn, attraction, synced_at)
+        conn.execute('INSERT OR IGNORE INTO event_attractions VALUES (?, ?)',
+                     (event['id'], attraction['id']))
+
+    prices = event.get('priceRanges') or []
+    mins = [p['min'] for p in prices if p.get('min') is not None]
+    maxes = [p['max'] for p in prices if p.get('max') is not None]
+    return _upsert(conn, 'events', {
+        'id': event['id'],
+        'name': event.get('name'),
+        'start_utc': _get(event, 'dates', 'start', 'dateTime'),
+        'local_start_date': _get(event, 'dates', 'start', 'localDate'),
+        'status': _get(event, 'dates', 'status', 'code'),
+        'onsale_start': _get(event, 'sales', 'public', 'startDateTime'),
+        'onsale_end': _get(event, 'sales', 'public', 'endDateTime'),
+        'venue_id': venues[0].get('id') if venues else None,
+        'segment_id': segment.get('id'),
+        'genre_id': genre.get('id'),
+        'subgenre_id': subgenre.get('id'),
+        'price_min': min(mins) if mins else None,
+        'price_max': max(maxes) if maxes else None,
+        'json': json.dumps(event),
+        'synced_at': synced_at
+    })
+
+
+_stores = {
+    Event: _store_event,
+    Venue: _store_venue,
+    Attraction: _store_attraction,
+    Classification: _store_classification
+}
@@ -1,32 +1,226 @@
 """Models for API objects"""
+from collections import namedtuple
 from datetime import datetime
+import functools
+import keyword
 import re
+import weakref
 import ticketpy
 
 
+#: Placeholder for lazy attributes that haven't been built yet
+_unset = object()
+
+
 def _assign_links(obj, json_obj, base_url=None):
     """Assigns ``links`` attribute to an object from JSON"""
+    obj.links = _links(json_obj, base_url)
+
+
+def _links(json_obj, base_url=None):
+    """Returns the ``links`` of an object from JSON"""
     # Normal link strucutre is {link_name: {'href': url}},
     # but some responses also have lists of other models.
     # API occasionally returns bad URLs (with {&sort} and similar)
     json_links = json_obj.get('_links')
     if not json_links:
-        obj.links = {}
-    else:
-        obj_links = {}
-        for k, v in json_links.items():
-            if 'href' in v:
-                href = re.sub("({.+})", "", v['href'])
-                if base_url:
-                    href = "{}{}".format(base_url, href)
-                obj_links[k] = href
-            else:
-                obj_links[k] = v
-        obj.links = obj_links
+        return {}
+    obj_links = {}
+    for k, v in json_links.items():
+        if 'href' in v:
+            href = re.sub("({.+})", "", v['href'])
+            if base_url:
+                href = "{}{}".format(base_url, href)
+            obj_links[k] = href
+        else:
+            obj_links[k] = v
+    return obj_links
+
+
+def _lazy(name, build, doc=None):
+    """Property for an attribute that, on lazily-parsed models, is built 
+    from the model's JSON the first time it's accessed
+    
+    :param name: Attribute name. The value is stored in ``_<name>``
+    :param build: Function returning the value from *(json_obj, lazy, 
+        entities)*
+    :param doc: Property docstring
+    """
+    attr = '_' + name
+
+    def getter(self):
+        value = getattr(self, attr)
+        if value is _unset:
+            value = build(self.json, True, getattr(self, '_entities', None))
+            setattr(self, attr, value)
+        return value
+
+    def setter(self, value):
+        setattr(self, attr, value)
+
+    return property(getter, setter, doc=doc)
+
+
+def _defer(obj, *names, entities=None):
+    """Marks lazy attributes ``names`` of ``obj`` as not built yet, to be 
+    built sharing objects through ``entities`` (an ``IdentityMap``)"""
+    for name in names:
+        setattr(obj, '_' + name, _unset)
+    if entities is not None:
+        obj._entities = entities
+
+
+class IdentityMap:
+    """Objects already built from JSON, by model and ID.
+
+    The same venue is embedded in every one of its events, and the same
+    segment/genre/subgenre in countless classifications. Passing an
+    ``IdentityMap`` (``entities``) to ``from_json()`` builds each
+    ``Venue``, ``Segment``, ``Genre`` and ``SubGenre`` once and shares
+    it everywhere its ID shows up again.
+
+    Objects with nested lists (ex: a segment with its genres) are kept
+    apart from their bare, embedded form. Lazily-parsed models keep the
+    map, to share the nested objects they build on first access too.
+    """
+    def __init__(self, weak=False):
+        """
+        :param weak: ``True`` to only hold objects while something else
+            references them, so the map can live as long as its client
+        """
+        self._objects = weakref.WeakValueDictionary() if weak else {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, json_obj):
+        """Map key of an object's JSON, ``None`` if it has no ID"""
+        entity_id = json_obj.get('id')
+        if entity_id is None:
+            return None
+        return model, entity_id, '_embedded' in json_obj
+
+    def get(self, key):
+        """Returns the object stored under ``key``, or ``None``"""
+        obj = self._objects.get(key)
+        if obj is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return obj
+
+    def add(self, key, obj):
+        """Stores ``obj`` under ``key``, returning the object kept (an
+        earlier one if another thread got there first)"""
+        return self._objects.setdefault(key, obj)
+
+    def __len__(self):
+        return len(self._objects)
+
+
+def _shared(model):
+    """Makes a model's ``from_json()`` reuse objects from its 
+    ``entities`` ``IdentityMap``
+
+    :param model: Name of the model, keying its objects in the map
+    """
+    def decorator(from_json):
+        @functools.wraps(from_json)
+        def wrapper(json_obj, lazy=False, keep_json=True, entities=None):
+            if entities is None:
+                return from_json(json_obj, lazy, keep_json)
+            key = entities.key(model, json_obj)
+            if key is None:
+                return from_json(json_obj, lazy, keep_json, entities)
+            obj = entities.get(key)
+            if obj is None:
+                obj = entities.add(
+                    key, from_json(json_obj, lazy, keep_json, entities)
+                )
+            return obj
+
+        return wrapper
+
+    return decorator
+
+
+class Projection:
+    """Picks only some fields out of result JSON into compact
+    ``namedtuple`` records, without building any model.
+
+    Each field is a dotted path into an item's JSON, where integers
+    index lists (ex: ``dates.start.dateTime``,
+    ``_embedded.venues.0.id``). Record fields are named after their
+    path, with dots turned into underscores and leading underscores
+    dropped (``dates_start_dateTime``, ``embedded_venues_0_id``).
+    Missing values are ``None``.
+
+    Records can be exported like models, their fields being the columns
+    (see ``ticketpy.export.write()``).
+    """
+    def __init__(self, fields):
+        """
+        :param fields: List of paths, or ``dict`` of record field name
+            to path
+        """
+        if isinstance(fields, str):
+            fields = [fields]
+        if not isinstance(fields, dict):
+            names = [_field_name(path) for path in fields]
+            duplicates = sorted({name for name in names
+                                 if names.count(name) > 1})
+            if duplicates:
+                raise ValueError("Paths with the same field name: {} (pass "
+                                 "a dict of names to paths)".format(
+                                     ', '.join(duplicates)))
+            fields = dict(zip(names, fields))
+        if not fields:
+            raise ValueError("No fields to project")
+        invalid = [name for name in fields if not _valid_name(name)]
+        if invalid:
+            raise ValueError("Invalid field names: {} (use identifiers "
+                             "that aren't keywords and don't start with an "
+                             "underscore)".format(
+                                 ', '.join(map(repr, invalid))))
+        self.fields = dict(fields)
+        self.paths = [tuple(int(k) if k.isdigit() else k
+                            for k in path.split('.'))
+                      for path in fields.values()]
+        self.record = namedtuple('record', list(fields))
+
+    def from_json(self, json_obj, lazy=False, keep_json=True,
+                  entities=None):
+        """Record of an item's JSON (with the arguments of a model's
+        ``from_json()``, which are ignored)"""
+        values = []
+        for path in self.paths:
+            value = json_obj
+            for key in path:
+                try:
+                    value = value[key]
+                except (KeyError, IndexError, TypeError):
+                    value = None
+                    break
+            values.append(value)
+        return self.record._make(values)
+
+
+def _field_name(path):
+    """Record field name of a projected path"""
+    return path.replace('.', '_').lstrip('_')
+
+
+def _valid_name(name):
+    """Whether ``name`` can name a ``namedtuple`` field"""
+    return (isinstance(name, str) and name.isidentifier() and
+            not keyword.iskeyword(name) and not name.startswith('_'))
 
 
 class Page(list):
     """API response page"""
+    __slots__ = ('number', 'size', 'total_elements', 'total_pages', 'links',
+                 'json')
+
     def __init__(self, number=None, size=None, total_elements=None,
                  total_pages=None):
         super().__init__([])
@@ -34,12 +228,26 @@ class Page(list):
         self.size = size
         self.total_elements = total_elements
         self.total_pages = total_pages
+        self.links = {}
+        self.json = None
 
     @staticmethod
-    def from_json(json_obj):
-        """Instantiate and return a Page(list)"""
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None, projection=None):
+        """Instantiate and return a Page(list)
+        
+        :param json_obj: Page JSON
+        :param lazy: ``True`` to build nested objects and links of the 
+            page's items on first access instead of up front
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        :param projection: ``Projection`` to build the page's items
+            with instead of their models
+        """
         pg = Page()
-        pg.json = json_obj
+        pg.json = json_obj if keep_json or lazy else None
         _assign_links(pg, json_obj, ticketpy.ApiClient.root_url)
         pg.number = json_obj['page']['number']
         pg.size = json_obj['page']['size']
@@ -50,16 +258,11 @@ class Page(list):
         if not embedded:
             return pg
 
-        object_models = {
-            'events': Event,
-            'venues': Venue,
-            'attractions': Attraction,
-            'classifications': Classification
-        }
         for k, v in embedded.items():
             if k in object_models:
-                obj_type = object_models[k]
-                pg += [obj_type.from_json(obj) for obj in v]
+                obj_type = projection or object_models[k]
+                pg += [obj_type.from_json(obj, lazy, keep_json, entities)
+                       for obj in v]
 
         return pg
 
@@ -68,7 +271,8 @@ class Page(list):
             "Page {number}/{total_pages}, "
             "Size: {size}, "
             "Total elements: {total_elements}"
-        ).format(**self.__dict__)
+        ).format(number=self.number, total_pages=self.total_pages,
+                 size=self.size, total_elements=self.total_elements)
 
 
 class Event:
@@ -117,6 +321,9 @@ class Event:
             }
         }
     """
+    __slots__ = ('id', 'name', 'local_start_date', 'local_start_time',
+                 'status', '_classifications', '_price_ranges', '_venues',
+                 '_links', '__utc_datetime', 'json', '_entities')
 
     def __init__(self, event_id=None, name=None, start_date=None,
                  start_time=None, status=None, price_ranges=None,
@@ -134,13 +341,29 @@ class Event:
         self.price_ranges = price_ranges
         self.venues = venues
         self.links = links
+        self.json = None
         self.__utc_datetime = None
         if utc_datetime is not None:
             self.utc_datetime = utc_datetime
 
+    classifications = _lazy(
+        'classifications',
+        lambda js, lazy, entities: _event_classifications(
+            js, lazy, entities=entities)
+    )
+    price_ranges = _lazy(
+        'price_ranges', lambda js, lazy, entities: _event_price_ranges(js)
+    )
+    venues = _lazy('venues', lambda js, lazy, entities: _event_venues(
+        js, lazy, entities=entities))
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
+
     @property
     def utc_datetime(self):
         """Start date/time in UTC (*YYYY-MM-DDTHH:MM:SSZ*)"""
+        if self.__utc_datetime is _unset:
+            start_dates = self.json.get('dates', {}).get('start', {})
+            self.utc_datetime = start_dates.get('dateTime')
         return self.__utc_datetime
 
     @utc_datetime.setter
@@ -152,10 +375,20 @@ class Event:
             self.__utc_datetime = datetime.strptime(utc_datetime, ts_format)
 
     @staticmethod
-    def from_json(json_event):
-        """Creates an ``Event`` from API's JSON response"""
+    def from_json(json_event, lazy=False, keep_json=True,
+                  entities=None):
+        """Creates an ``Event`` from API's JSON response
+        
+        :param json_event: Event JSON
+        :param lazy: ``True`` to parse ``utc_datetime``, ``classifications``,
+            ``price_ranges``, ``venues`` and ``links`` on first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         e = Event()
-        e.json = json_event
+        e.json = json_event if keep_json or lazy else None
         e.id = json_event.get('id')
         e.name = json_event.get('name')
 
@@ -163,26 +396,23 @@ class Event:
         start_dates = dates.get('start', {})
         e.local_start_date = start_dates.get('localDate')
         e.local_start_time = start_dates.get('localTime')
-        e.utc_datetime = start_dates.get('dateTime')
 
         status = dates.get('status', {})
         e.status = status.get('code')
 
-        if 'classifications' in json_event:
-            e.classifications = [EventClassification.from_json(cl)
-                                 for cl in json_event['classifications']]
-
-        price_ranges = []
-        if 'priceRanges' in json_event:
-            for pr in json_event['priceRanges']:
-                price_ranges.append({'min': pr['min'], 'max': pr['max']})
-        e.price_ranges = price_ranges
-
-        venues = []
-        if 'venues' in json_event.get('_embedded', {}):
-            for v in json_event['_embedded']['venues']:
-                venues.append(Venue.from_json(v))
-        e.venues = venues
+        if lazy:
+            e.__utc_datetime = _unset
+            _defer(e, 'classifications', 'price_ranges', 'venues', 'links',
+                   entities=entities)
+            return e
+
+        e.utc_datetime = start_dates.get('dateTime')
+        e.classifications = _event_classifications(
+            json_event, keep_json=keep_json, entities=entities
+        )
+        e.price_ranges = _event_price_ranges(json_event)
+        e.venues = _event_venues(json_event, keep_json=keep_json,
+                                 entities=entities)
         _assign_links(e, json_event)
         return e
 
@@ -194,7 +424,40 @@ class Event:
                 "Price ranges:     {price_ranges}\n"
                 "Status:           {status}\n"
                 "Classifications:  {classifications!s}\n")
-        return tmpl.format(**self.__dict__)
+        return tmpl.format(name=self.name, venues=self.venues,
+                           local_start_date=self.local_start_date,
+                           local_start_time=self.local_start_time,
+                           price_ranges=self.price_ranges,
+                           status=self.status,
+                           classifications=self.classifications)
+
+
+def _event_classifications(json_event, lazy=False, keep_json=True,
+                           entities=None):
+    """``EventClassification`` list of an event's JSON"""
+    if 'classifications' in json_event:
+        return [EventClassification.from_json(cl, lazy, keep_json, entities)
+                for cl in json_event['classifications']]
+    return None
+
+
+def _event_price_ranges(json_event):
+    """Price range list (*{'min': x, 'max': y}*) of an event's JSON"""
+    price_ranges = []
+    if 'priceRanges' in json_event:
+        for pr in json_event['priceRanges']:
+            price_ranges.append({'min': pr['min'], 'max': pr['max']})
+    return price_ranges
+
+
+def _event_venues(json_event, lazy=False, keep_json=True,
+                  entities=None):
+    """``Venue`` list of an event's JSON"""
+    venues = []
+    if 'venues' in json_event.get('_embedded', {}):
+        for v in json_event['_embedded']['venues']:
+            venues.append(Venue.from_json(v, lazy, keep_json, entities))
+    return venues
 
 
 class Venue:
@@ -243,6 +506,13 @@ class Venue:
 
     
     """
+    __slots__ = ('name', 'id', 'address', 'postal_code', 'city',
+                 'state_code', 'latitude', 'longitude', 'timezone', 'url',
+                 'box_office_info', 'dmas', 'markets', 'general_info',
+                 'social', 'images', 'parking_detail',
+                 'accessible_seating_detail', '_links', 'json',
+                 '__weakref__')
+
     def __init__(self, name=None, address=None, city=None, state_code=None,
                  postal_code=None, latitude=None, longitude=None,
                  markets=None, url=None, box_office_info=None,
@@ -270,6 +540,9 @@ class Venue:
         self.parking_detail = parking_detail
         self.accessible_seating_detail = accessible_seating_detail
         self.links = links
+        self.json = None
+
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @property
     def location(self):
@@ -285,10 +558,20 @@ class Venue:
         }
 
     @staticmethod
-    def from_json(json_venue):
-        """Returns a ``Venue`` object from JSON"""
+    @_shared('Venue')
+    def from_json(json_venue, lazy=False, keep_json=True,
+                  entities=None):
+        """Returns a ``Venue`` object from JSON
+        
+        :param json_venue: Venue JSON
+        :param lazy: ``True`` to parse ``links`` on first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         v = Venue()
-        v.json = json_venue
+        v.json = json_venue if keep_json or lazy else None
         v.id = json_venue.get('id')
         v.name = json_venue.get('name')
         v.url = json_venue.get('url')
@@ -314,16 +597,25 @@ class Venue:
         if 'state' in json_venue:
             v.state_code = json_venue['state'].get('stateCode')
 
-        _assign_links(v, json_venue)
+        if lazy:
+            _defer(v, 'links')
+        else:
+            _assign_links(v, json_venue)
         return v
 
     def __str__(self):
         return ("{name} at {address} in "
-                "{city} {state_code}").format(**self.__dict__)
+                "{city} {state_code}").format(name=self.name,
+                                              address=self.address,
+                                              city=self.city,
+                                              state_code=self.state_code)
 
 
 class Attraction:
     """Attraction"""
+    __slots__ = ('id', 'name', 'url', '_classifications', 'images', 'test',
+                 '_links', 'json', '_entities')
+
     def __init__(self, attraction_id=None, attraction_name=None, url=None,
                  classifications=None, images=None, test=None, links=None):
         self.id = attraction_id
@@ -333,22 +625,43 @@ class Attraction:
         self.images = images
         self.test = test
         self.links = links
+        self.json = None
+
+    classifications = _lazy(
+        'classifications',
+        lambda js, lazy, entities: _attraction_classifications(
+            js, lazy, entities=entities)
+    )
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
-        """Convert JSON object to ``Attraction`` object"""
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
+        """Convert JSON object to ``Attraction`` object
+        
+        :param json_obj: Attraction JSON
+        :param lazy: ``True`` to parse ``classifications`` and ``links`` 
+            on first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         att = Attraction()
-        att.json = json_obj
+        att.json = json_obj if keep_json or lazy else None
         att.id = json_obj.get('id')
         att.name = json_obj.get('name')
         att.url = json_obj.get('url')
         att.test = json_obj.get('test')
         att.images = json_obj.get('images')
-        classifications = json_obj.get('classifications')
-        att.classifications = [
-            Classification.from_json(cl) for cl in classifications
-        ]
 
+        if lazy:
+            _defer(att, 'classifications', 'links', entities=entities)
+            return att
+
+        att.classifications = _attraction_classifications(
+            json_obj, keep_json=keep_json, entities=entities
+        )
         _assign_links(att, json_obj)
         return att
 
@@ -356,11 +669,22 @@ class Attraction:
         return str(self.name) if self.name is not None else 'Unknown'
 
 
+def _attraction_classifications(json_obj, lazy=False, keep_json=True,
+                                entities=None):
+    """``Classification`` list of an attraction's JSON"""
+    classifications = json_obj.get('classifications')
+    return [Classification.from_json(cl, lazy, keep_json, entities)
+            for cl in classifications]
+
+
 class Classification:
     """Classification object (segment/genre/sub-genre)
     
     For the structure returned by ``EventSearch``, see ``EventClassification``
     """
+    __slots__ = ('_segment', 'type', 'subtype', 'primary', '_links', 'json',
+                 '_entities')
+
     def __init__(self, segment=None, classification_type=None, subtype=None,
                  primary=None, links=None):
         self.segment = segment
@@ -368,17 +692,29 @@ class Classification:
         self.subtype = subtype
         self.primary = primary
         self.links = links
+        self.json = None
+
+    segment = _lazy('segment', lambda js, lazy, entities: _segment(
+        js, lazy, entities=entities))
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
-        """Create/return ``Classification`` object from JSON"""
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
+        """Create/return ``Classification`` object from JSON
+        
+        :param json_obj: Classification JSON
+        :param lazy: ``True`` to parse ``segment`` and ``links`` on 
+            first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         cl = Classification()
-        cl.json = json_obj
+        cl.json = json_obj if keep_json or lazy else None
         cl.primary = json_obj.get('primary')
 
-        if 'segment' in json_obj:
-            cl.segment = Segment.from_json(json_obj['segment'])
-
         if 'type' in json_obj:
             cl_t = json_obj['type']
             cl.type = ClassificationType(cl_t['id'], cl_t['name'])
@@ -387,6 +723,12 @@ class Classification:
             cl_st = json_obj['subType']
             cl.subtype = ClassificationSubType(cl_st['id'], cl_st['name'])
 
+        if lazy:
+            _defer(cl, 'segment', 'links', entities=entities)
+            return cl
+
+        cl.segment = _segment(json_obj, keep_json=keep_json,
+                              entities=entities)
         _assign_links(cl, json_obj)
         return cl
 
@@ -399,6 +741,9 @@ class EventClassification:
 
     See ``Classification()`` for results from classification searches
     """
+    __slots__ = ('_genre', '_subgenre', '_segment', 'type', 'subtype',
+                 'primary', '_links', 'json', '_entities')
+
     def __init__(self, genre=None, subgenre=None, segment=None,
                  classification_type=None, classification_subtype=None,
                  primary=None, links=None):
@@ -409,26 +754,33 @@ class EventClassification:
         self.subtype = classification_subtype
         self.primary = primary
         self.links = links
+        self.json = None
+
+    segment = _lazy('segment', lambda js, lazy, entities: _segment(
+        js, lazy, entities=entities))
+    genre = _lazy('genre', lambda js, lazy, entities: _genre(
+        js, lazy, entities=entities))
+    subgenre = _lazy('subgenre', lambda js, lazy, entities: _subgenre(
+        js, lazy, entities=entities))
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
-        """Create/return ``EventClassification`` object from JSON"""
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
+        """Create/return ``EventClassification`` object from JSON
+        
+        :param json_obj: Classification JSON from an event
+        :param lazy: ``True`` to parse ``segment``, ``genre``, 
+            ``subgenre`` and ``links`` on first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         ec = EventClassification()
-        ec.json = json_obj
+        ec.json = json_obj if keep_json or lazy else None
         ec.primary = json_obj.get('primary')
 
-        segment = json_obj.get('segment')
-        if segment:
-            ec.segment = Segment.from_json(segment)
-
-        genre = json_obj.get('genre')
-        if genre:
-            ec.genre = Genre.from_json(genre)
-
-        subgenre = json_obj.get('subGenre')
-        if subgenre:
-            ec.subgenre = SubGenre.from_json(subgenre)
-
         cl_t = json_obj.get('type')
         if cl_t:
             ec.type = ClassificationType(cl_t['id'], cl_t['name'])
@@ -437,6 +789,17 @@ class EventClassification:
         if cl_st:
             ec.subtype = ClassificationSubType(cl_st['id'], cl_st['name'])
 
+        if lazy:
+            _defer(ec, 'segment', 'genre', 'subgenre', 'links',
+                   entities=entities)
+            return ec
+
+        ec.segment = _segment(json_obj, keep_json=keep_json,
+                              entities=entities)
+        ec.genre = _genre(json_obj, keep_json=keep_json,
+                          entities=entities)
+        ec.subgenre = _subgenre(json_obj, keep_json=keep_json,
+                                entities=entities)
         _assign_links(ec, json_obj)
         return ec
 
@@ -445,10 +808,40 @@ class EventClassification:
                 "Genre: {genre} / "
                 "Subgenre: {subgenre} / "
                 "Type: {type} / "
-                "Subtype: {subtype}").format(**self.__dict__)
+                "Subtype: {subtype}").format(segment=self.segment,
+                                             genre=self.genre,
+                                             subgenre=self.subgenre,
+                                             type=self.type,
+                                             subtype=self.subtype)
+
+
+def _segment(json_obj, lazy=False, keep_json=True, entities=None):
+    """``Segment`` of a classification's JSON"""
+    segment = json_obj.get('segment')
+    if segment:
+        return Segment.from_json(segment, lazy, keep_json, entities)
+    return None
+
+
+def _genre(json_obj, lazy=False, keep_json=True, entities=None):
+    """``Genre`` of a classification's JSON"""
+    genre = json_obj.get('genre')
+    if genre:
+        return Genre.from_json(genre, lazy, keep_json, entities)
+    return None
+
+
+def _subgenre(json_obj, lazy=False, keep_json=True, entities=None):
+    """``SubGenre`` of a classification's JSON"""
+    subgenre = json_obj.get('subGenre')
+    if subgenre:
+        return SubGenre.from_json(subgenre, lazy, keep_json, entities)
+    return None
 
 
 class ClassificationType:
+    __slots__ = ('id', 'name', 'subtypes')
+
     def __init__(self, type_id=None, type_name=None, subtypes=None):
         self.id = type_id
         self.name = type_name
@@ -459,6 +852,8 @@ class ClassificationType:
 
 
 class ClassificationSubType:
+    __slots__ = ('id', 'name')
+
     def __init__(self, type_id=None, type_name=None):
         self.id = type_id
         self.name = type_name
@@ -468,25 +863,46 @@ class ClassificationSubType:
 
 
 class Segment:
+    __slots__ = ('id', 'name', '_genres', '_links', 'json', '_entities',
+                 '__weakref__')
+
     def __init__(self, segment_id=None, segment_name=None, genres=None,
                  links=None):
         self.id = segment_id
         self.name = segment_name
         self.genres = genres
         self.links = links
+        self.json = None
+
+    genres = _lazy('genres', lambda js, lazy, entities: _segment_genres(
+        js, lazy, entities=entities))
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
-        """Create and return a ``Segment`` from JSON"""
+    @_shared('Segment')
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
+        """Create and return a ``Segment`` from JSON
+        
+        :param json_obj: Segment JSON
+        :param lazy: ``True`` to parse ``genres`` and ``links`` on 
+            first access
+        :param keep_json: ``False`` to drop the source JSON (``json``) 
+            once parsed. Lazily-parsed objects always keep it
+        :param entities: ``IdentityMap`` to share venues, segments, 
+            genres and subgenres through
+        """
         seg = Segment()
-        seg.json = json_obj
+        seg.json = json_obj if keep_json or lazy else None
         seg.id = json_obj['id']
         seg.name = json_obj.get('name')
 
-        if '_embedded' in json_obj:
-            genres = json_obj['_embedded']['genres']
-            seg.genres = [Genre.from_json(g) for g in genres]
+        if lazy:
+            _defer(seg, 'genres', 'links', entities=entities)
+            return seg
 
+        seg.genres = _segment_genres(json_obj, keep_json=keep_json,
+                                     entities=entities)
         _assign_links(seg, json_obj)
         return seg
 
@@ -494,25 +910,46 @@ class Segment:
         return self.name if self.name is not None else 'Unknown'
 
 
+def _segment_genres(json_obj, lazy=False, keep_json=True,
+                    entities=None):
+    """``Genre`` list of a segment's JSON"""
+    if '_embedded' in json_obj:
+        genres = json_obj['_embedded']['genres']
+        return [Genre.from_json(g, lazy, keep_json, entities) for g in genres]
+    return None
+
+
 class Genre:
+    __slots__ = ('id', 'name', '_subgenres', '_links', 'json', '_entities',
+                 '__weakref__')
+
     def __init__(self, genre_id=None, genre_name=None, subgenres=None,
                  links=None):
         self.id = genre_id
         self.name = genre_name
         self.subgenres = subgenres
         self.links = links
+        self.json = None
+
+    subgenres = _lazy('subgenres', lambda js, lazy, entities: _genre_subgenres(
+        js, lazy, entities=entities))
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
+    @_shared('Genre')
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
         g = Genre()
-        g.json = json_obj
+        g.json = json_obj if keep_json or lazy else None
         g.id = json_obj.get('id')
         g.name = json_obj.get('name')
-        if '_embedded' in json_obj:
-            embedded = json_obj['_embedded']
-            subgenres = embedded['subgenres']
-            g.subgenres = [SubGenre.from_json(sg) for sg in subgenres]
 
+        if lazy:
+            _defer(g, 'subgenres', 'links', entities=entities)
+            return g
+
+        g.subgenres = _genre_subgenres(json_obj, keep_json=keep_json,
+                                       entities=entities)
         _assign_links(g, json_obj)
         return g
 
@@ -520,20 +957,49 @@ class Genre:
         return self.name if self.name is not None else 'Unknown'
 
 
+def _genre_subgenres(json_obj, lazy=False, keep_json=True,
+                     entities=None):
+    """``SubGenre`` list of a genre's JSON"""
+    if '_embedded' in json_obj:
+        subgenres = json_obj['_embedded']['subgenres']
+        return [SubGenre.from_json(sg, lazy, keep_json, entities)
+                for sg in subgenres]
+    return None
+
+
 class SubGenre:
+    __slots__ = ('id', 'name', '_links', 'json', '__weakref__')
+
     def __init__(self, subgenre_id=None, subgenre_name=None, links=None):
         self.id = subgenre_id
         self.name = subgenre_name
         self.links = links
+        self.json = None
+
+    links = _lazy('links', lambda js, lazy, entities: _links(js))
 
     @staticmethod
-    def from_json(json_obj):
+    @_shared('SubGenre')
+    def from_json(json_obj, lazy=False, keep_json=True,
+                  entities=None):
         sg = SubGenre()
-        sg.json = json_obj
+        sg.json = json_obj if keep_json or lazy else None
         sg.id = json_obj['id']
         sg.name = json_obj['name']
-        _assign_links(sg, json_obj)
+        if lazy:
+            _defer(sg, 'links')
+        else:
+            _assign_links(sg, json_obj)
         return sg
 
     def __str__(self):
         return self.name if self.name is not None else 'Unknown'
+
+
+#: Models for each type of object embedded in a result page
+object_models = {
+    'events': Event,
+    'venues': Venue,
+    'attractions': Attraction,
+    'classifications': Classification
+}
@@ -1,7 +1,12 @@
 """Classes to handle API queries/searches"""
-import requests
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from ticketpy import util
 from ticketpy.model import Venue, Event, Attraction, Classification
 
+log = logging.getLogger(__name__)
+
 
 class BaseQuery:
     """Base query/parent class for specific serach types."""
@@ -87,11 +92,70 @@ class BaseQuery:
 
     def by_id(self, entity_id):
         """Get a specific object by its ID"""
-        get_tmpl = "{}/{}/{}"
-        get_url = get_tmpl.format(self.api_client.url, self.method, entity_id)
-        r = requests.get(get_url, params=self.api_client.api_key)
-        r_json = self.api_client._handle_response(r)
-        return self.model.from_json(r_json)
+        return self.api_client.by_id(self.method, entity_id, self.model)
+
+    def by_ids(self, entity_ids, chunk_size=50, workers=4):
+        """Get many objects by their IDs, batching them into searches.
+        
+        IDs are deduplicated and split into chunks of ``chunk_size``, and 
+        each chunk is fetched with a single comma-separated *id* search, 
+        ``workers`` chunks at a time. Resolving 5,000 IDs this way takes 
+        100 requests instead of 5,000.
+        
+        :param entity_ids: IDs of the objects
+        :param chunk_size: Max number of IDs per search request
+        :param workers: Max number of search requests in flight
+        :return: ``dict`` of ID to object, in the order IDs were given. 
+            IDs that weren't found map to ``None`` (and are logged in a 
+            warning)
+        """
+        _check_batching(chunk_size, workers)
+        ids = list(dict.fromkeys(entity_ids))
+
+        def find_chunk(chunk):
+            return self._get(entity_id=','.join(chunk), size=len(chunk)).all()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(find_chunk, _chunks(ids, chunk_size))
+            return self._by_id(ids, results)
+
+    def _by_id(self, ids, results):
+        """``by_ids()`` result of the items found by each search, warning 
+        about IDs that weren't found"""
+        found = {}
+        for items in results:
+            for item in items:
+                found[self._id(item)] = item
+        missing = [i for i in ids if i not in found]
+        if missing:
+            log.warning("{} {} not found: {}".format(
+                len(missing), self.method, ', '.join(missing)))
+        return {i: found.get(i) for i in ids}
+
+    def export(self, path, format=None, columns=None, batch_size=1000,
+               **kwargs):
+        """Searches with ``find(**kwargs)`` and writes every result to an 
+        NDJSON, CSV or Parquet/Arrow file as pages arrive
+        
+        .. code-block:: python
+        
+            client.venues.export('venues.parquet', state_code='GA', 
+                                 size=200, columns=['id', 'name'])
+        
+        :param path: File path
+        :param format: *ndjson*, *csv*, *parquet* or *arrow* (default: 
+            from the file extension)
+        :param columns: Names of the columns to write (default: all)
+        :param batch_size: Rows written at a time
+        :param kwargs: Search parameters
+        :return: Number of rows written
+        """
+        return self.find(**kwargs).export(path, format, columns, batch_size)
+
+    @staticmethod
+    def _id(item):
+        """ID of an object returned by a search"""
+        return item.id
 
     def _search_params(self, **kwargs):
         """Returns API-friendly search parameters from kwargs
@@ -124,7 +188,7 @@ class AttractionQuery(BaseQuery):
 
     def find(self, sort=None, keyword=None, attraction_id=None,
              source=None, include_test=None, page=None, size=None,
-             locale=None, **kwargs):
+             locale=None, fields=None, **kwargs):
         """
         :param sort: Response sort type (API default: *name,asc*)
         :param keyword: 
@@ -134,11 +198,15 @@ class AttractionQuery(BaseQuery):
         :param page: 
         :param size: 
         :param locale: API default: *en*
+        :param fields: Paths of the only fields to return, as 
+            ``namedtuple`` records instead of ``Attraction`` objects 
+            (ex: ``['id', 'name']``, see ``ticketpy.model.Projection``)
         :param kwargs: 
         :return: 
         """
         return self._get(keyword, attraction_id, sort, include_test,
-                         page, size, locale, source=source, **kwargs)
+                         page, size, locale, source=source, fields=fields,
+                         **kwargs)
 
 
 class ClassificationQuery(BaseQuery):
@@ -169,35 +237,55 @@ class ClassificationQuery(BaseQuery):
 
     def segment_by_id(self, segment_id):
         """Return a ``Segment`` matching this ID"""
-        return self.by_id(segment_id).segment
+        return self._segment(self.by_id(segment_id))
 
     def genre_by_id(self, genre_id):
         """Return a ``Genre`` matching this ID"""
-        genre = None
-        resp = self.by_id(genre_id)
-        if resp.segment:
-            for genre in resp.segment.genres:
-                if genre.id == genre_id:
-                    genre = genre
-        return genre
+        return self._genre(self.by_id(genre_id), genre_id)
 
     def subgenre_by_id(self, subgenre_id):
         """Return a ``SubGenre`` matching this ID"""
-        subgenre = None
-        segment = self.by_id(subgenre_id).segment
+        return self._subgenre(self.by_id(subgenre_id), subgenre_id)
+
+    @staticmethod
+    def _id(item):
+        """ID of a ``Classification`` (its segment's, or type's, ID)"""
+        if item.segment:
+            return item.segment.id
+        return item.type.id if item.type else None
+
+    @staticmethod
+    def _segment(classification):
+        """Segment of a classification returned by ``by_id()``"""
+        return classification.segment
+
+    @staticmethod
+    def _genre(classification, genre_id):
+        """Genre matching ``genre_id`` in a classification's segment"""
+        if classification.segment:
+            for genre in classification.segment.genres or []:
+                if genre.id == genre_id:
+                    return genre
+        return None
+
+    @staticmethod
+    def _subgenre(classification, subgenre_id):
+        """Subgenre matching ``subgenre_id`` in a classification's segment"""
+        segment = classification.segment
         if segment:
-            subgenres = [
-                subg for genre in segment.genres
-                for subg in genre.subgenres
-            ]
-            for subg in subgenres:
-                if subg.id == subgenre_id:
-                    subgenre = subg
-        return subgenre
+            for genre in segment.genres or []:
+                for subg in genre.subgenres or []:
+                    if subg.id == subgenre_id:
+                        return subg
+        return None
 
 
 class EventQuery(BaseQuery):
     """Abstraction to search API for events"""
+    #: Max number of results the API pages through for a search
+    #: (*size* * *page* must stay under it)
+    deep_paging_limit = 1000
+
     def __init__(self, api_client):
         super().__init__(api_client, 'events', Event)
 
@@ -210,7 +298,7 @@ class EventQuery(BaseQuery):
              market_id=None, promoter_id=None, dma_id=None,
              include_tba=None, include_tbd=None, client_visibility=None,
              keyword=None, event_id=None, source=None, include_test=None,
-             page=None, size=None, locale=None, **kwargs):
+             page=None, size=None, locale=None, fields=None, **kwargs):
         """Search for events matching given criteria.
 
         :param sort: Sorting order of search result 
@@ -251,6 +339,10 @@ class EventQuery(BaseQuery):
         :param page: Page number to get (default: 0)
         :param size: Size of page (default: 20)
         :param locale: Locale (default: 'en')
+        :param fields: Paths of the only fields to return, as 
+            ``namedtuple`` records instead of ``Event`` objects (ex: 
+            ``['id', 'name', 'dates.start.dateTime', 
+            '_embedded.venues.0.id']``, see ``ticketpy.model.Projection``)
         :return: 
         """
         return self._get(keyword, event_id, sort, include_test, page,
@@ -267,7 +359,86 @@ class EventQuery(BaseQuery):
                          market_id=market_id, promoter_id=promoter_id,
                          dma_id=dma_id, include_tba=include_tba,
                          include_tbd=include_tbd, source=source,
-                         client_visibility=client_visibility, **kwargs)
+                         client_visibility=client_visibility, fields=fields,
+                         **kwargs)
+
+    def harvest(self, start_date_time=None, end_date_time=None, size=200,
+                workers=4, max_results=None, **kwargs):
+        """Get **every** event matching a search, past the API's deep 
+        paging limit (only the first 1,000 results of a search can be 
+        paged through).
+        
+        The date range is split into windows, sized from each window's 
+        ``total_elements``, until every window has few enough events to 
+        page through. When sorted by date, the events on the first page 
+        of a window that's split are kept, and only the rest of the 
+        window is split. Windows are requested ``workers`` at a time and 
+        events found in more than one window are only returned once.
+        
+        .. code-block:: python
+        
+            events = client.events.harvest(country_code='US')
+        
+        :param start_date_time: Start of the date range, as a ``datetime`` 
+            (UTC) or *YYYY-MM-DDTHH:MM:SSZ* timestamp (default: now)
+        :param end_date_time: End of the date range (default: 5 years 
+            after ``start_date_time``)
+        :param size: Page size to request
+        :param workers: Max number of windows requested concurrently
+        :param max_results: Max events per window (default: 
+            ``deep_paging_limit``)
+        :param kwargs: Search parameters (see ``find()``)
+        :return: ``list`` of ``Event``, by window then in search order
+        """
+        start = util.date_time(start_date_time or util.utc_now())
+        end = util.date_time(end_date_time or
+                             start + timedelta(days=5 * 365))
+        max_results = max_results or self.deep_paging_limit
+        size = min(size, max_results)
+        by_date = kwargs.get('sort', 'date,asc') == 'date,asc'
+
+        def search(window):
+            """Events of a window, and/or the sub-windows to search"""
+            w_start, w_end = window
+            resp = self.find(start_date_time=util.timestamp(w_start),
+                             end_date_time=util.timestamp(w_end),
+                             size=size, **kwargs)
+            total = resp.page.total_elements
+            if total > max_results:
+                # The first page holds every event starting before its
+                # last one does: keep them, and only split the rest
+                events = []
+                covered = _last_start(resp.page) if by_date else None
+                if covered is not None and covered > w_start:
+                    events = [e for e in resp.page
+                              if e.utc_datetime < covered]
+                    w_start = covered
+                windows = _split(w_start, w_end, -(-2 * total // max_results))
+                if len(windows) > 1 or events:
+                    return window, events, windows
+                log.warning("{} events from {} can't all be paged "
+                            "through".format(total, w_start))
+            max_pages = -(-max_results // size)
+            return window, list(resp.items(max_pages=max_pages)), None
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            pending = {pool.submit(search, (start, end))}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, events, windows = future.result()
+                    results[window] = events
+                    if windows:
+                        log.debug("Splitting {} - {} into {} windows".format(
+                            window[0], window[1], len(windows)))
+                        pending |= {pool.submit(search, w) for w in windows}
+
+        found = {}
+        for window in sorted(results):
+            for event in results[window]:
+                found.setdefault(event.id, event)
+        return list(found.values())
 
     def by_location(self, latitude, longitude, radius='10', unit='miles',
                     sort='relevance,desc', **kwargs):
@@ -301,7 +472,7 @@ class VenueQuery(BaseQuery):
 
     def find(self, keyword=None, venue_id=None, sort=None, state_code=None,
              country_code=None, source=None, include_test=None,
-             page=None, size=None, locale=None, **kwargs):
+             page=None, size=None, locale=None, fields=None, **kwargs):
         """Search for venues matching provided parameters
         
         :param keyword: Keyword to search on (such as part of the venue name)
@@ -316,12 +487,17 @@ class VenueQuery(BaseQuery):
         :param page: Page number (default: 0)
         :param size: Page size of the response (default: 20)
         :param locale: Locale (default: 'en')
+        :param fields: Paths of the only fields to return, as 
+            ``namedtuple`` records instead of ``Venue`` objects (ex: 
+            ``['id', 'name', 'city.name']``, see 
+            ``ticketpy.model.Projection``)
         :return: Venues found matching criteria 
         :rtype: ``ticketpy.PagedResponse``
         """
         return self._get(keyword, venue_id, sort, include_test, page,
                          size, locale, state_code=state_code,
-                         country_code=country_code, source=source, **kwargs)
+                         country_code=country_code, source=source,
+                         fields=fields, **kwargs)
 
     def by_name(self, venue_name, state_code=None, **kwargs):
         """Search for a venue by name.
@@ -332,3 +508,39 @@ class VenueQuery(BaseQuery):
         :return: List of venues found matching search criteria
         """
         return self.find(keyword=venue_name, state_code=state_code, **kwargs)
+
+
+def _check_batching(chunk_size, workers):
+    """Checks the ``chunk_size``/``workers`` arguments of ``by_ids()``"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1, not {}".format(
+            chunk_size))
+    if workers < 1:
+        raise ValueError("workers must be at least 1, not {}".format(
+            workers))
+
+
+def _chunks(items, size):
+    """Splits a ``list`` into lists of up to ``size`` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _last_start(page):
+    """Start of the last event of a page (``None`` if an event has no 
+    start date/time)"""
+    starts = [getattr(e, 'utc_datetime', None) for e in page]
+    if not starts or None in starts:
+        return None
+    return starts[-1]
+
+
+def _split(start, end, count):
+    """Splits the date range *start* - *end* (both included) into up to 
+    ``count`` adjacent windows of whole seconds"""
+    seconds = int((end - start).total_seconds()) + 1
+    count = max(1, min(count, seconds))
+    step = seconds / count
+    bounds = [start + timedelta(seconds=round(i * step))
+              for i in range(count + 1)]
+    return [(bounds[i], bounds[i + 1] - timedelta(seconds=1))
+            for i in range(count)]
@@ -0,0 +1,185 @@
+"""Client-side rate limiting for Discovery API requests"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+#: Fault error code returned when the daily quota is used up
+QUOTA_VIOLATION = 'policies.ratelimit.QuotaViolation'
+#: Fault error code returned when requests/second is exceeded
+SPIKE_ARREST_VIOLATION = 'policies.ratelimit.SpikeArrestViolation'
+
+
+class RateLimiter:
+    """Token bucket limiting requests/second and the daily request budget.
+
+    One limiter can be shared by any number of threads (and clients
+    using the same API key). The rate adapts to what the API accepts:
+    it's halved every time a request is throttled (HTTP 429 or a spike
+    arrest fault) and climbs back towards ``rate`` with each successful
+    request. A quota fault marks the daily budget as spent until it resets.
+
+    The remaining budget is kept in sync with the *Rate-Limit-Available*
+    and *Rate-Limit-Reset* headers sent with API responses.
+
+    .. code-block:: python
+
+        limiter = ticketpy.RateLimiter(rate=5, daily_budget=5000)
+        client = ticketpy.ApiClient("your_api_key", rate_limiter=limiter)
+        ...
+        print(limiter.stats().remaining)
+    """
+    #: Seconds in a quota window when the API doesn't send a reset time
+    window = 86400
+
+    def __init__(self, rate=5, daily_budget=5000, burst=None, min_rate=0.5,
+                 backoff=0.5, increase=0.1, retries=3):
+        """
+        :param rate: Max requests/second (API default: 5)
+        :param daily_budget: Requests allowed per day (API default: 5000).
+            ``None`` to only limit the request rate
+        :param burst: Max requests sent back-to-back (default: ``rate``)
+        :param min_rate: Lowest requests/second to back off to
+        :param backoff: Factor the rate is multiplied by when throttled
+        :param increase: Requests/second added back per successful request
+        :param retries: Times a throttled request is retried before its
+            error is raised
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.min_rate = float(min_rate)
+        self.backoff = backoff
+        self.increase = increase
+        self.retries = retries
+        self.daily_budget = daily_budget
+        self.remaining = daily_budget
+        self.reset_at = time.time() + self.window
+        self.requests = 0
+        self.throttled = 0
+        self.quota_faults = 0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, blocking until one is available.
+
+        :return: ``False`` (without blocking) if the daily budget is
+            spent, otherwise ``True``
+        """
+        wait = self.reserve()
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def reserve(self):
+        """Takes a token without waiting for it, for callers that wait
+        their own way (ex: ``asyncio.sleep()``)
+
+        :return: Seconds to wait before sending the request, or ``None``
+            if the daily budget is spent
+        """
+        with self._lock:
+            self.__roll_window()
+            if self.remaining is not None and self.remaining <= 0:
+                return None
+            self.__refill()
+            # Tokens may go negative: each waiting thread reserves its
+            # slot, so waits queue up instead of all waking at once
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+            self.requests += 1
+            if self.remaining is not None:
+                self.remaining -= 1
+        return wait
+
+    def success(self, headers=None):
+        """Records a successful request, raising the rate back up
+
+        :param headers: Response headers to sync the budget from
+        """
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            if headers:
+                self.__sync(headers)
+
+    def throttle(self, headers=None):
+        """Records a throttled request (HTTP 429/spike arrest), backing off
+
+        :param headers: Response headers to sync the budget from
+        """
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+            self._tokens = min(self._tokens, 0)
+            if headers:
+                self.__sync(headers)
+        log.warning("Request throttled, backing off to "
+                    "{:.2f} requests/second".format(self.rate))
+
+    def exhaust(self, headers=None):
+        """Records a quota fault: no budget left until the window resets
+
+        :param headers: Response headers to read the reset time from
+        """
+        with self._lock:
+            self.quota_faults += 1
+            if headers:
+                self.__sync(headers)
+            self.remaining = 0
+        log.warning("Daily request quota exhausted")
+
+    def stats(self):
+        """Current rate and remaining budget
+
+        :return: ``namedtuple`` of *rate*, *max_rate*, *daily_budget*,
+            *remaining*, *reset_at* (epoch seconds), *requests*,
+            *throttled* and *quota_faults*
+        """
+        with self._lock:
+            self.__roll_window()
+            return RateLimitStats(
+                self.rate, self.max_rate, self.daily_budget, self.remaining,
+                self.reset_at, self.requests, self.throttled,
+                self.quota_faults
+            )
+
+    def __refill(self):
+        """Adds tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+    def __roll_window(self):
+        """Restores the daily budget once its window has passed"""
+        if time.time() >= self.reset_at:
+            self.remaining = self.daily_budget
+            self.reset_at = time.time() + self.window
+
+    def __sync(self, headers):
+        """Updates the budget from *Rate-Limit* response headers"""
+        limit = headers.get('Rate-Limit')
+        available = headers.get('Rate-Limit-Available')
+        reset = headers.get('Rate-Limit-Reset')
+        try:
+            if limit is not None and self.daily_budget is not None:
+                self.daily_budget = int(limit)
+            if reset is not None:
+                # Milliseconds since the epoch
+                self.reset_at = int(reset) / 1000
+            if available is not None and self.remaining is not None:
+                self.remaining = min(self.remaining, int(available))
+        except ValueError:
+            log.debug("Unexpected rate limit headers: {}".format(headers))
+
+
+RateLimitStats = namedtuple('stats', [
+    'rate', 'max_rate', 'daily_budget', 'remaining', 'reset_at',
+    'requests', 'throttled', 'quota_faults'
+])
@@ -0,0 +1,266 @@
+"""Local stand-in for the Discovery API, for offline load tests"""
+import argparse
+import functools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import parse
+from ticketpy.ratelimit import QUOTA_VIOLATION, SPIKE_ARREST_VIOLATION
+from ticketpy.synthetic import Dataset, errors_json, fault_json
+
+log = logging.getLogger(__name__)
+
+#: Fault error code of a missing or unknown API key
+INVALID_API_KEY = 'oauth.v2.InvalidApiKey'
+#: Fault error code of injected server errors
+SERVICE_UNAVAILABLE = 'messaging.adaptors.http.flow.ServiceUnavailable'
+
+
+class StandInServer:
+    """HTTP server answering Discovery API requests from a synthetic
+    ``Dataset``, with injectable latency, errors and rate limits.
+
+    It serves what ``ticketpy`` uses: searches of
+    ``/discovery/v2/{events,venues,attractions,classifications}.json``
+    with *page*/*size* paging and *next* links, by-ID lookups, and 400
+    error and 401/429 fault bodies like the API's. Point a client at it
+    with ``root_url``:
+
+    .. code-block:: python
+
+        from ticketpy.server import StandInServer
+
+        with StandInServer(latency=0.05, jitter=0.02, rate=5) as server:
+            client = ticketpy.ApiClient('any_key', root_url=server.url)
+            events = client.events.harvest()
+            print(server.stats())
+
+    Or run it on its own with ``python -m ticketpy.server --port 8080``.
+    """
+    def __init__(self, dataset=None, host='127.0.0.1', port=0, latency=0.0,
+                 jitter=0.0, error_rate=0.0, rate=None, quota=None,
+                 api_keys=None, seed=None, cache_size=1024):
+        """
+        :param dataset: ``ticketpy.synthetic.Dataset`` to serve (default:
+            ``Dataset()``)
+        :param host: Address to listen on
+        :param port: Port to listen on (default: any free port)
+        :param latency: Seconds to wait before answering each request
+        :param jitter: Max seconds added to or removed from ``latency``,
+            at random
+        :param error_rate: Share (0-1) of requests answered with a 503
+            fault instead
+        :param rate: Max requests/second per API key, over which
+            requests get a 429 spike arrest fault (default: no limit)
+        :param quota: Requests per API key per day, over which requests
+            get a 401 quota fault (default: no limit)
+        :param api_keys: Accepted API keys (default: any key)
+        :param seed: Random seed for jitter and injected errors
+        :param cache_size: Number of encoded responses to keep
+        """
+        self.dataset = dataset or Dataset()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate = rate
+        self.quota = quota
+        self.api_keys = set(api_keys) if api_keys is not None else None
+        self.statuses = Counter()
+        self.reset_at = time.time() + 86400
+        self._random = random.Random(seed)
+        self._used = Counter()
+        self._recent = {}
+        self._lock = threading.Lock()
+        self._encode = functools.lru_cache(maxsize=cache_size)(self.__encode)
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """Root URL to pass to ``ApiClient(root_url=...)``"""
+        host, port = self._httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        """Starts serving in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, daemon=True,
+                name='ticketpy-stand-in')
+            self._thread.start()
+            log.debug("Serving on {}".format(self.url))
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket"""
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def respond(self, path, params):
+        """Status code, headers and body of the response to a request,
+        after injected faults and rate limits (but without latency)
+
+        :param path: Request path
+        :param params: ``dict`` of query parameters
+        :return: Tuple of (status code, ``dict`` of headers, ``bytes``)
+        """
+        params = dict(params)
+        api_key = params.pop('apikey', None)
+        if api_key is None or (self.api_keys is not None and
+                               api_key not in self.api_keys):
+            return self.__fault(401, 'Invalid ApiKey', INVALID_API_KEY)
+
+        with self._lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self._used.clear()
+                self.reset_at = now + 86400
+            if self.rate is not None:
+                recent = self._recent.setdefault(api_key, deque())
+                while recent and recent[0] <= now - 1:
+                    recent.popleft()
+                if len(recent) >= self.rate:
+                    return self.__fault(
+                        429, 'Spike arrest violation. Allowed rate : '
+                             '{}ps'.format(self.rate), SPIKE_ARREST_VIOLATION)
+                recent.append(now)
+            if self.quota is not None and self._used[api_key] >= self.quota:
+                return self.__fault(
+                    401, 'Rate limit quota violation. Quota limit  exceeded. '
+                         'Identifier : {}'.format(api_key), QUOTA_VIOLATION,
+                    self.__quota_headers(api_key))
+            self._used[api_key] += 1
+            failed = self._random.random() < self.error_rate
+            headers = self.__quota_headers(api_key)
+
+        if failed:
+            return self.__fault(503, 'The Service is temporarily '
+                                     'unavailable', SERVICE_UNAVAILABLE)
+        status, body = self._encode(path, tuple(sorted(params.items())))
+        return status, headers, body
+
+    def delay(self):
+        """Seconds to wait before answering a request"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter, self.jitter)
+        return max(self.latency + jitter, 0.0)
+
+    def stats(self):
+        """Request counts
+
+        :return: ``namedtuple`` of (*requests*, *statuses*: ``dict`` of
+            status code to count)
+        """
+        with self._lock:
+            return ServerStats(sum(self.statuses.values()),
+                               dict(self.statuses))
+
+    def __encode(self, path, params):
+        status, body = self.dataset.respond(path, dict(params))
+        return status, json.dumps(body).encode('utf-8')
+
+    def __fault(self, status, faultstring, errorcode, headers=None):
+        body = json.dumps(fault_json(faultstring, errorcode))
+        return status, headers or {}, body.encode('utf-8')
+
+    def __quota_headers(self, api_key):
+        """*Rate-Limit* headers (like the API's) for an API key"""
+        if self.quota is None:
+            return {}
+        return {
+            'Rate-Limit': str(self.quota),
+            'Rate-Limit-Available': str(max(self.quota -
+                                            self._used[api_key], 0)),
+            'Rate-Limit-Over': str(max(self._used[api_key] - self.quota, 0)),
+            'Rate-Limit-Reset': str(int(self.reset_at * 1000))
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answers each GET with ``StandInServer.respond()``"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        stand_in = self.server.stand_in
+        url = parse.urlsplit(self.path)
+        params = {k: v[0] for (k, v) in parse.parse_qs(url.query).items()}
+        try:
+            status, headers, body = stand_in.respond(url.path, params)
+        except Exception:
+            log.exception("Error answering {}".format(self.path))
+            status, headers = 500, {}
+            body = json.dumps(errors_json('DIS1000', 'Internal error',
+                                          url.path, 500)).encode('utf-8')
+        delay = stand_in.delay()
+        if delay:
+            time.sleep(delay)
+        with stand_in._lock:
+            stand_in.statuses[status] += 1
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+ServerStats = namedtuple('stats', ['requests', 'statuses'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve synthetic Discovery API data locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--venues', type=int, default=500)
+    parser.add_argument('--attractions', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Max seconds of random +/- latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of requests answered with a 503')
+    parser.add_argument('--rate', type=float,
+                        help='Max requests/second per API key')
+    parser.add_argument('--quota', type=int,
+                        help='Requests per API key per day')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    dataset = Dataset(events=args.events, venues=args.venues,
+                      attractions=args.attractions)
+    server = StandInServer(dataset, args.host, args.port, args.latency,
+                           args.jitter, args.error_rate, args.rate,
+                           args.quota, seed=args.seed)
+    print("Serving {} events on {}".format(args.events, server.url))
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""Local spatial index of venues (requires *numpy*)"""
+import logging
+import math
+from collections import namedtuple
+from ticketpy.util import earth_radius
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+log = logging.getLogger(__name__)
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2, unit='miles'):
+    """Great circle distance between points, in decimal degrees.
+
+    Any argument can be an array, to get the distances between many
+    points at once (``util.distance()`` measures one pair without
+    *numpy*).
+
+    :param latitude1: Latitude(s) of the first point(s)
+    :param longitude1: Longitude(s) of the first point(s)
+    :param latitude2: Latitude(s) of the second point(s)
+    :param longitude2: Longitude(s) of the second point(s)
+    :param unit: *miles* or *km*
+    :return: Distance(s) in ``unit``
+    """
+    if numpy is None:
+        raise ImportError("haversine requires numpy "
+                          "(pip install ticketpy[frame])")
+    lat1, lon1, lat2, lon2 = (numpy.radians(numpy.asarray(v, dtype=float))
+                              for v in (latitude1, longitude1,
+                                        latitude2, longitude2))
+    a = (numpy.sin((lat2 - lat1) / 2) ** 2 +
+         numpy.cos(lat1) * numpy.cos(lat2) *
+         numpy.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0))) * \
+        _radius(unit)
+
+
+def _radius(unit):
+    """Earth radius in ``unit``"""
+    try:
+        return earth_radius[unit or 'miles']
+    except KeyError:
+        raise ValueError("Unknown distance unit: {} (use 'miles' or "
+                         "'km')".format(unit))
+
+
+class VenueIndex:
+    """Grid index of venue coordinates, answering radius and nearest
+    venue queries locally.
+
+    Venues are bucketed into cells of ``cell_size`` degrees, so a query
+    only measures (all at once, with NumPy) the distance to venues in
+    the cells its radius covers. Venues without coordinates are skipped,
+    and a venue ID is only indexed once.
+
+    Built with ``from_events()``, the index also returns the events held
+    at each venue.
+
+    .. code-block:: python
+
+        index = VenueIndex.from_events(client.events.harvest(
+            state_code='GA'))
+        for venue, distance in index.within(33.7838737, -84.366088,
+                                            radius=3, unit='miles'):
+            print(venue.name, distance)
+    """
+    def __init__(self, venues=(), cell_size=1.0):
+        """
+        :param venues: ``Venue`` objects to index
+        :param cell_size: Grid cell size in degrees
+        """
+        if numpy is None:
+            raise ImportError("VenueIndex requires numpy "
+                              "(pip install ticketpy[frame])")
+        self.cell_size = cell_size
+        self._columns = int(math.ceil(360 / cell_size))
+        self._venues = []
+        self._ids = set()
+        self._events = {}
+        self._latitudes = numpy.empty(0)
+        self._longitudes = numpy.empty(0)
+        self._cells = {}
+        self.add(venues)
+
+    @classmethod
+    def from_events(cls, events, cell_size=1.0):
+        """Indexes the venues of ``events``, keeping track of each venue's
+        events (see ``events_within()``)
+
+        :param events: ``Event`` objects
+        :param cell_size: Grid cell size in degrees
+        """
+        index = cls(cell_size=cell_size)
+        venues = []
+        for event in events:
+            for venue in event.venues or []:
+                index._events.setdefault(venue.id, []).append(event)
+                venues.append(venue)
+        index.add(venues)
+        return index
+
+    def add(self, venues):
+        """Adds venues to the index"""
+        added = []
+        for venue in venues:
+            if venue.id in self._ids:
+                continue
+            try:
+                coords = float(venue.latitude), float(venue.longitude)
+            except (TypeError, ValueError):
+                continue
+            self._ids.add(venue.id)
+            added.append((venue, coords))
+        if not added:
+            return
+
+        start = len(self._venues)
+        self._venues += [venue for (venue, _) in added]
+        self._latitudes = numpy.concatenate(
+            [self._latitudes, [lat for (_, (lat, _)) in added]])
+        self._longitudes = numpy.concatenate(
+            [self._longitudes, [lon for (_, (_, lon)) in added]])
+        cells = {}
+        for i, (_, (lat, lon)) in enumerate(added, start):
+            cells.setdefault(self.__cell(lat, lon), []).append(i)
+        for cell, indexes in cells.items():
+            if cell in self._cells:
+                indexes = numpy.concatenate([self._cells[cell], indexes])
+            self._cells[cell] = numpy.asarray(indexes, dtype=numpy.intp)
+        log.debug("Indexed {} venues in {} cells".format(
+            len(self._venues), len(self._cells)))
+
+    def within(self, latitude, longitude, radius='10', unit='miles'):
+        """Venues within ``radius`` of a point, nearest first. Same
+        ``radius``/``unit`` as ``EventQuery.by_location()``
+
+        :param latitude: Latitude of radius center
+        :param longitude: Longitude of radius center
+        :param radius: Radius to search outside given latitude/longitude
+        :param unit: Unit of radius ('miles' or 'km')
+        :return: ``list`` of ``namedtuple`` (*venue*, *distance*)
+        """
+        latitude, longitude = float(latitude), float(longitude)
+        radius = float(radius)
+        candidates = self.__candidates(latitude, longitude, radius, unit)
+        distances = haversine(latitude, longitude,
+                              self._latitudes[candidates],
+                              self._longitudes[candidates], unit)
+        inside = distances <= radius
+        candidates, distances = candidates[inside], distances[inside]
+        order = numpy.argsort(distances, kind='stable')
+        return [Nearby(self._venues[i], d) for (i, d)
+                in zip(candidates[order].tolist(), distances[order].tolist())]
+
+    def nearest(self, latitude, longitude, count=10, unit='miles'):
+        """The ``count`` venues nearest to a point, nearest first
+
+        :param latitude: Latitude of the point
+        :param longitude: Longitude of the point
+        :param count: Number of venues
+        :param unit: Unit of returned distances ('miles' or 'km')
+        :return: ``list`` of ``namedtuple`` (*venue*, *distance*)
+        """
+        count = min(count, len(self._venues))
+        if count < 1:
+            return []
+        # Widen the search until enough venues are inside it
+        radius = self.cell_size * math.pi / 180 * _radius(unit)
+        half_earth = math.pi * _radius(unit)
+        while True:
+            nearby = self.within(latitude, longitude, radius, unit)
+            if len(nearby) >= count or radius >= half_earth:
+                return nearby[:count]
+            radius *= 2
+
+    def events_within(self, latitude, longitude, radius='10',
+                      unit='miles'):
+        """Events (of an index built with ``from_events()``) at venues
+        within ``radius`` of a point, nearest venue first
+
+        :return: ``list`` of ``Event``
+        """
+        return [event for (venue, _) in
+                self.within(latitude, longitude, radius, unit)
+                for event in self._events.get(venue.id, [])]
+
+    def __candidates(self, latitude, longitude, radius, unit):
+        """Indexes of venues in the cells a search radius overlaps"""
+        lat_delta = math.degrees(radius / _radius(unit))
+        if abs(latitude) + lat_delta >= 90:
+            return numpy.arange(len(self._venues))
+        lon_delta = lat_delta / math.cos(
+            math.radians(abs(latitude) + lat_delta))
+        if lon_delta >= 180:
+            return numpy.arange(len(self._venues))
+
+        lat_cells = range(self.__row(latitude - lat_delta),
+                          self.__row(latitude + lat_delta) + 1)
+        lon_cells = range(self.__column(longitude - lon_delta),
+                          self.__column(longitude + lon_delta) + 1)
+        # Longitude cells wrap around at the antimeridian
+        lon_cells = {c % self._columns for c in lon_cells}
+        found = [self._cells[(row, col)] for row in lat_cells
+                 for col in lon_cells if (row, col) in self._cells]
+        if not found:
+            return numpy.empty(0, dtype=numpy.intp)
+        return numpy.concatenate(found)
+
+    def __row(self, latitude):
+        return int(math.floor((latitude + 90) / self.cell_size))
+
+    def __column(self, longitude):
+        return int(math.floor((longitude + 180) / self.cell_size))
+
+    def __cell(self, latitude, longitude):
+        return (self.__row(latitude),
+                self.__column(longitude) % self._columns)
+
+    def __len__(self):
+        return len(self._venues)
+
+
+Nearby = namedtuple('nearby', ['venue', 'distance'])
@@ -0,0 +1,339 @@
+"""Incremental parsing of API response pages"""
+import codecs
+import json
+import logging
+import re
+from ticketpy import export
+from ticketpy.model import Projection, object_models
+
+log = logging.getLogger(__name__)
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+#: Returned by ``PageParser`` while a value isn't complete yet
+_more = object()
+
+
+class StreamedResponse:
+    """Iterates through the items (``Event``, ``Venue``...) of every
+    result page, parsing each page as it's downloaded.
+
+    Only one item's JSON is held in memory at a time, so memory use stays
+    flat no matter how large the page ``size`` is. Pages are requested
+    when iteration reaches them, and responses aren't cached.
+
+    .. code-block:: python
+
+        for event in client.events.find(state_code='GA', size=200,
+                                        stream=True):
+            print(event.name)
+    """
+    #: Bytes read from the response at a time
+    chunk_size = 65536
+
+    def __init__(self, api_client, url, params, max_pages=None,
+                 fields=None):
+        """
+        :param api_client: ``ApiClient`` to send requests with
+        :param url: URL of the first page
+        :param params: Parameters of the first page
+        :param max_pages: Max number of pages to request (default: all)
+        :param fields: Paths of the only fields to extract from each
+            item, into ``namedtuple`` records instead of models (see
+            ``ticketpy.model.Projection``)
+        """
+        self.api_client = api_client
+        self.url = url
+        self.params = params
+        self.max_pages = max_pages
+        #: ``Projection`` building items (or ``None``)
+        self.projection = Projection(fields) if fields else None
+        #: ``Page`` (without items) of the last page fully read
+        self.page = None
+
+    def export(self, path, format=None, columns=None, batch_size=1000):
+        """Writes every item to an NDJSON, CSV or Parquet/Arrow file 
+        (see ``PagedResponse.export()``)
+
+        :return: Number of rows written
+        """
+        return export.write(self, path, format, columns, batch_size)
+
+    def __iter__(self):
+        url, params = self.url, self.params
+        counter = 0
+        entities = self.api_client._identity_map()
+        while True:
+            counter += 1
+            resp = self.api_client._send(url, params, stream=True)
+            parser = PageParser(resp.iter_content(self.chunk_size))
+            try:
+                yield from self._items(parser, entities)
+            finally:
+                resp.close()
+
+            request = self._next_request(parser, counter)
+            if request is None:
+                return
+            url, params = request
+
+    def _items(self, parsed, entities):
+        """Builds the items of *(key, item JSON)* tuples from a
+        ``PageParser``"""
+        for key, item in parsed:
+            model = object_models.get(key)
+            if model:
+                yield self.api_client._from_json(
+                    item, self.projection or model, entities)
+
+    def _next_request(self, parser, counter):
+        """Sets ``page`` from a fully read page, returning the URL and
+        parameters of the next one (``None`` after the last page)"""
+        self.page = self.api_client._from_json(parser.meta)
+        next_url = self.page.links.get('next')
+        if not next_url or (self.max_pages and counter >= self.max_pages):
+            return None
+        log.debug("Requesting page: {}".format(next_url))
+        return self.api_client._parse_link(next_url)
+
+
+class PageParser:
+    """Incrementally parses a result page from chunks of its body.
+
+    Iterating yields *(key, item)* tuples for each element of the
+    ``_embedded`` lists (ex: *('events', {...})*) as soon as the element
+    has been read. Everything else in the page (*page*, *_links*) is
+    collected in ``meta`` once iteration is done.
+
+    To parse chunks as they arrive instead (ex: from an ``asyncio``
+    stream), iterate over ``feed(chunk)`` for each one, then over
+    ``close()``.
+    """
+    def __init__(self, chunks=()):
+        """
+        :param chunks: Iterable of ``bytes`` making up a UTF-8 JSON page
+        """
+        self.meta = {}
+        self._chunks = chunks
+        self._decode = codecs.getincrementaldecoder('utf-8')().decode
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        # Parsing step to resume from (None once the page is parsed),
+        # the keys of the member and _embedded list being read, and the
+        # last item read
+        self._step = self.__start
+        self._key = None
+        self._list = None
+        self._item = None
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def feed(self, chunk):
+        """Yields the *(key, item)* tuples completed by the next chunk of
+        the body (which is parsed as they're iterated over)
+
+        :param chunk: ``bytes``
+        """
+        self._buf = self._buf[self._pos:] + self._decode(chunk)
+        self._pos = 0
+        return self.__parse()
+
+    def close(self):
+        """Yields the *(key, item)* tuples completed by the end of the
+        body, raising ``ValueError`` if the page is incomplete"""
+        self._buf = self._buf[self._pos:] + self._decode(b'', final=True)
+        self._pos = 0
+        self._eof = True
+        yield from self.__parse()
+        if self._step is not None:
+            raise ValueError("Unexpected end of JSON response")
+
+    def __parse(self):
+        """Runs parsing steps until the page is parsed or more of the
+        body is needed, yielding items as they're read"""
+        while self._step is not None and self._step():
+            if self._item is not None:
+                item, self._item = self._item, None
+                yield item
+
+    # Each step consumes a token and returns True, or returns False
+    # (leaving the buffer as it was) until the token is complete
+
+    def __start(self):
+        if self.__expect('{') is None:
+            return False
+        self._step = self.__first_member
+        return True
+
+    def __first_member(self):
+        char = self.__peek()
+        if char is None:
+            return False
+        if char == '}':
+            self._pos += 1
+            self._step = None
+        else:
+            self._step = self.__member_key
+        return True
+
+    def __member_key(self):
+        key = self.__value()
+        if key is _more:
+            return False
+        self._key = key
+        self._step = self.__member_colon
+        return True
+
+    def __member_colon(self):
+        if self.__expect(':') is None:
+            return False
+        self._step = self.__member
+        return True
+
+    def __member(self):
+        char = self.__peek()
+        if char is None:
+            return False
+        if self._key == '_embedded' and char == '{':
+            self._pos += 1
+            self._step = self.__first_list
+        else:
+            self._step = self.__member_value
+        return True
+
+    def __member_value(self):
+        value = self.__value()
+        if value is _more:
+            return False
+        self.meta[self._key] = value
+        self._step = self.__next_member
+        return True
+
+    def __next_member(self):
+        char = self.__expect(',}')
+        if char is None:
+            return False
+        self._step = self.__member_key if char == ',' else None
+        return True
+
+    def __first_list(self):
+        char = self.__peek()
+        if char is None:
+            return False
+        if char == '}':
+            self._pos += 1
+            self._step = self.__next_member
+        else:
+            self._step = self.__list_key
+        return True
+
+    def __list_key(self):
+        key = self.__value()
+        if key is _more:
+            return False
+        self._list = key
+        self._step = self.__list_colon
+        return True
+
+    def __list_colon(self):
+        if self.__expect(':') is None:
+            return False
+        self._step = self.__list
+        return True
+
+    def __list(self):
+        char = self.__peek()
+        if char is None:
+            return False
+        if char == '[':
+            self._pos += 1
+            self._step = self.__first_item
+        else:
+            self._step = self.__list_value
+        return True
+
+    def __list_value(self):
+        """Non-list value in ``_embedded``"""
+        value = self.__value()
+        if value is _more:
+            return False
+        self.meta.setdefault('_embedded', {})[self._list] = value
+        self._step = self.__next_list
+        return True
+
+    def __first_item(self):
+        char = self.__peek()
+        if char is None:
+            return False
+        if char == ']':
+            self._pos += 1
+            self._step = self.__next_list
+        else:
+            self._step = self.__item
+        return True
+
+    def __item(self):
+        value = self.__value()
+        if value is _more:
+            return False
+        self._item = (self._list, value)
+        self._step = self.__next_item
+        return True
+
+    def __next_item(self):
+        char = self.__expect(',]')
+        if char is None:
+            return False
+        self._step = self.__item if char == ',' else self.__next_list
+        return True
+
+    def __next_list(self):
+        char = self.__expect(',}')
+        if char is None:
+            return False
+        self._step = self.__list_key if char == ',' else self.__next_member
+        return True
+
+    def __peek(self):
+        """Returns the next non-whitespace character (``None`` if the
+        buffer is used up)"""
+        self._pos = _whitespace.match(self._buf, self._pos).end()
+        if self._pos < len(self._buf):
+            return self._buf[self._pos]
+        if self._eof:
+            raise ValueError("Unexpected end of JSON response")
+        return None
+
+    def __expect(self, chars):
+        """Consumes the next character, which should be one of ``chars``
+        (``None`` if the buffer is used up)"""
+        char = self.__peek()
+        if char is None:
+            return None
+        if char not in chars:
+            raise ValueError("Expected one of '{}' at position {}, "
+                             "got '{}'".format(chars, self._pos, char))
+        self._pos += 1
+        return char
+
+    def __value(self):
+        """Decodes the next complete JSON value (``_more`` if it isn't
+        complete yet)"""
+        if self.__peek() is None:
+            return _more
+        try:
+            obj, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            return _more
+        # A number at the end of the buffer may continue in the
+        # next chunk
+        if end == len(self._buf) and not self._eof:
+            return _more
+        self._pos = end
+        return obj
@@ -0,0 +1,406 @@
+"""Synthetic Discovery API data, for offline benchmarks and load tests"""
+import bisect
+import json
+import logging
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from urllib import parse
+import requests
+from ticketpy.util import date_time_format
+
+log = logging.getLogger(__name__)
+
+_status_codes = ('onsale', 'offsale', 'cancelled', 'postponed',
+                 'rescheduled')
+_states = (('Atlanta', 'GA', 33.7490, -84.3880),
+           ('Chicago', 'IL', 41.8781, -87.6298),
+           ('Denver', 'CO', 39.7392, -104.9903),
+           ('Nashville', 'TN', 36.1627, -86.7816),
+           ('Seattle', 'WA', 47.6062, -122.3321))
+
+
+class Dataset:
+    """A reproducible set of synthetic events, venues, attractions and
+    classifications, served the way the Discovery API serves them.
+
+    Events have embedded venues, attractions and full classifications,
+    and are spread evenly (sorted by date) over ``days`` days from
+    ``start``. The classification tree has ``segments`` segments of
+    ``genres`` genres of ``subgenres`` subgenres each.
+
+    .. code-block:: python
+
+        data = Dataset(events=5000, venues=200)
+        status, body = data.respond('/discovery/v2/events.json',
+                                    {'size': '200', 'page': '3'})
+    """
+    def __init__(self, events=1000, venues=100, attractions=200,
+                 segments=5, genres=8, subgenres=6, days=365,
+                 start=datetime(2030, 1, 1), seed=0,
+                 deep_paging_limit=1000):
+        """
+        :param events: Number of events
+        :param venues: Number of venues
+        :param attractions: Number of attractions
+        :param segments: Number of segments
+        :param genres: Genres per segment
+        :param subgenres: Subgenres per genre
+        :param days: Number of days the events are spread over
+        :param start: Date and time of the first event (UTC)
+        :param seed: Random seed, so the same parameters always build
+            the same data
+        :param deep_paging_limit: Max number of results reachable by
+            paging (*size* * (*page* + 1)), or ``None`` for no limit
+        """
+        rng = random.Random(seed)
+        self.deep_paging_limit = deep_paging_limit
+        self.classifications = [
+            classification_json(s, genres, subgenres)
+            for s in range(segments)
+        ]
+        self.venues = [venue_json(i, rng) for i in range(max(venues, 1))]
+        self.attractions = [attraction_json(i, rng, segments, genres,
+                                            subgenres)
+                            for i in range(max(attractions, 1))]
+        step = timedelta(days=days) / max(events, 1)
+        self.events = [
+            event_json(i, start + step * i, rng.choice(self.venues),
+                       rng.choice(self.attractions), rng)
+            for i in range(events)
+        ]
+        self._dates = [e['dates']['start']['dateTime'] for e in self.events]
+        self._by_id = {}
+        for resource in ('events', 'venues', 'attractions'):
+            for obj in getattr(self, resource):
+                self._by_id[(resource, obj['id'])] = obj
+
+    def respond(self, path, params=None):
+        """Status code and JSON body the API would return for a request
+
+        Supports ``/discovery/v2/{events,venues,attractions,
+        classifications}.json`` searches (*page*, *size*, *id*,
+        *venueId*, *attractionId*, *startDateTime*, *endDateTime*) and
+        ``/discovery/v2/{events,venues,attractions}/{id}`` lookups.
+
+        :param path: URL path (or a full URL)
+        :param params: ``dict`` of query parameters
+        :return: Tuple of (status code, body)
+        """
+        params = params or {}
+        path = parse.urlsplit(path).path
+        match = re.match(r'^/discovery/v2/(\w+)(?:\.json|/([^/.]+))$', path)
+        if match is None:
+            return 404, errors_json('DIS1001', 'Resource not found', path,
+                                    404)
+        resource, entity_id = match.groups()
+        if entity_id is not None:
+            obj = self._by_id.get((resource, entity_id))
+            if obj is None:
+                return 404, errors_json(
+                    'DIS1004', 'Resource not found with provided criteria '
+                    '(locale=en-us, id={})'.format(entity_id), path, 404)
+            return 200, obj
+        if resource not in ('events', 'venues', 'attractions',
+                            'classifications'):
+            return 404, errors_json('DIS1001', 'Resource not found', path,
+                                    404)
+
+        try:
+            number = int(params.get('page', 0))
+            size = int(params.get('size', 20))
+        except ValueError:
+            return 400, errors_json('DIS1015', 'Invalid page or size', path)
+        limit = self.deep_paging_limit
+        if limit is not None and size * (number + 1) > limit:
+            return 400, errors_json(
+                'DIS1035', 'API Limits Exceeded: Max paging depth '
+                'exceeded. (page * size) must be less than '
+                '{}'.format(limit), path)
+        items = self.search(resource, params)
+        return 200, page_json(resource, items, number, size, params)
+
+    def search(self, resource, params):
+        """Items of ``resource`` matching search ``params``"""
+        items = getattr(self, resource)
+        if resource == 'events':
+            start = params.get('startDateTime')
+            end = params.get('endDateTime')
+            low = bisect.bisect_left(self._dates, start) if start else 0
+            high = (bisect.bisect_right(self._dates, end) if end
+                    else len(items))
+            items = items[low:high]
+        if params.get('id'):
+            ids = set(params['id'].split(','))
+            items = [i for i in items if i['id'] in ids]
+        for param, get in (('venueId', _venue_ids),
+                           ('attractionId', _attraction_ids)):
+            if params.get(param):
+                ids = set(params[param].split(','))
+                items = [i for i in items if ids.intersection(get(i))]
+        return items
+
+
+class SyntheticSession:
+    """Stands in for ``requests.Session``, answering requests from a
+    ``Dataset`` in-process (no sockets), for benchmarks that should
+    measure ``ticketpy`` rather than the network.
+
+    Encoded bodies are cached, so requesting the same page again costs
+    (almost) nothing.
+
+    .. code-block:: python
+
+        client = ticketpy.ApiClient('key', session=SyntheticSession())
+        events = client.events.find(size=200).all()
+    """
+    def __init__(self, dataset=None):
+        """
+        :param dataset: ``Dataset`` to serve (default: ``Dataset()``)
+        """
+        self.dataset = dataset or Dataset()
+        self.requests = 0
+        self.headers = {}
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None, stream=False, **kwargs):
+        params = {k: v for (k, v) in (params or {}).items()
+                  if k != 'apikey'}
+        key = (url, tuple(sorted(params.items())))
+        with self._lock:
+            self.requests += 1
+            cached = self._bodies.get(key)
+        if cached is None:
+            status, body = self.dataset.respond(url, params)
+            cached = status, json.dumps(body).encode('utf-8')
+            with self._lock:
+                self._bodies[key] = cached
+        resp = requests.Response()
+        resp.status_code, resp._content = cached
+        resp._content_consumed = True
+        resp.headers['Content-Type'] = 'application/json;charset=utf-8'
+        resp.url = url
+        resp.encoding = 'utf-8'
+        return resp
+
+    def close(self):
+        pass
+
+
+def page_json(resource, items, number=0, size=20, params=None):
+    """A result page of ``items``, with *self*/*next* links
+
+    :param resource: Search type (*events*, *venues*...)
+    :param items: Every matching item (the page is sliced from them)
+    :param number: Page number
+    :param size: Page size
+    :param params: Search parameters, repeated in the links
+    """
+    size = max(size, 1)
+    total_pages = -(-len(items) // size)
+    page = {
+        '_links': {'self': {'href': _href(resource, params, number, size)}},
+        'page': {'size': size, 'totalElements': len(items),
+                 'totalPages': total_pages, 'number': number}
+    }
+    page_items = items[number * size:(number + 1) * size]
+    if page_items:
+        page['_embedded'] = {resource: page_items}
+    if number + 1 < total_pages:
+        # Like the API's, next links carry a URI template
+        page['_links']['next'] = {
+            'href': _href(resource, params, number + 1, size) + '{&sort}',
+            'templated': True
+        }
+    return page
+
+
+def event_json(index, start, venue, attraction, rng):
+    """An event at ``venue`` with one ``attraction``
+
+    :param index: Event number (its ID is built from it)
+    :param start: UTC start (``datetime``)
+    :param venue: Venue JSON
+    :param attraction: Attraction JSON
+    :param rng: ``random.Random`` for prices and status
+    """
+    event_id = 'vvG{:011d}'.format(index)
+    local = start - timedelta(hours=5)
+    price = float(rng.randrange(15, 150))
+    return {
+        'name': 'Synthetic Event {}'.format(index),
+        'type': 'event',
+        'id': event_id,
+        'test': False,
+        'url': 'https://www.ticketmaster.com/event/{}'.format(event_id),
+        'locale': 'en-us',
+        'images': [{'ratio': '16_9', 'width': 640, 'height': 360,
+                    'fallback': False,
+                    'url': 'https://s1.ticketm.net/{}.jpg'.format(event_id)}],
+        'sales': {'public': {'startDateTime': '2029-06-01T14:00:00Z',
+                             'startTBD': False}},
+        'dates': {
+            'start': {'localDate': local.strftime('%Y-%m-%d'),
+                      'localTime': local.strftime('%H:%M:%S'),
+                      'dateTime': start.strftime(date_time_format),
+                      'dateTBD': False, 'dateTBA': False,
+                      'timeTBA': False, 'noSpecificTime': False},
+            'timezone': 'America/New_York',
+            'status': {'code': rng.choice(_status_codes)},
+            'spanMultipleDays': False
+        },
+        'classifications': attraction['classifications'],
+        'priceRanges': [{'type': 'standard', 'currency': 'USD',
+                         'min': price, 'max': price * 2.5}],
+        '_links': {
+            'self': {'href': '/discovery/v2/events/{}?locale=en-us'.format(
+                event_id)},
+            'attractions': [{'href': _self_href(attraction)}],
+            'venues': [{'href': _self_href(venue)}]
+        },
+        '_embedded': {'venues': [venue], 'attractions': [attraction]}
+    }
+
+
+def venue_json(index, rng):
+    """A venue in one of a few US cities, with coordinates"""
+    venue_id = 'KovZ{:06d}'.format(index)
+    city, state, latitude, longitude = _states[index % len(_states)]
+    return {
+        'name': 'Synthetic Venue {}'.format(index),
+        'type': 'venue',
+        'id': venue_id,
+        'test': False,
+        'url': 'https://www.ticketmaster.com/venue/{}'.format(venue_id),
+        'locale': 'en-us',
+        'postalCode': '{:05d}'.format(30000 + index % 70000),
+        'timezone': 'America/New_York',
+        'city': {'name': city},
+        'state': {'name': state, 'stateCode': state},
+        'country': {'name': 'United States Of America',
+                    'countryCode': 'US'},
+        'address': {'line1': '{} Main Street'.format(100 + index)},
+        'location': {
+            'longitude': '{:.6f}'.format(longitude + rng.uniform(-0.5, 0.5)),
+            'latitude': '{:.6f}'.format(latitude + rng.uniform(-0.5, 0.5))
+        },
+        'markets': [{'id': str(index % 50)}],
+        'dmas': [{'id': 200 + index % 100}],
+        '_links': {'self': {
+            'href': '/discovery/v2/venues/{}?locale=en-us'.format(venue_id)
+        }}
+    }
+
+
+def attraction_json(index, rng, segments, genres, subgenres):
+    """An attraction with a classification from the synthetic tree"""
+    attraction_id = 'K8vZ{:07d}'.format(index)
+    segment = rng.randrange(segments)
+    genre = rng.randrange(genres)
+    subgenre = rng.randrange(subgenres)
+    return {
+        'name': 'Synthetic Attraction {}'.format(index),
+        'type': 'attraction',
+        'id': attraction_id,
+        'test': False,
+        'url': 'https://www.ticketmaster.com/artist/{}'.format(
+            attraction_id),
+        'locale': 'en-us',
+        'images': [{'ratio': '3_2', 'width': 305, 'height': 203,
+                    'fallback': False, 'url': 'https://s1.ticketm.net/'
+                                              '{}.jpg'.format(attraction_id)}],
+        'classifications': [{
+            'primary': True,
+            'segment': _segment(segment),
+            'genre': _genre(segment, genre),
+            'subGenre': _subgenre(segment, genre, subgenre),
+            'type': {'id': 'KZAyXgnZfZ7v7nI', 'name': 'Undefined'},
+            'subType': {'id': 'KZFzBErXgnZfZ7v7lJ', 'name': 'Undefined'},
+            'family': False
+        }],
+        'upcomingEvents': {'_total': 1},
+        '_links': {'self': {
+            'href': '/discovery/v2/attractions/{}?locale=en-us'.format(
+                attraction_id)
+        }}
+    }
+
+
+def classification_json(segment, genres, subgenres):
+    """A classification whose segment embeds ``genres`` genres of
+    ``subgenres`` subgenres each"""
+    seg = _segment(segment)
+    seg['_embedded'] = {'genres': [
+        dict(_genre(segment, g), _embedded={'subgenres': [
+            _subgenre(segment, g, s) for s in range(subgenres)
+        ]}) for g in range(genres)
+    ]}
+    return {
+        '_links': {'self': {
+            'href': '/discovery/v2/classifications/{}'.format(seg['id'])
+        }},
+        'segment': seg
+    }
+
+
+def errors_json(code, detail, href='', status=400):
+    """Body of a 400/404 response (``ApiClient.__error``)"""
+    return {'errors': [{
+        'code': code,
+        'detail': detail,
+        'status': str(status),
+        '_links': {'about': {'href': '/discovery/v2/errors.html#' + code}}
+    }], '_links': {'self': {'href': href}}}
+
+
+def fault_json(faultstring, errorcode):
+    """Body of a 401/429 response (``ApiClient.__fault``)"""
+    return {'fault': {'faultstring': faultstring,
+                      'detail': {'errorcode': errorcode}}}
+
+
+def _segment(segment):
+    segment_id = 'KZFz{:06d}'.format(segment)
+    return {'id': segment_id,
+            'name': 'Segment {}'.format(segment),
+            '_links': {'self': {'href': '/discovery/v2/classifications/'
+                                        'segments/' + segment_id}}}
+
+
+def _genre(segment, genre):
+    genre_id = 'KnvZ{:03d}{:03d}'.format(segment, genre)
+    return {'id': genre_id,
+            'name': 'Genre {}.{}'.format(segment, genre),
+            '_links': {'self': {'href': '/discovery/v2/classifications/'
+                                        'genres/' + genre_id}}}
+
+
+def _subgenre(segment, genre, subgenre):
+    subgenre_id = 'KZaz{:03d}{:03d}{:03d}'.format(segment, genre, subgenre)
+    return {'id': subgenre_id,
+            'name': 'Subgenre {}.{}.{}'.format(segment, genre, subgenre),
+            '_links': {'self': {'href': '/discovery/v2/classifications/'
+                                        'subgenres/' + subgenre_id}}}
+
+
+def _href(resource, params, number, size):
+    """Search href of one page, with ``params`` repeated"""
+    query = {k: v for (k, v) in (params or {}).items()
+             if k not in ('page', 'size', 'apikey', 'sort')}
+    query.update(page=number, size=size)
+    return '/discovery/v2/{}.json?{}'.format(resource, parse.urlencode(query))
+
+
+def _self_href(obj):
+    return obj['_links']['self']['href']
+
+
+def _venue_ids(event):
+    return [v['id'] for v in event.get('_embedded', {}).get('venues', [])]
+
+
+def _attraction_ids(event):
+    return [a['id'] for a in
+            event.get('_embedded', {}).get('attractions', [])]
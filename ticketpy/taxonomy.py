@@ -0,0 +1,141 @@
+"""In-memory index of the classification taxonomy"""
+import json
+import logging
+from ticketpy.model import Segment
+
+log = logging.getLogger(__name__)
+
+
+class Taxonomy:
+    """Index of segments, genres and subgenres by ID.
+
+    The Discovery API nests its classification taxonomy as
+    segment > genre > subgenre. ``Taxonomy`` loads the whole tree once
+    and maps each ID to its ``Segment``, ``Genre`` or ``SubGenre``, along
+    with each genre's segment and each subgenre's genre, so lookups
+    don't need any requests.
+
+    .. code-block:: python
+
+        taxonomy = Taxonomy.from_api(client)
+        taxonomy.save('taxonomy.json')
+        ...
+        client = ticketpy.ApiClient("your_api_key",
+                                    taxonomy=Taxonomy.load('taxonomy.json'))
+        jazz = client.genre_by_id('KnvZfZ7vAvE')
+    """
+    #: Snapshot file format version
+    version = 1
+
+    def __init__(self, segments=()):
+        """
+        :param segments: ``Segment`` objects (with genres and subgenres)
+        """
+        #: ``dict`` of segment ID to ``Segment``
+        self.segments = {}
+        #: ``dict`` of genre ID to ``Genre``
+        self.genres = {}
+        #: ``dict`` of subgenre ID to ``SubGenre``
+        self.subgenres = {}
+        #: ``dict`` of genre ID to its ``Segment``, and subgenre ID to
+        #: its ``Genre``
+        self.parents = {}
+        for segment in segments:
+            self.add(segment)
+
+    @classmethod
+    def from_api(cls, api_client, size=200):
+        """Loads every classification from the API, page by page
+
+        :param api_client: ``ApiClient`` to request classifications with
+        :param size: Page size to request
+        :return: ``Taxonomy``
+        """
+        return cls.from_classifications(
+            api_client.classifications.find(size=size).all())
+
+    @classmethod
+    def from_classifications(cls, classifications):
+        """Indexes the segments of ``Classification`` objects
+
+        :param classifications: Classifications of the whole taxonomy
+        :return: ``Taxonomy``
+        """
+        taxonomy = cls(cl.segment for cl in classifications if cl.segment)
+        log.debug("Loaded {} segments, {} genres, {} subgenres".format(
+            len(taxonomy.segments), len(taxonomy.genres),
+            len(taxonomy.subgenres)))
+        return taxonomy
+
+    @classmethod
+    def load(cls, path):
+        """Loads a snapshot written by ``save()``
+
+        :param path: Snapshot file path
+        :return: ``Taxonomy``
+        """
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != cls.version:
+            raise ValueError("Unsupported taxonomy snapshot version: "
+                             "{}".format(snapshot.get('version')))
+        return cls(Segment.from_json(seg) for seg in snapshot['segments'])
+
+    def save(self, path):
+        """Writes the taxonomy to a JSON snapshot file
+
+        :param path: Snapshot file path
+        """
+        snapshot = {
+            'version': self.version,
+            'segments': [_segment_json(seg) for seg in self.segments.values()]
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+
+    def add(self, segment):
+        """Indexes a ``Segment`` and its genres/subgenres. IDs already
+        indexed keep their first object."""
+        segment = self.segments.setdefault(segment.id, segment)
+        for genre in segment.genres or []:
+            genre = self.genres.setdefault(genre.id, genre)
+            self.parents.setdefault(genre.id, segment)
+            for subgenre in genre.subgenres or []:
+                self.subgenres.setdefault(subgenre.id, subgenre)
+                self.parents.setdefault(subgenre.id, genre)
+
+    def segment_by_id(self, segment_id):
+        """Return the ``Segment`` with this ID, or ``None``"""
+        return self.segments.get(segment_id)
+
+    def genre_by_id(self, genre_id):
+        """Return the ``Genre`` with this ID, or ``None``"""
+        return self.genres.get(genre_id)
+
+    def subgenre_by_id(self, subgenre_id):
+        """Return the ``SubGenre`` with this ID, or ``None``"""
+        return self.subgenres.get(subgenre_id)
+
+    def parent(self, entity_id):
+        """Return the ``Segment`` of a genre, or the ``Genre`` of a
+        subgenre (``None`` for segments and unknown IDs)"""
+        return self.parents.get(entity_id)
+
+    def __len__(self):
+        return len(self.segments) + len(self.genres) + len(self.subgenres)
+
+
+def _segment_json(segment):
+    """Segment JSON (in the API's structure) for a taxonomy snapshot"""
+    return {
+        'id': segment.id,
+        'name': segment.name,
+        '_embedded': {'genres': [{
+            'id': genre.id,
+            'name': genre.name,
+            '_embedded': {'subgenres': [
+                {'id': subgenre.id, 'name': subgenre.name}
+                for subgenre in genre.subgenres or []
+            ]}
+        } for genre in segment.genres or []]}
+    }
@@ -1,32 +1,22 @@
-from unittest import TestCase, skip
+from unittest import TestCase, skip, skipIf
+import asyncio
 from configparser import ConfigParser
+import csv
+from datetime import datetime, timedelta, timezone
+import importlib.util
+import json
 import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
 import ticketpy
 from ticketpy.client import ApiException
-from math import radians, cos, sin, asin, sqrt
-
-
-def haversine(latlon1, latlon2):
-    """
-    Calculate the great circle distance between two points 
-    on the earth (specified in decimal degrees)
-    
-    Sourced from Stack Overflow:
-    https://stackoverflow.com/questions/4913349/haversine-formula-in-python-bearing-and-distance-between-two-gps-points
-    """
-    # convert decimal degrees to radians
-    lat1 = float(latlon1['latitude'])
-    lon1 = float(latlon1['longitude'])
-    lat2 = float(latlon2['latitude'])
-    lon2 = float(latlon2['longitude'])
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    # haversine formula
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
-    r = 3956  # Radius of earth in kilometers. Use 6371 for kilometers
-    return c * r
+from ticketpy import (aio, decoder, export, frame, metrics, mirror, server,
+                      spatial, synthetic, util)
 
 
 def get_client():
@@ -37,6 +27,1472 @@ def get_client():
     return ticketpy.ApiClient(api_key)
 
 
+def page_json(method='events', items=None, number=0, size=20,
+              total_pages=1, total_elements=None):
+    """Builds a Discovery API result page for offline tests"""
+    items = items or []
+    page = {
+        '_links': {
+            'self': {'href': '/discovery/v2/{}.json?page={}&size={}'.format(
+                method, number, size)}
+        },
+        'page': {
+            'number': number,
+            'size': size,
+            'totalPages': total_pages,
+            'totalElements': (total_elements if total_elements is not None
+                              else len(items))
+        }
+    }
+    if items:
+        page['_embedded'] = {method: items}
+    if number + 1 < total_pages:
+        page['_links']['next'] = {
+            'href': '/discovery/v2/{}.json?page={}&size={}{{&sort}}'.format(
+                method, number + 1, size)
+        }
+    return page
+
+
+def event_json(event_id='vvG1zZfbJQpVWp', venue_id='KovZpaFEZe'):
+    """Builds a Discovery API event for offline tests"""
+    return {
+        'id': event_id,
+        'name': 'Atlanta Funk Fest 2017',
+        'dates': {
+            'start': {'localDate': '2017-05-19', 'localTime': '19:00:00',
+                      'dateTime': '2017-05-19T23:00:00Z'},
+            'status': {'code': 'onsale'}
+        },
+        'classifications': [{
+            'primary': True,
+            'segment': {'id': 'KZFzniwnSyZfZ7v7nJ', 'name': 'Music'},
+            'genre': {'id': 'KnvZfZ7vAvE', 'name': 'Jazz'},
+            'subGenre': {'id': 'KZazBEonSMnZfZ7vkdl', 'name': 'Bebop'},
+            'type': {'id': 'KZAyXgnZfZ7v7nI', 'name': 'Undefined'}
+        }],
+        'priceRanges': [{'type': 'standard', 'currency': 'USD',
+                         'min': 63.0, 'max': 158.0}],
+        '_links': {
+            'self': {'href': '/discovery/v2/events/{}{{?locale}}'.format(
+                event_id)}
+        },
+        '_embedded': {
+            'venues': [{
+                'id': venue_id,
+                'name': 'The Tabernacle',
+                'city': {'name': 'Atlanta'},
+                'state': {'stateCode': 'GA'},
+                'country': {'countryCode': 'US'},
+                'address': {'line1': '152 Luckie Street'},
+                'location': {'latitude': '33.758688',
+                             'longitude': '-84.391449'},
+                '_links': {'self': {'href': '/discovery/v2/venues/{}'.format(
+                    venue_id)}}
+            }]
+        }
+    }
+
+
+def classification_json(segment_id='KZFzniwnSyZfZ7v7nJ', name='Music'):
+    """Builds a Discovery API classification for offline tests"""
+    return {
+        'primary': True,
+        'segment': {
+            'id': segment_id,
+            'name': name,
+            '_embedded': {'genres': [
+                {'id': 'KnvZfZ7vAvE', 'name': 'Jazz',
+                 '_embedded': {'subgenres': [
+                     {'id': 'KZazBEonSMnZfZ7vkdl', 'name': 'Bebop'},
+                     {'id': 'KZazBEonSMnZfZ7vF1n', 'name': 'Big Band'}
+                 ]}},
+                {'id': 'KnvZfZ7vAv6', 'name': 'Country',
+                 '_embedded': {'subgenres': []}}
+            ]}
+        }
+    }
+
+
+class StubSession:
+    """Stands in for ``requests.Session``, replaying canned JSON bodies.
+    
+    A body can also be a *(status_code, body, headers)* tuple.
+    """
+    def __init__(self, *bodies, status_code=200):
+        self.bodies = list(bodies)
+        self.status_code = status_code
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        return self._response(url, params, self.bodies.pop(0))
+
+    def _response(self, url, params, body):
+        self.requests.append((url, dict(params or {})))
+        resp = requests.Response()
+        resp.status_code = self.status_code
+        if isinstance(body, tuple):
+            resp.status_code, body, headers = body
+            resp.headers.update(headers)
+        resp.url = url
+        resp._content = json.dumps(body).encode('utf-8')
+        resp._content_consumed = True
+        return resp
+
+    def close(self):
+        pass
+
+
+class TestSession(TestCase):
+    def test_default_session(self):
+        client = ticketpy.ApiClient('random_key', pool_maxsize=4)
+        adapter = client.session.get_adapter(client.url)
+        self.assertEqual(4, adapter._pool_maxsize)
+
+    def test_keep_alive(self):
+        headers = []
+
+        class HeaderStubSession(StubSession):
+            def get(self, url, params=None, timeout=None, **kwargs):
+                headers.append(kwargs.get('headers'))
+                return super().get(url, params, timeout)
+
+        session = HeaderStubSession(page_json(), page_json())
+        session.headers = {'User-Agent': 'app'}
+        ticketpy.ApiClient('random_key', session=session,
+                           keep_alive=False).events.find()
+        ticketpy.ApiClient('random_key', session=session).events.find()
+        self.assertEqual([{'Connection': 'close'}, None], headers)
+        # The caller's session is left alone
+        self.assertEqual({'User-Agent': 'app'}, session.headers)
+
+    def test_shared_session(self):
+        venue = {'id': 'KovZpaFEZe', 'name': 'The Tabernacle'}
+        session = StubSession(
+            page_json('venues', [venue], size=1, total_pages=2),
+            page_json('venues', [venue], number=1, size=1, total_pages=2),
+            venue
+        )
+        client = ticketpy.ApiClient('random_key', session=session)
+        venues = client.venues.find(keyword='Tabernacle').all()
+        v = client.venues.by_id('KovZpaFEZe')
+        self.assertEqual(2, len(venues))
+        self.assertEqual('KovZpaFEZe', v.id)
+        self.assertEqual(3, len(session.requests))
+        self.assertEqual('1', session.requests[1][1]['page'])
+
+    def test_search_params(self):
+        session = StubSession(page_json('events', []), page_json('events', []))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    coalesce=False)
+        client.events.find(size=5, include_tba=True)
+        client.events.find(keyword='Jazz')
+        self.assertEqual({'apikey': 'random_key'}, dict(client.api_key))
+        self.assertEqual({'apikey': 'random_key', 'size': '5',
+                          'includeTBA': 'yes', 'sort': 'date,asc'},
+                         session.requests[0][1])
+        self.assertNotIn('size', session.requests[1][1])
+        with self.assertRaises(TypeError):
+            client.api_key['size'] = '5'
+
+
+class PagingStubSession(StubSession):
+    """``StubSession`` answering each request with the requested page of
+    ``total_pages`` single-event pages (safe to use from threads)"""
+    def __init__(self, total_pages):
+        super().__init__()
+        self.total_pages = total_pages
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        number = int((params or {}).get('page', 0))
+        event = {'id': str(number), 'name': 'Event'}
+        return self._response(url, params, page_json(
+            'events', [event], number=number, size=1,
+            total_pages=self.total_pages))
+
+
+class TestPrefetch(TestCase):
+    def test_prefetch_order(self):
+        session = PagingStubSession(total_pages=12)
+        client = ticketpy.ApiClient('random_key', session=session)
+        events = client.events.find(size=1).prefetch(4).all()
+        self.assertListEqual([str(i) for i in range(12)],
+                             [e.id for e in events])
+        self.assertEqual(12, len(session.requests))
+
+    def test_prefetch_limit(self):
+        session = PagingStubSession(total_pages=12)
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    prefetch_workers=3)
+        events = client.events.find(size=1).limit(5)
+        self.assertListEqual(['0', '1', '2', '3', '4'],
+                             [e.id for e in events])
+        self.assertEqual(5, len(session.requests))
+
+
+class TestItems(TestCase):
+    def test_max_items(self):
+        session = PagingStubSession(total_pages=12)
+        client = ticketpy.ApiClient('random_key', session=session)
+        items = client.events.find(size=1).items(max_items=3)
+        self.assertListEqual(['0', '1', '2'], [e.id for e in items])
+        self.assertEqual(3, len(session.requests))
+
+    def test_early_stop(self):
+        session = PagingStubSession(total_pages=50)
+        client = ticketpy.ApiClient('random_key', session=session)
+        items = client.events.find(size=1).prefetch(4).items()
+        for event in items:
+            if event.id == '5':
+                break
+        items.close()
+        # The first page, 5 pages read and up to 4 in flight
+        self.assertLessEqual(len(session.requests), 10)
+
+    def test_max_pages(self):
+        session = PagingStubSession(total_pages=12)
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    prefetch_workers=3)
+        items = client.events.find(size=1).items(max_items=10, max_pages=2)
+        self.assertListEqual(['0', '1'], [e.id for e in items])
+        self.assertEqual(2, len(session.requests))
+
+
+def fault_json(error_code, fault_string='Rate limit violation'):
+    """Builds a Discovery API fault body for offline tests"""
+    return {'fault': {'faultstring': fault_string,
+                      'detail': {'errorcode': error_code}}}
+
+
+class TestRateLimiter(TestCase):
+    def test_throttle_retry(self):
+        session = StubSession(
+            (429, fault_json(ticketpy.ratelimit.SPIKE_ARREST_VIOLATION), {}),
+            (200, page_json(), {'Rate-Limit': '5000',
+                                'Rate-Limit-Available': '4321'})
+        )
+        limiter = ticketpy.RateLimiter(rate=100)
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    rate_limiter=limiter)
+        client.events.find()
+        stats = limiter.stats()
+        self.assertEqual(2, len(session.requests))
+        self.assertEqual(1, stats.throttled)
+        self.assertEqual(4321, stats.remaining)
+        self.assertLess(stats.rate, 100)
+
+    def test_quota_fault(self):
+        session = StubSession(
+            (401, fault_json(ticketpy.ratelimit.QUOTA_VIOLATION), {})
+        )
+        limiter = ticketpy.RateLimiter()
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    rate_limiter=limiter)
+        self.assertRaises(ApiException, client.events.find)
+        self.assertEqual(0, limiter.stats().remaining)
+        # Budget is spent, so nothing else should be sent
+        self.assertRaises(ApiException, client.events.find)
+        self.assertEqual(1, len(session.requests))
+
+    def test_rate(self):
+        limiter = ticketpy.RateLimiter(rate=50, burst=1, daily_budget=None)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+        self.assertIsNone(limiter.stats().remaining)
+
+
+class TestResponseCache(TestCase):
+    def test_cached_search(self):
+        session = StubSession(page_json(), page_json('venues'))
+        cache = ticketpy.ResponseCache(ttls={'venues': 0})
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    cache=cache)
+        client.events.find(keyword='Tabernacle', state_code='GA')
+        client.events.find(state_code='GA', keyword='Tabernacle')
+        client.venues.find(keyword='Tabernacle')
+        self.assertEqual(2, len(session.requests))
+        stats = cache.stats()
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(2, stats.misses)
+        self.assertEqual(1, stats.size)
+
+    def test_key(self):
+        url = 'https://app.ticketmaster.com/discovery/v2/events.json'
+        key = ticketpy.ResponseCache.key(url, {'size': 2, 'apikey': 'a'})
+        self.assertEqual(key, ticketpy.ResponseCache.key(url, {'size': '2'}))
+        self.assertEqual('events', key[0])
+
+    def test_lru(self):
+        cache = ticketpy.ResponseCache(maxsize=2)
+        cache.set(('events', 'a', ()), 1)
+        cache.set(('events', 'b', ()), 2)
+        cache.get(('events', 'a', ()))
+        cache.set(('events', 'c', ()), 3)
+        self.assertIsNone(cache.get(('events', 'b', ())))
+        self.assertEqual(1, cache.get(('events', 'a', ())))
+        self.assertEqual(1, cache.stats().evictions)
+
+
+class SlowStubSession(StubSession):
+    """``StubSession`` taking ``delay`` seconds to answer each request 
+    with the same page"""
+    def __init__(self, body, delay=0.2):
+        super().__init__()
+        self.body = body
+        self.delay = delay
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        time.sleep(self.delay)
+        return self._response(url, params, self.body)
+
+
+class TestRequestCoalescer(TestCase):
+    def find_all(self, client, count, **kwargs):
+        barrier = threading.Barrier(count)
+
+        def find():
+            barrier.wait()
+            return client.events.find(**kwargs).page
+
+        with ThreadPoolExecutor(count) as pool:
+            futures = [pool.submit(find) for _ in range(count)]
+            return [f.result() for f in futures]
+
+    def test_collapse(self):
+        session = SlowStubSession(page_json('events', [event_json()]))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    coalesce=True)
+        pages = self.find_all(client, 8, keyword='Funk', size=5)
+        self.assertEqual(1, len(session.requests))
+        self.assertEqual((1, 7, 0), client.coalescer.stats())
+        # Each caller still gets its own objects
+        self.assertIsNot(pages[0][0], pages[1][0])
+
+    def test_disabled(self):
+        session = SlowStubSession(page_json('events', [event_json()]),
+                                  delay=0.05)
+        client = ticketpy.ApiClient('random_key', session=session)
+        self.find_all(client, 3, keyword='Funk')
+        self.assertEqual(3, len(session.requests))
+        self.assertIsNone(client.coalescer)
+
+    def test_error(self):
+        coalescer = ticketpy.cache.RequestCoalescer()
+
+        def fail():
+            raise ApiException('boom')
+
+        self.assertRaises(ApiException, coalescer.do, 'key', fail)
+        self.assertEqual(0, coalescer.stats().in_flight)
+        self.assertEqual('ok', coalescer.do('key', lambda: 'ok'))
+
+    def test_base_exception(self):
+        coalescer = ticketpy.cache.RequestCoalescer()
+
+        class Interrupt(BaseException):
+            pass
+
+        def interrupted():
+            while coalescer.stats().collapsed == 0:
+                time.sleep(0.001)
+            raise Interrupt()
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(coalescer.do, 'key', interrupted)
+            while coalescer.stats().in_flight == 0:
+                time.sleep(0.001)
+            follower = pool.submit(coalescer.do, 'key', interrupted)
+            self.assertRaises(Interrupt, leader.result)
+            # The waiting thread fails too, instead of returning None
+            self.assertRaises(Interrupt, follower.result)
+
+
+class TestStreamedResponse(TestCase):
+    def test_page_parser(self):
+        venues = [{'id': str(i), 'name': 'Caf\u00e9 {}'.format(i),
+                   'location': {'latitude': 33.75 + i}} for i in range(3)]
+        body = json.dumps(page_json('venues', venues, size=3)).encode()
+        # Single-byte chunks split every token and multi-byte character
+        parser = ticketpy.stream.PageParser(body[i:i + 1]
+                                            for i in range(len(body)))
+        items = list(parser)
+        self.assertListEqual([('venues', v) for v in venues], items)
+        self.assertEqual(3, parser.meta['page']['totalElements'])
+        self.assertNotIn('_embedded', parser.meta)
+
+    def test_stream(self):
+        events = [{'id': str(i), 'name': 'Event'} for i in range(4)]
+        session = StubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+        client = ticketpy.ApiClient('random_key', session=session)
+        resp = client.events.find(size=2, stream=True)
+        resp.chunk_size = 16
+        self.assertListEqual(['0', '1', '2', '3'], [e.id for e in resp])
+        self.assertEqual(1, resp.page.number)
+        self.assertNotIn('stream', session.requests[0][1])
+
+
+class TestLazyModels(TestCase):
+    def test_lazy_event(self):
+        eager = ticketpy.model.Event.from_json(event_json())
+        lazy = ticketpy.model.Event.from_json(event_json(), lazy=True)
+        self.assertIs(ticketpy.model._unset, lazy._venues)
+        self.assertEqual(eager.name, lazy.name)
+        self.assertEqual(eager.utc_datetime, lazy.utc_datetime)
+        self.assertEqual(eager.links, lazy.links)
+        self.assertEqual(eager.price_ranges, lazy.price_ranges)
+        self.assertIn('Atlanta Funk Fest 2017', str(lazy))
+        self.assertEqual(str(eager.venues[0]), str(lazy.venues[0]))
+        self.assertEqual(eager.venues[0].links, lazy.venues[0].links)
+        ec = lazy.classifications[0]
+        self.assertEqual('Bebop', ec.subgenre.name)
+        self.assertEqual('Music', ec.segment.name)
+
+    def test_lazy_client(self):
+        session = StubSession(page_json('events', [event_json()]))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    lazy=True)
+        event = client.events.find().one()[0]
+        self.assertIs(ticketpy.model._unset, event._classifications)
+        self.assertEqual('Jazz', event.classifications[0].genre.name)
+
+
+class TestCompactModels(TestCase):
+    def test_slots(self):
+        event = ticketpy.model.Event.from_json(event_json())
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertFalse(hasattr(event.venues[0], '__dict__'))
+        self.assertRaises(AttributeError, setattr, event, 'foo', 'bar')
+
+    def test_drop_json(self):
+        session = StubSession(page_json('events', [event_json()]))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    keep_raw_json=False)
+        pg = client.events.find().page
+        event = pg[0]
+        self.assertIsNone(pg.json)
+        self.assertIsNone(event.json)
+        self.assertIsNone(event.venues[0].json)
+        self.assertIsNone(event.classifications[0].genre.json)
+        self.assertIn('Atlanta Funk Fest 2017', str(event))
+        self.assertEqual('The Tabernacle at 152 Luckie Street in Atlanta GA',
+                         str(event.venues[0]))
+        self.assertEqual('Page 0/1, Size: 20, Total elements: 1', str(pg))
+
+
+class DateStubSession(StubSession):
+    """``StubSession`` answering event searches from ``count`` events, 
+    one every ``interval`` from ``start``, like the API: filtered by 
+    date range (and public onsale date) or IDs, and refusing pages past 
+    ``limit`` results"""
+    ts_format = '%Y-%m-%dT%H:%M:%SZ'
+
+    def __init__(self, count, interval=timedelta(hours=1), limit=1000,
+                 start=datetime(2017, 1, 1)):
+        super().__init__()
+        self.events = []
+        self.limit = limit
+        for i in range(count):
+            self.add_event(start + i * interval, start - timedelta(days=30))
+
+    def add_event(self, date, onsale):
+        """Adds an event starting at ``date``, on sale from ``onsale``"""
+        event = event_json('e{}'.format(len(self.events)))
+        event['dates']['start']['dateTime'] = date.strftime(self.ts_format)
+        event['sales'] = {'public': {
+            'startDateTime': onsale.strftime(self.ts_format)}}
+        self.events.append((date, onsale, event))
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        if 'id' in params:
+            ids = params['id'].split(',')
+            return self._response(url, params, page_json('events', [
+                event for (_, _, event) in self.events if event['id'] in ids
+            ], size=int(params['size'])))
+        start = datetime.strptime(params['startDateTime'], self.ts_format)
+        end = datetime.strptime(params['endDateTime'], self.ts_format)
+        onsale_start = datetime.min
+        if 'onsaleStartDateTime' in params:
+            onsale_start = datetime.strptime(params['onsaleStartDateTime'],
+                                             self.ts_format)
+        number = int(params.get('page', 0))
+        size = int(params['size'])
+        if (number + 1) * size > self.limit:
+            return self._response(url, params, (400, {'errors': [{
+                'code': 'DIS1035', 'detail': 'Result window is too large'
+            }]}, {}))
+        events = [event for (date, onsale, event) in self.events
+                  if start <= date <= end and onsale >= onsale_start]
+        total_pages = -(-len(events) // size)
+        page = page_json('events', events[number * size:(number + 1) * size],
+                         number=number, size=size, total_pages=total_pages,
+                         total_elements=len(events))
+        if 'next' in page['_links']:
+            page['_links']['next']['href'] += ''.join(
+                '&{}={}'.format(k, v) for (k, v) in params.items()
+                if k.endswith('DateTime'))
+        return self._response(url, params, page)
+
+
+class TestHarvest(TestCase):
+    def test_harvest(self):
+        session = DateStubSession(95, limit=10)
+        client = ticketpy.ApiClient('random_key', session=session)
+        events = client.events.harvest('2017-01-01T00:00:00Z',
+                                       '2017-01-05T00:00:00Z',
+                                       size=5, max_results=10)
+        self.assertListEqual(['e{}'.format(i) for i in range(95)],
+                             [e.id for e in events])
+
+    def test_split_reuses_first_page(self):
+        session = DateStubSession(95, limit=10)
+        client = ticketpy.ApiClient('random_key', session=session)
+        client.events.harvest('2017-01-01T00:00:00Z',
+                              '2017-01-05T00:00:00Z', size=5, max_results=10)
+        searches = [(p['startDateTime'], p.get('page', 0))
+                    for _, p in session.requests]
+        self.assertEqual(len(set(searches)), len(searches))
+
+    def test_single_window(self):
+        session = DateStubSession(8)
+        client = ticketpy.ApiClient('random_key', session=session)
+        events = client.events.harvest(datetime(2017, 1, 1),
+                                       datetime(2017, 1, 2), size=5)
+        self.assertEqual(8, len(events))
+        self.assertEqual(2, len(session.requests))
+
+    def test_aware_date_times(self):
+        session = DateStubSession(8)
+        client = ticketpy.ApiClient('random_key', session=session)
+        est = timezone(timedelta(hours=-5))
+        client.events.harvest(datetime(2016, 12, 31, 19, tzinfo=est),
+                              datetime(2017, 1, 1, 19, tzinfo=est), size=5)
+        url, params = session.requests[0]
+        self.assertEqual('2017-01-01T00:00:00Z', params['startDateTime'])
+        self.assertEqual('2017-01-02T00:00:00Z', params['endDateTime'])
+
+
+class TestIdentityMap(TestCase):
+    def test_shared_venue(self):
+        events = [event_json('e1'), event_json('e2'), event_json('e3', 'v2')]
+        session = StubSession(page_json('events', events[:2], size=2,
+                                        total_pages=2),
+                              page_json('events', events[2:], number=1,
+                                        size=2, total_pages=2))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    identity_map='response')
+        resp = client.events.find()
+        e1, e2, e3 = resp.all()
+        self.assertIs(e1.venues[0], e2.venues[0])
+        self.assertIsNot(e1.venues[0], e3.venues[0])
+        self.assertIs(e1.classifications[0].genre,
+                      e3.classifications[0].genre)
+        # 2 venues + the segment, genre and subgenre
+        self.assertEqual(5, resp.entities.misses)
+        self.assertEqual(7, resp.entities.hits)
+
+    def test_shared_attraction_classifications(self):
+        attractions = [{'id': 'a{}'.format(i), 'name': 'Attraction',
+                        'classifications': [classification_json()]}
+                       for i in range(2)]
+        for lazy in (False, True):
+            session = StubSession(page_json('attractions', attractions))
+            client = ticketpy.ApiClient('random_key', session=session,
+                                        identity_map='response', lazy=lazy)
+            a1, a2 = client.attractions.find().all()
+            self.assertIs(a1.classifications[0].segment,
+                          a2.classifications[0].segment, lazy)
+
+    def test_scopes(self):
+        def venue(client):
+            return client.events.find().page[0].venues[0]
+
+        session = StubSession(*[page_json('events', [event_json()])] * 4)
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    identity_map='client')
+        self.assertIs(venue(client), venue(client))
+        client.identity_map = None
+        self.assertIsNot(venue(client), venue(client))
+
+
+class TestSynthetic(TestCase):
+    def setUp(self):
+        self.data = synthetic.Dataset(events=450, venues=10,
+                                      attractions=20, deep_paging_limit=400)
+        self.session = synthetic.SyntheticSession(self.data)
+        self.client = ticketpy.ApiClient('random_key', session=self.session)
+
+    def test_paging(self):
+        events = self.client.events.find(size=100).limit(4)
+        self.assertEqual(400, len(events))
+        self.assertEqual(len({e.id for e in events}), len(events))
+        self.assertEqual('vvG00000000399', events[-1].id)
+        self.assertTrue(events[0].venues[0].latitude)
+        self.assertTrue(events[0].classifications[0].subgenre.name)
+
+    def test_errors(self):
+        with self.assertRaises(ApiException) as cm:
+            self.client.events.find(size=100).all()
+        self.assertEqual('DIS1035', cm.exception.args[1][0].code)
+        with self.assertRaises(ApiException):
+            self.client.venues.by_id('missing')
+
+    def test_search(self):
+        venue = self.data.venues[0]['id']
+        events = self.client.events.find(venue_id=venue, size=100).all()
+        self.assertTrue(events)
+        self.assertTrue(all(e.venues[0].id == venue for e in events))
+        segments = self.client.classifications.find().all()
+        self.assertEqual(5, len(segments))
+        self.assertEqual(8, len(segments[0].segment.genres))
+
+
+class TestStandInServer(TestCase):
+    def setUp(self):
+        self.data = synthetic.Dataset(events=250, venues=10, attractions=20)
+
+    def test_paging(self):
+        with server.StandInServer(self.data) as stand_in:
+            client = ticketpy.ApiClient('random_key',
+                                        root_url=stand_in.url)
+            events = client.events.find(size=100).all()
+            venue = client.venues.by_id(self.data.venues[0]['id'])
+            stats = stand_in.stats()
+        self.assertEqual(250, len(events))
+        self.assertEqual(self.data.venues[0]['name'], venue.name)
+        self.assertEqual({200: 4}, stats.statuses)
+
+    def test_faults(self):
+        stand_in = server.StandInServer(self.data, rate=2, quota=3,
+                                        api_keys=['random_key'])
+        self.addCleanup(stand_in.stop)
+        path = '/discovery/v2/venues.json'
+        key = {'apikey': 'random_key'}
+        self.assertEqual(401, stand_in.respond(path, {'apikey': 'x'})[0])
+        self.assertEqual([200, 200, 429], [stand_in.respond(path, key)[0]
+                                           for _ in range(3)])
+        stand_in.rate = None
+        status, headers, _ = stand_in.respond(path, key)
+        self.assertEqual((200, '0'),
+                         (status, headers['Rate-Limit-Available']))
+        status, _, body = stand_in.respond(path, key)
+        self.assertEqual(401, status)
+        self.assertEqual(ticketpy.ratelimit.QUOTA_VIOLATION,
+                         json.loads(body)['fault']['detail']['errorcode'])
+
+    def test_errors(self):
+        with server.StandInServer(self.data, error_rate=1.0) as stand_in:
+            client = ticketpy.ApiClient('random_key',
+                                        root_url=stand_in.url)
+            with self.assertRaises(ApiException) as cm:
+                client.events.find()
+        self.assertEqual(503, cm.exception.args[0])
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        events = [event_json('e{}'.format(i)) for i in range(3)]
+        self.session = StubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2),
+            (400, {'errors': [{'code': 'DIS1004', 'detail': 'Not found',
+                               '_links': {'about': {'href': '/errors'}}}]},
+             {})
+        )
+        self.metrics = ticketpy.Metrics()
+        self.records = []
+        self.pages = []
+        self.metrics.on_request.append(self.records.append)
+        self.metrics.on_response.append(
+            lambda method, pages: self.pages.append((method, pages)))
+        self.client = ticketpy.ApiClient('random_key', session=self.session,
+                                         metrics=self.metrics)
+
+    def test_report_pending(self):
+        record = self.metrics.start('https://app.ticketmaster.com'
+                                    '/discovery/v2/events.json')
+        self.assertGreaterEqual(record.elapsed(), 0)
+        self.assertIsNone(metrics.RequestRecord().elapsed())
+        self.metrics.received(record, 200, 10)
+        self.metrics.finish(record, {})
+        self.assertEqual([], self.records)
+        self.metrics.report_pending()
+        self.assertEqual([record], self.records)
+        self.assertIsNone(record.build)
+
+    def test_records(self):
+        self.assertEqual(3, len(self.client.events.find().all()))
+        with self.assertRaises(ApiException):
+            self.client.venues.by_id('missing')
+        self.assertEqual(['events', 'events', 'venues'],
+                         [r.method for r in self.records])
+        page, _, error = self.records
+        self.assertEqual(200, page.status)
+        self.assertGreater(page.bytes, 0)
+        self.assertIsNotNone(page.decode)
+        self.assertIsNotNone(page.build)
+        self.assertIsInstance(error.error, ApiException)
+        self.assertIsNone(error.build)
+        self.assertEqual([('events', 2)], self.pages)
+
+    def test_unbuilt_response(self):
+        url = '{}/events'.format(self.client.url)
+        # The thread's last response is never built into models
+        with ThreadPoolExecutor(1) as pool:
+            pool.submit(self.client._request, url,
+                        self.client.api_key).result()
+        self.assertEqual([], self.records)
+        self.client.close()
+        self.assertEqual(1, len(self.records))
+        self.assertIsNone(self.records[0].build)
+        self.client.close()
+        self.assertEqual(1, len(self.records))
+
+    def test_exposition(self):
+        list(self.client.events.find().items(max_items=1))
+        text = self.metrics.exposition()
+        self.assertIn('ticketpy_requests_total{method="events",status="200"} '
+                      '1', text)
+        self.assertIn('ticketpy_response_pages_bucket{method="events",'
+                      'le="1.0"} 1', text)
+        self.assertIn('ticketpy_build_seconds_count{method="events"} 1',
+                      text)
+        text = self.metrics.exposition(openmetrics=True)
+        self.assertIn('# TYPE ticketpy_requests counter', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+
+class TestProjection(TestCase):
+    def test_find(self):
+        events = [event_json('e{}'.format(i), 'v{}'.format(i))
+                  for i in range(3)]
+        session = StubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+        client = ticketpy.ApiClient('random_key', session=session)
+        resp = client.events.find(size=2, fields=[
+            'id', 'dates.start.dateTime', '_embedded.venues.0.id'])
+        records = resp.all()
+        self.assertEqual(('e0', '2017-05-19T23:00:00Z', 'v0'), records[0])
+        self.assertEqual('v2', records[2].embedded_venues_0_id)
+        self.assertIsNone(resp.page.json)
+        self.assertEqual(3, len(records))
+        self.assertNotIn('fields', session.requests[0][1])
+
+    def test_missing_fields(self):
+        projection = ticketpy.model.Projection({'city': 'city.name',
+                                                'venue': 'venues.3.id'})
+        record = projection.from_json({'city': None, 'venues': []})
+        self.assertEqual((None, None), record)
+        with self.assertRaises(ValueError):
+            ticketpy.model.Projection([])
+
+    def test_invalid_names(self):
+        for fields in (['id', '_id'], ['0.id'], {'class': 'id'}):
+            self.assertRaises(ValueError, ticketpy.model.Projection, fields)
+        record = ticketpy.model.Projection({'first_id': '0.id'}).from_json(
+            [{'id': 'v1'}])
+        self.assertEqual('v1', record.first_id)
+
+    def test_stream(self):
+        venues = [{'id': 'v{}'.format(i), 'name': 'Venue'} for i in range(2)]
+        session = StubSession(page_json('venues', venues, size=2))
+        client = ticketpy.ApiClient('random_key', session=session)
+        records = list(client.venues.find(stream=True,
+                                          fields={'venue': 'id'}))
+        self.assertEqual([('v0',), ('v1',)], records)
+        self.assertEqual('v1', records[1].venue)
+
+
+class TestDecoder(TestCase):
+    def test_client_decoder(self):
+        bodies = []
+
+        def decode(body):
+            bodies.append(body)
+            return json.loads(body)
+
+        session = StubSession(page_json('events', [event_json()]))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    json_decoder=decode)
+        self.assertEqual(1, len(client.events.find().one()))
+        self.assertIsInstance(bodies[0], bytes)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            decoder.get('yaml')
+        for name, (_, module) in decoder.decoders.items():
+            if module is None:
+                with self.assertRaises(ImportError):
+                    decoder.get(name)
+                continue
+            decode = decoder.get(name)
+            self.assertEqual({'a': [1]}, decode(b'{"a": [1]}'))
+            with self.assertRaises(ValueError):
+                decode(b'{"a":')
+
+    def test_fault(self):
+        session = StubSession((401, {'fault': {
+            'faultstring': 'Invalid ApiKey',
+            'detail': {'errorcode': 'oauth.v2.InvalidApiKey'}}}, {}))
+        client = ticketpy.ApiClient('random_key', session=session,
+                                    json_decoder='json')
+        with self.assertRaises(ApiException) as cm:
+            client.events.find()
+        self.assertEqual('Invalid ApiKey', cm.exception.args[1])
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        events = [event_json('e{}'.format(i)) for i in range(5)]
+        self.session = StubSession(
+            page_json('events', events[:3], size=3, total_pages=2),
+            page_json('events', events[3:], number=1, size=3, total_pages=2)
+        )
+        self.client = ticketpy.ApiClient('random_key', session=self.session)
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def test_ndjson(self):
+        path = os.path.join(self.dir.name, 'events.ndjson')
+        count = self.client.events.export(path, batch_size=2)
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(5, count)
+        self.assertEqual(['e0', 'e1', 'e2', 'e3', 'e4'],
+                         [r['id'] for r in rows])
+        self.assertEqual('2017-05-19T23:00:00Z', rows[0]['utc_datetime'])
+        self.assertEqual(33.758688, rows[0]['latitude'])
+        self.assertEqual('Bebop', rows[0]['subgenre'])
+        self.assertEqual(63.0, rows[0]['price_min'])
+
+    def test_csv_columns(self):
+        path = os.path.join(self.dir.name, 'events.csv')
+        resp = self.client.events.find()
+        resp.export(path, columns=['venue_id', 'id'], max_items=4)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(['venue_id,id', 'KovZpaFEZe,e0'], lines[:2])
+        self.assertEqual(5, len(lines))
+        self.assertRaises(ValueError, export.write, resp.items(), path,
+                          columns=['foo'])
+
+    def test_records(self):
+        path = os.path.join(self.dir.name, 'events.csv')
+        count = self.client.events.export(path, fields={
+            'id': 'id', 'venue': '_embedded.venues.0.name',
+            'status': 'dates.status', 'url': 'url'})
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(5, count)
+        self.assertEqual({'id': 'e0', 'venue': 'The Tabernacle',
+                          'status': '{"code": "onsale"}', 'url': ''},
+                         rows[0])
+
+    @skipIf(importlib.util.find_spec('pyarrow') is None,
+            "pyarrow isn't installed")
+    def test_parquet_records(self):
+        path = os.path.join(self.dir.name, 'events.parquet')
+        self.client.events.export(path, batch_size=2, fields=[
+            'id', 'priceRanges.0.min', 'url'])
+        table = export.pyarrow.parquet.read_table(path)
+        self.assertEqual(['id', 'priceRanges_0_min', 'url'],
+                         table.column_names)
+        self.assertEqual([63.0] * 5, table['priceRanges_0_min'].to_pylist())
+
+    @skipIf(importlib.util.find_spec('pyarrow') is None,
+            "pyarrow isn't installed")
+    def test_record_types(self):
+        fields = ['id', 'priceRanges.0.min', 'priceRanges.0.currency']
+        for format in ('parquet', 'arrow'):
+            path = os.path.join(self.dir.name, 'prices.' + format)
+            events = [event_json('e{}'.format(i)) for i in range(5)]
+            for i, event in enumerate(events):
+                event['priceRanges'][0]['min'] = 40 + i
+                event['priceRanges'][0]['currency'] = None
+            self.session.bodies = [page_json('events', events)]
+            self.client.events.export(path, batch_size=2, fields=fields)
+            table = self.read_table(path)
+            self.assertEqual('int64', str(table.schema[1].type))
+
+            # Widened when a later batch has floats (or values for nulls)
+            events[3]['priceRanges'][0]['min'] = 43.5
+            events[4]['priceRanges'][0]['currency'] = 'USD'
+            self.session.bodies = [page_json('events', events)]
+            self.client.events.export(path, batch_size=2, fields=fields)
+            table = self.read_table(path)
+            self.assertEqual(['double', 'string'],
+                             [str(f.type) for f in table.schema][1:])
+            self.assertEqual([40.0, 41.0, 42.0, 43.5, 44.0],
+                             table['priceRanges_0_min'].to_pylist())
+            self.assertEqual([None] * 4 + ['USD'],
+                             table['priceRanges_0_currency'].to_pylist())
+            self.assertEqual(['prices.' + format],
+                             [f for f in os.listdir(self.dir.name)
+                              if f.startswith('prices.' + format)])
+
+    def read_table(self, path):
+        """``pyarrow.Table`` of an exported Parquet/Arrow file"""
+        if path.endswith('.parquet'):
+            return export.pyarrow.parquet.read_table(path)
+        with export.pyarrow.OSFile(path) as f:
+            return export.pyarrow.ipc.open_file(f).read_all()
+
+    @skipIf(importlib.util.find_spec('pyarrow') is None,
+            "pyarrow isn't installed")
+    def test_parquet(self):
+        path = os.path.join(self.dir.name, 'events.parquet')
+        self.client.events.export(path, columns=['id', 'utc_datetime'],
+                                  batch_size=2)
+        table = export.pyarrow.parquet.read_table(path)
+        self.assertEqual(['id', 'utc_datetime'], table.column_names)
+        self.assertEqual(5, table.num_rows)
+
+
+@skipIf(frame.numpy is None, "numpy isn't installed")
+class TestEventFrame(TestCase):
+    def setUp(self):
+        events = []
+        for i, (status, price) in enumerate([('onsale', 40.0),
+                                             ('offsale', 20.0),
+                                             ('onsale', 10.0),
+                                             ('cancelled', None)]):
+            event = event_json('e{}'.format(i))
+            event['dates']['status']['code'] = status
+            event['dates']['start']['dateTime'] = \
+                '2017-0{}-01T20:00:00Z'.format(i + 1)
+            if price is None:
+                del event['priceRanges']
+            else:
+                event['priceRanges'][0]['min'] = price
+            events.append(event)
+        session = StubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+        client = ticketpy.ApiClient('random_key', session=session)
+        self.frame = frame.EventFrame.from_pages(client.events.find())
+
+    def test_columns(self):
+        f = self.frame
+        self.assertEqual(4, len(f))
+        self.assertEqual('datetime64[s]', str(f.start.dtype))
+        self.assertTrue(f.missing('price_min')[3])
+        self.assertEqual(33.758688, f.latitude[0])
+        self.assertEqual(['onsale', 'offsale', 'cancelled'],
+                         f.categories['status'])
+        self.assertEqual('Jazz', f.labels('genre')[0])
+
+    def test_filter_sort(self):
+        f = self.frame
+        mask = (f.price_min < 35) & f.isin('status', ['onsale', 'offsale'])
+        self.assertEqual(['e1', 'e2'], [e.id for e in f[mask]])
+        self.assertEqual(['e2', 'e1', 'e0', 'e3'],
+                         list(f.sort('price_min').id))
+        self.assertEqual(['e3', 'e2', 'e1', 'e0'],
+                         list(f.sort('start', descending=True).id))
+        self.assertEqual(['e3', 'e1', 'e0', 'e2'],
+                         list(f.sort('status').id))
+        self.assertIsInstance(f[0], ticketpy.model.Event)
+
+    def test_groupby(self):
+        groups = self.frame.groupby('status')
+        self.assertEqual(['e0', 'e2'],
+                         [e.id for e in groups['onsale'].events()])
+        self.assertEqual(1, len(groups['cancelled']))
+
+
+@skipIf(spatial.numpy is None, "numpy isn't installed")
+class TestVenueIndex(TestCase):
+    def setUp(self):
+        def venue(venue_id, latitude, longitude):
+            return ticketpy.model.Venue(venue_id=venue_id, latitude=latitude,
+                                        longitude=longitude)
+
+        self.venues = [
+            venue('tabernacle', '33.758688', '-84.391449'),
+            venue('fox', '33.772549', '-84.385673'),
+            venue('masquerade', '33.755440', '-84.395660'),
+            venue('savannah', '32.080898', '-81.091203'),
+            venue('fiji', '-17.7134', '179.9'),
+            venue('samoa', '-17.7134', '-179.9'),
+            venue('unknown', None, None)
+        ]
+        self.index = spatial.VenueIndex(self.venues, cell_size=0.5)
+
+    def test_haversine(self):
+        self.assertAlmostEqual(
+            223.6, spatial.haversine(33.758688, -84.391449,
+                                     32.080898, -81.091203), 1)
+        distances = spatial.haversine(33.758688, -84.391449,
+                                      [33.758688, 32.080898],
+                                      [-84.391449, -81.091203], unit='km')
+        self.assertEqual(0, distances[0])
+        self.assertAlmostEqual(360.1, distances[1], 1)
+
+    def test_within(self):
+        self.assertEqual(6, len(self.index))
+        nearby = self.index.within('33.7838737', '-84.366088', radius=3)
+        self.assertEqual(['fox', 'tabernacle', 'masquerade'],
+                         [v.venue.id for v in nearby])
+        nearby = self.index.within(-17.7134, 179.95, radius=20, unit='km')
+        self.assertEqual({'fiji', 'samoa'}, {v.venue.id for v in nearby})
+        self.assertRaises(ValueError, self.index.within, 0, 0, 1, 'feet')
+
+    def test_nearest(self):
+        nearest = self.index.nearest(32.0, -81.0, count=2)
+        self.assertEqual(['savannah', 'tabernacle'],
+                         [v.venue.id for v in nearest])
+        self.assertEqual(6, len(self.index.nearest(0, 0, count=50)))
+
+    def test_events_within(self):
+        events = [ticketpy.model.Event.from_json(event_json(i))
+                  for i in ('e1', 'e2')]
+        index = spatial.VenueIndex.from_events(events)
+        self.assertEqual(['e1', 'e2'], [e.id for e in index.events_within(
+            33.7838737, -84.366088, radius=3)])
+
+
+class TestUtil(TestCase):
+    def test_date_time(self):
+        est = timezone(timedelta(hours=-5))
+        self.assertEqual(datetime(2017, 1, 1, 0, 0, 0),
+                         util.date_time(datetime(2016, 12, 31, 19, 0, 0,
+                                                 123, tzinfo=est)))
+        self.assertEqual('2017-01-01T00:00:00Z',
+                         util.timestamp('2017-01-01T00:00:00Z'))
+
+    def test_distance(self):
+        self.assertAlmostEqual(223.6, util.distance(
+            33.758688, -84.391449, 32.080898, -81.091203,
+            util.earth_radius['miles']), 1)
+        self.assertIsNone(util.distance(None, 1, 2, 3, 3956.0))
+        self.assertIsNone(util.to_float('n/a'))
+
+    def test_haversine_without_numpy(self):
+        numpy, spatial.numpy = spatial.numpy, None
+        try:
+            self.assertRaises(ImportError, spatial.haversine, 0, 0, 1, 1)
+        finally:
+            spatial.numpy = numpy
+
+
+class TestMirror(TestCase):
+    def setUp(self):
+        self.session = DateStubSession(48)
+        self.client = ticketpy.ApiClient('random_key', session=self.session)
+        self.mirror = mirror.Mirror()
+        self.addCleanup(self.mirror.close)
+        self.stats = self.mirror.sync(self.client, '2017-01-01T00:00:00Z',
+                                      '2017-01-02T00:00:00Z')
+
+    def test_find_events(self):
+        self.assertEqual((25, 25, 0, 0), self.stats)
+        pg = self.mirror.find_events(start_date_time='2017-01-01T12:00:00Z',
+                                     sort='date,desc', size=10, page=1)
+        self.assertEqual((13, 2), (pg.total_elements, pg.total_pages))
+        self.assertEqual(['e14', 'e13', 'e12'], [e.id for e in pg])
+        self.assertEqual('The Tabernacle', pg[0].venues[0].name)
+        self.assertEqual(25, self.mirror.find_events(
+            classificationName='jazz', state_code='GA',
+            latlong='33.7838737,-84.366088', radius=3).total_elements)
+        self.assertEqual(0, self.mirror.find_events(
+            latlong='32.080898,-81.091203', radius=10,
+            unit='km').total_elements)
+        self.assertRaises(ValueError, self.mirror.find_events,
+                          client_visibility='x')
+
+    def test_find_events_json_filters(self):
+        event = event_json('e100', 'v100')
+        venue = event['_embedded']['venues'][0]
+        venue.update(dmas=[{'id': 220}], markets=[{'id': '10'}])
+        event['promoter'] = {'id': '494'}
+        event['dates']['start']['dateTBA'] = True
+        self.mirror.add([ticketpy.model.Event.from_json(event)])
+        for params in ({'dma_id': 220}, {'market_id': '10,11'},
+                       {'promoter_id': '494'}, {'include_tba': 'only'}):
+            self.assertEqual(['e100'], [e.id for e in self.mirror.find_events(
+                **params)], params)
+        self.assertEqual(25, self.mirror.find_events(
+            include_tba=False).total_elements)
+        self.assertEqual(26, self.mirror.find_events(
+            include_tba='yes', include_tbd='no').total_elements)
+
+    def test_find_venues(self):
+        pg = self.mirror.find_venues(keyword='tabern', country_code='US')
+        self.assertEqual(['KovZpaFEZe'], [v.id for v in pg])
+
+    def test_incremental_sync(self):
+        # Upcoming events, so their changes are looked for
+        day = util.utc_now().replace(hour=0, minute=0, second=0) + \
+            timedelta(days=1)
+        session = DateStubSession(48, start=day)
+        client = ticketpy.ApiClient('random_key', session=session)
+        self.mirror = mirror.Mirror()
+        self.mirror.sync(client, day, day + timedelta(days=1))
+        requests_before = len(session.requests)
+
+        session.events[3][2]['dates']['status']['code'] = 'cancelled'
+        moved = session.events[5][2]
+        moved['dates']['start']['dateTime'] = util.timestamp(
+            day + timedelta(days=3))
+        session.events[5] = (day + timedelta(days=3),) + \
+            session.events[5][1:]
+        session.add_event(day + timedelta(hours=6, minutes=30), day)
+        del session.events[7]
+        stats = self.mirror.sync(client, day, day + timedelta(days=2),
+                                 max_age=timedelta(0))
+
+        requests = session.requests[requests_before:]
+        # The new day, the upcoming (already synced) day, and the events
+        # that weren't found again
+        self.assertEqual([util.timestamp(day + timedelta(days=1)),
+                          util.timestamp(day)],
+                         [params['startDateTime'] for (_, params)
+                          in requests[:2]])
+        self.assertEqual('e5,e7', requests[-1][1]['id'])
+        # e25-e47 and the new event, then e3 and e5; e7 was deleted
+        self.assertEqual((48, 24, 2, 1), stats)
+        self.assertEqual(48, self.mirror.find_events(
+            start_date_time=day).total_elements)
+        self.assertEqual('cancelled', self.mirror.find_events(
+            event_id='e3')[0].status)
+        self.assertEqual([], list(self.mirror.find_events(event_id='e7')))
+
+        # Requested less than max_age ago: nothing to do
+        requests_before = len(session.requests)
+        stats = self.mirror.sync(client, day, day + timedelta(days=2))
+        self.assertEqual((0, 0, 0, 0), stats)
+        self.assertEqual(requests_before, len(session.requests))
+
+
+class IdStubSession(StubSession):
+    """``StubSession`` answering comma-separated *id* event searches
+    with every requested ID that's in ``known_ids``"""
+    def __init__(self, known_ids):
+        super().__init__()
+        self.known_ids = set(known_ids)
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        ids = params['id'].split(',')
+        events = [event_json(i) for i in ids if i in self.known_ids]
+        return self._response(url, params, page_json(
+            'events', events, size=int(params['size'])))
+
+
+class TestByIds(TestCase):
+    def test_by_ids(self):
+        known = ['e{}'.format(i) for i in range(120)]
+        session = IdStubSession(known)
+        client = ticketpy.ApiClient('random_key', session=session)
+        ids = known + ['e0', 'missing1', 'e5', 'missing2']
+        with self.assertLogs('ticketpy.query', 'WARNING') as logs:
+            events = client.events.by_ids(ids, chunk_size=25)
+        self.assertIn('missing1, missing2', logs.output[0])
+        self.assertEqual(122, len(events))
+        self.assertListEqual(known + ['missing1', 'missing2'], list(events))
+        self.assertEqual('e42', events['e42'].id)
+        self.assertIsNone(events['missing1'])
+        self.assertEqual(5, len(session.requests))
+        self.assertTrue(all(int(params['size']) <= 25
+                            for url, params in session.requests))
+
+    def test_bad_arguments(self):
+        session = IdStubSession(['e1'])
+        client = ticketpy.ApiClient('random_key', session=session)
+        self.assertRaises(ValueError, client.events.by_ids, ['e1'],
+                          chunk_size=0)
+        self.assertRaises(ValueError, client.events.by_ids, ['e1'],
+                          workers=0)
+        self.assertEqual(0, len(session.requests))
+
+
+class TestTaxonomy(TestCase):
+    def setUp(self):
+        self.session = StubSession(page_json('classifications', [
+            classification_json(),
+            {'primary': True, 'type': {'id': 'KZAyXgnZfZ7v7nI',
+                                       'name': 'Undefined'}}
+        ]))
+        self.tm = ticketpy.ApiClient('random_key', session=self.session)
+
+    def test_lookups(self):
+        self.assertEqual('Music', self.tm.segment_by_id(
+            'KZFzniwnSyZfZ7v7nJ').name)
+        self.assertEqual('Jazz', self.tm.genre_by_id('KnvZfZ7vAvE').name)
+        subgenre = self.tm.subgenre_by_id('KZazBEonSMnZfZ7vF1n')
+        self.assertEqual('Big Band', subgenre.name)
+        # Taxonomy is loaded once, then lookups are in-memory
+        self.assertEqual(1, len(self.session.requests))
+
+        taxonomy = self.tm.taxonomy
+        self.assertEqual('Jazz', taxonomy.parent(subgenre.id).name)
+        self.assertEqual('Music', taxonomy.parent('KnvZfZ7vAvE').name)
+        self.assertIsNone(taxonomy.parent('KZFzniwnSyZfZ7v7nJ'))
+
+    def test_snapshot(self):
+        path = os.path.join(tempfile.mkdtemp(), 'taxonomy.json')
+        self.tm.taxonomy.save(path)
+        taxonomy = ticketpy.Taxonomy.load(path)
+        self.assertEqual(len(self.tm.taxonomy), len(taxonomy))
+        self.assertEqual(5, len(taxonomy))
+        client = ticketpy.ApiClient('random_key', taxonomy=taxonomy,
+                                    session=StubSession())
+        self.assertEqual('Bebop',
+                         client.subgenre_by_id('KZazBEonSMnZfZ7vkdl').name)
+
+    def test_genre_not_found(self):
+        cl = ticketpy.model.Classification.from_json(classification_json())
+        self.assertIsNone(ticketpy.query.ClassificationQuery._genre(
+            cl, 'asdf'))
+
+
+class AsyncStubSession(StubSession):
+    """``StubSession`` for ``AsyncApiClient`` (mimics ``aiohttp``)"""
+    def get(self, url, params=None, **kwargs):
+        resp = super().get(url, params)
+        return AsyncStubResponse(resp)
+
+    async def close(self):
+        pass
+
+
+class AsyncPagingStubSession(PagingStubSession):
+    """``PagingStubSession`` for ``AsyncApiClient``"""
+    def get(self, url, params=None, **kwargs):
+        return AsyncStubResponse(super().get(url, params))
+
+    async def close(self):
+        pass
+
+
+class AsyncStubResponse:
+    def __init__(self, response):
+        self.status = response.status_code
+        self.url = response.url
+        self.headers = response.headers
+        self.response = response
+        self.content = self
+        self.released = False
+
+    async def read(self):
+        return self.response.content
+
+    async def iter_chunked(self, size):
+        for chunk in self.response.iter_content(size):
+            yield chunk
+
+    def release(self):
+        self.released = True
+
+    def __await__(self):
+        return self.__self().__await__()
+
+    async def __self(self):
+        return self
+
+
+@skipIf(aio.aiohttp is None, "aiohttp not installed")
+class TestAsyncApiClient(TestCase):
+    def test_find(self):
+        events = [{'id': str(i), 'name': 'Event'} for i in range(3)]
+        session = AsyncStubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+
+        async def find():
+            async with aio.AsyncApiClient('random_key',
+                                          session=session) as client:
+                resp = await client.events.find(size=2)
+                return [e.id async for pg in resp for e in pg]
+
+        self.assertListEqual(['0', '1', '2'], asyncio.run(find()))
+        self.assertEqual('1', session.requests[1][1]['page'])
+
+    def test_items(self):
+        events = [{'id': str(i), 'name': 'Event'} for i in range(3)]
+        session = AsyncStubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+
+        async def items():
+            async with aio.AsyncApiClient('random_key',
+                                          session=session) as client:
+                resp = await client.events.find(size=2)
+                return [e.id async for e in resp.items(max_items=2)]
+
+        self.assertListEqual(['0', '1'], asyncio.run(items()))
+        self.assertEqual(1, len(session.requests))
+
+    def test_by_id(self):
+        session = AsyncStubSession({'id': 'K8vZ9171okV', 'name': 'Yankees',
+                                    'classifications': []})
+        client = aio.AsyncApiClient('random_key', session=session)
+        attr = asyncio.run(client.attractions.by_id('K8vZ9171okV'))
+        self.assertEqual('Yankees', attr.name)
+
+    def test_stream(self):
+        events = [{'id': str(i), 'name': 'Event'} for i in range(4)]
+        session = AsyncStubSession(
+            page_json('events', events[:2], size=2, total_pages=2),
+            page_json('events', events[2:], number=1, size=2, total_pages=2)
+        )
+        client = aio.AsyncApiClient('random_key', session=session)
+
+        async def stream():
+            resp = await client.events.find(size=2, stream=True)
+            resp.chunk_size = 16
+            return resp, [e.id async for e in resp]
+
+        resp, ids = asyncio.run(stream())
+        self.assertListEqual(['0', '1', '2', '3'], ids)
+        self.assertEqual(1, resp.page.number)
+        self.assertNotIn('stream', session.requests[0][1])
+
+    def test_throttle_retry(self):
+        session = AsyncStubSession(
+            (429, fault_json(ticketpy.ratelimit.SPIKE_ARREST_VIOLATION), {}),
+            (200, page_json(), {'Rate-Limit-Available': '4321'})
+        )
+        limiter = ticketpy.RateLimiter(rate=100)
+        client = aio.AsyncApiClient('random_key', session=session,
+                                    rate_limiter=limiter)
+        asyncio.run(client.events.find())
+        stats = limiter.stats()
+        self.assertEqual(2, len(session.requests))
+        self.assertEqual(1, stats.throttled)
+        self.assertEqual(4321, stats.remaining)
+
+    def test_cache_and_coalesce(self):
+        session = AsyncStubSession(page_json(), page_json())
+        cache = ticketpy.ResponseCache()
+        client = aio.AsyncApiClient('random_key', session=session,
+                                    cache=cache, coalesce=True)
+
+        async def find():
+            await asyncio.gather(client.events.find(keyword='Jazz'),
+                                 client.events.find(keyword='Jazz'))
+            await client.events.find(keyword='Jazz')
+
+        asyncio.run(find())
+        self.assertEqual(1, len(session.requests))
+        self.assertEqual(1, client.coalescer.stats().collapsed)
+        self.assertEqual(0, client.coalescer.stats().in_flight)
+        self.assertEqual(1, cache.stats().hits)
+
+    def test_prefetch(self):
+        session = AsyncPagingStubSession(total_pages=12)
+        client = aio.AsyncApiClient('random_key', session=session,
+                                    prefetch_workers=4)
+
+        async def items():
+            resp = await client.events.find(size=1)
+            return [e.id async for e in resp.items(max_items=9)]
+
+        self.assertListEqual([str(i) for i in range(9)], asyncio.run(items()))
+        self.assertEqual(9, len(session.requests))
+
+    def test_taxonomy(self):
+        session = AsyncStubSession(
+            page_json('classifications', [classification_json()]))
+        client = aio.AsyncApiClient('random_key', session=session)
+        self.assertIsNone(client.taxonomy)
+
+        async def lookups():
+            return (await client.genre_by_id('KnvZfZ7vAvE'),
+                    await client.subgenre_by_id('KZazBEonSMnZfZ7vF1n'))
+
+        genre, subgenre = asyncio.run(lookups())
+        self.assertEqual('Jazz', genre.name)
+        self.assertEqual('Big Band', subgenre.name)
+        self.assertEqual(1, len(session.requests))
+        self.assertIsNotNone(client.taxonomy)
+
+
+class AsyncIdStubSession(IdStubSession):
+    """``IdStubSession`` for ``AsyncApiClient``"""
+    def get(self, url, params=None, **kwargs):
+        return AsyncStubResponse(super().get(url, params))
+
+    async def close(self):
+        pass
+
+
+@skipIf(aio.aiohttp is None, "aiohttp not installed")
+class TestAsyncByIds(TestCase):
+    def test_by_ids(self):
+        known = ['e{}'.format(i) for i in range(60)]
+        session = AsyncIdStubSession(known)
+        client = aio.AsyncApiClient('random_key', session=session)
+        with self.assertLogs('ticketpy.query', 'WARNING') as logs:
+            events = asyncio.run(client.events.by_ids(
+                known + ['missing'], chunk_size=25))
+        self.assertIn('missing', logs.output[0])
+        self.assertListEqual(known + ['missing'], list(events))
+        self.assertEqual('e42', events['e42'].id)
+        self.assertIsNone(events['missing'])
+        self.assertEqual(3, len(session.requests))
+
+    def test_bad_arguments(self):
+        session = AsyncIdStubSession(['e1'])
+        client = aio.AsyncApiClient('random_key', session=session)
+        for kwargs in ({'chunk_size': 0}, {'workers': 0}):
+            with self.assertRaises(ValueError):
+                asyncio.run(client.events.by_ids(['e1'], **kwargs))
+        self.assertEqual(0, len(session.requests))
+
+    def test_sync_only(self):
+        client = aio.AsyncApiClient('random_key', session=AsyncStubSession())
+        self.assertRaises(TypeError, client.events.export, 'events.csv')
+        self.assertRaises(TypeError, client.events.harvest,
+                          '2024-01-01T00:00:00', '2024-02-01T00:00:00')
+
+
+class TestStartup(TestCase):
+    def run_python(self, code):
+        """Output of ``code`` run by a fresh interpreter"""
+        return subprocess.run([sys.executable, '-c', code], check=True,
+                              stdout=subprocess.PIPE,
+                              universal_newlines=True).stdout
+
+    def test_import_budget(self):
+        out = self.run_python(
+            "import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import ticketpy\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(sys.modules))")
+        seconds, modules = out.splitlines()
+        for heavy in ('requests', 'ticketpy.client', 'ticketpy.model',
+                      'pyarrow', 'numpy', 'aiohttp', 'msgspec'):
+            self.assertNotIn(heavy, modules.split())
+        # Generous, to leave room for slow machines: it takes a few ms
+        self.assertLess(float(seconds), 0.1)
+
+    def test_client_imports(self):
+        out = self.run_python(
+            "import logging, sys, ticketpy\n"
+            "ticketpy.ApiClient\n"
+            "print('pyarrow' in sys.modules, "
+            "logging.getLogger('ticketpy.client').handlers)")
+        self.assertEqual('False []', out.strip())
+
+    def test_lazy_attributes(self):
+        self.assertIs(ticketpy.client.ApiClient, ticketpy.ApiClient)
+        stream = ticketpy.stream
+        self.assertIs(sys.modules['ticketpy.stream'], stream)
+        self.assertIn('Taxonomy', dir(ticketpy))
+        with self.assertRaises(AttributeError):
+            ticketpy.Nothing
+
+
 class TestApiClient(TestCase):
     def setUp(self):
         self.api_client = get_client()
@@ -246,9 +1702,10 @@ class TestEventQuery(TestCase):
         all_nearby = []
         for e in event_list:
             nearby = [v for v in e.venues if
-                      haversine(latlon1,
-                                {'latitude': v.location['latitude'],
-                                 'longitude': v.location['longitude']}) <= 3]
+                      util.distance(float(latlon1['latitude']),
+                                    float(latlon1['longitude']),
+                                    float(v.latitude), float(v.longitude),
+                                    util.earth_radius['miles']) <= 3]
             all_nearby += nearby
         # Ensure we aren't passing the test on an empty list
         self.assertGreater(len(all_nearby), 0)
@@ -0,0 +1,58 @@
+"""Conversions shared by the query, export, mirror and spatial modules"""
+import math
+from datetime import datetime, timezone
+
+#: Format of API timestamps (UTC)
+date_time_format = '%Y-%m-%dT%H:%M:%SZ'
+
+#: Radius of the earth in each distance unit of ``by_location()``
+earth_radius = {
+    'miles': 3956.0,
+    'km': 6371.0
+}
+
+
+def date_time(value):
+    """Naive UTC ``datetime`` (to the second) of a ``datetime`` or API
+    timestamp. Naive ``datetime`` objects are taken to be UTC already.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=0)
+    return datetime.strptime(value, date_time_format)
+
+
+def timestamp(value):
+    """API timestamp of a ``datetime`` (or an API timestamp)"""
+    return date_time(value).strftime(date_time_format)
+
+
+def utc_now():
+    """Current naive UTC ``datetime``, to the second"""
+    return date_time(datetime.now(timezone.utc))
+
+
+def to_float(value):
+    """``float`` of a coordinate/price (the API sends some as strings),
+    or ``None``"""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def distance(latitude1, longitude1, latitude2, longitude2, radius):
+    """Great circle distance between two points, in decimal degrees
+    (``None`` if a coordinate of the first point is missing).
+
+    :param radius: Radius of the earth, in the unit of the distance
+        (see ``earth_radius``)
+    """
+    if latitude1 is None or longitude1 is None:
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (latitude1, longitude1,
+                                                latitude2, longitude2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * math.asin(math.sqrt(min(a, 1.0))) * radius